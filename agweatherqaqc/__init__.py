@@ -11,7 +11,11 @@ __version__ = '1.0.4'
 
 from agweatherqaqc import agweatherqaqc
 from agweatherqaqc import utils
+from agweatherqaqc import archive_functions
 from agweatherqaqc import calc_functions
+from agweatherqaqc import date_functions
+from agweatherqaqc import group_functions
 from agweatherqaqc import input_functions
+from agweatherqaqc import kernels
 from agweatherqaqc import plot
 from agweatherqaqc import qaqc_functions
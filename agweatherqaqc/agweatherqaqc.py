@@ -1,15 +1,36 @@
 from bokeh.layouts import gridplot
 from bokeh.plotting import output_file, reset_output, save
 import datetime as dt
+import json
 from math import ceil
 import numpy as np
 import os
 import pandas as pd
-from agweatherqaqc import utils, calc_functions, input_functions, plot, qaqc_functions
+from agweatherqaqc import utils, archive_functions, calc_functions, date_functions, group_functions, input_functions, \
+    kernels, plot, qaqc_functions
 from refet.calcs import _wind_height_adjust
 import warnings
 
 
+# Variables changed by each option of the correction menu in WeatherQC._correct_data, option 9 directly changes how
+# compiled_ea is sourced
+CORRECTED_VARIABLES = {1: ('tmax', 'tmin'), 2: ('tmin', 'tdew'), 3: ('ws',), 4: ('precip',), 5: ('rs',), 6: ('ea',),
+                       7: ('rhmax', 'rhmin'), 8: ('rhavg',), 9: ('compiled_ea',)}
+
+# Derived quantities that WeatherQC._correct_data keeps up to date between corrections, in the order they are
+# recalculated, and the corrected variables or earlier derived quantities each one is calculated from.
+# After a correction only the derived quantities downstream of the corrected variables are recalculated.
+DERIVED_DEPENDENCIES = {
+    'complete_temperature': ('tmax', 'tmin'),  # complete_tmax and complete_tmin, refilled after option 1 or 2
+    'humidity': ('tmax', 'tmin', 'tdew', 'ea', 'rhmax', 'rhmin', 'rhavg'),  # ea, tdew, and tdew_ko
+    'delta_t': ('humidity',),  # delta_t, k_not, and mm_* temperature variables
+    'complete_tdew': ('tdew', 'ea', 'rhmax', 'rhmin', 'rhavg'),  # only refilled when a humidity var is corrected
+    'compiled_ea': ('humidity', 'complete_tdew'),
+    'complete_ea': ('compiled_ea',),
+    'rso': ('complete_ea',),  # rso, along with eto and etr that are recalculated after corrections are finished
+}
+
+
 class WeatherQC:
     """
     The WeatherQC class is a holistic package for the QC of agricultural weather data.
@@ -35,9 +56,11 @@ class WeatherQC:
     within `agweatherqaqc.qaqc_functions` and `agweatherqaqc.calc_functions` for more information on
     the overall process and individual steps.
     """
-    def __init__(self, config_file_path='config.ini', metadata_file_path=None, gridplot_columns=1):
+    def __init__(self, config_file_path='config.ini', metadata_file_path=None, gridplot_columns=1,
+                 recipe_file_path=None):
         self.config_path = config_file_path
         self.metadata_path = metadata_file_path
+        self.recipe_path = recipe_file_path  # corrections are replayed from this recipe instead of asking the user
         self.gridplot_columns = gridplot_columns
         self.script_mode = 0
         self.mc_iterations_pre_corrections = 100  # initially do only a few to save time
@@ -60,24 +83,64 @@ class WeatherQC:
         self.folder_path = self.config_dict['folder_path']
         self.auto_mode = self.config_dict['auto_flag']
         self.fill_mode = self.config_dict['fill_flag']
+        self.float_dtype = self.config_dict['float_dtype']  # precision of station variables and derived records
+        # Generator for the random samples that fill missing temperature and wind speed and fit the Thornton-Running
+        # solar radiation that fills missing rs, seeded for reproducible fills. Rso used for rs correction is built
+        # from filled records, so a replayed recipe reuses the seed of the session it was saved from, and a session
+        # without a seed draws one so that it can be saved into its correction recipe.
+        self.fill_random_seed = self.config_dict['fill_random_seed']
+        if self.recipe_path is not None:
+            self.replay_recipe = input_functions.read_correction_recipe(self.recipe_path)
+            self.fill_random_seed = self.replay_recipe.get('fill_random_seed', self.fill_random_seed)
+        if self.fill_random_seed == -1:
+            self.fill_random_seed = int(np.random.SeedSequence().generate_state(1)[0])
+            with open(self.log_file, 'a') as logger:
+                logger.write('No fill random seed was provided, seed %s was drawn for this session. \n'
+                             % self.fill_random_seed)
+        self.fill_rng = np.random.default_rng(self.fill_random_seed)
 
         print("\nSystem: Raw data successfully extracted from station file.")
+        # Only columns that are not already stored in float_dtype are cast, as astype copies every column it is given on
+        # older versions of pandas, which would copy memory-mapped station archives
+        recast_dtypes = {var: self.float_dtype for var in archive_functions.ARCHIVE_VARIABLES
+                         if self.data_df[var].dtype != self.float_dtype}
+        if recast_dtypes:
+            self.data_df = self.data_df.astype(recast_dtypes)
 
         # Extract individual variables from data frame back into to numpy arrays.
-        self.data_year = np.array(self.data_df.year)
-        self.data_month = np.array(self.data_df.month)
-        self.data_day = np.array(self.data_df.day)
-        self.data_tavg = np.array(self.data_df.tavg)
-        self.data_tmax = np.array(self.data_df.tmax)
-        self.data_tmin = np.array(self.data_df.tmin)
-        self.data_tdew = np.array(self.data_df.tdew)
-        self.data_ea = np.array(self.data_df.ea)
-        self.data_rhavg = np.array(self.data_df.rhavg)
-        self.data_rhmax = np.array(self.data_df.rhmax)
-        self.data_rhmin = np.array(self.data_df.rhmin)
-        self.data_rs = np.array(self.data_df.rs)
-        self.data_ws = np.array(self.data_df.ws)
-        self.data_precip = np.array(self.data_df.precip)
+        # All date arrays are derived from the continuous daily index of data_df as datetime64[D] dates
+        self.data_dates = np.asarray(self.data_df.index).astype('datetime64[D]')
+        (self.data_year, self.data_month, self.data_day, self.data_doy) = date_functions.split_dates(self.data_dates)
+        self.month_groups = group_functions.month_groups(self.data_month)  # shared by all mean monthly calculations
+
+        if self.config_dict['station_extension'] == archive_functions.ARCHIVE_EXTENSION:
+            # Station archives are memory-mapped copy-on-write, so variables are views that can be modified in place
+            # without copying the record or changing the archive. The block mapped when the archive was read is reused.
+            station_vars = {var: values.astype(self.float_dtype, copy=False)
+                            for (var, values) in self.config_dict['station_archive_data'].items()}
+            self.data_tavg = station_vars['tavg']
+            self.data_tmax = station_vars['tmax']
+            self.data_tmin = station_vars['tmin']
+            self.data_tdew = station_vars['tdew']
+            self.data_ea = station_vars['ea']
+            self.data_rhavg = station_vars['rhavg']
+            self.data_rhmax = station_vars['rhmax']
+            self.data_rhmin = station_vars['rhmin']
+            self.data_rs = station_vars['rs']
+            self.data_ws = station_vars['ws']
+            self.data_precip = station_vars['precip']
+        else:
+            self.data_tavg = np.array(self.data_df.tavg, dtype=self.float_dtype)
+            self.data_tmax = np.array(self.data_df.tmax, dtype=self.float_dtype)
+            self.data_tmin = np.array(self.data_df.tmin, dtype=self.float_dtype)
+            self.data_tdew = np.array(self.data_df.tdew, dtype=self.float_dtype)
+            self.data_ea = np.array(self.data_df.ea, dtype=self.float_dtype)
+            self.data_rhavg = np.array(self.data_df.rhavg, dtype=self.float_dtype)
+            self.data_rhmax = np.array(self.data_df.rhmax, dtype=self.float_dtype)
+            self.data_rhmin = np.array(self.data_df.rhmin, dtype=self.float_dtype)
+            self.data_rs = np.array(self.data_df.rs, dtype=self.float_dtype)
+            self.data_ws = np.array(self.data_df.ws, dtype=self.float_dtype)
+            self.data_precip = np.array(self.data_df.precip, dtype=self.float_dtype)
 
         self.output_file_path = (self.folder_path +
                                  "/correction_files/output_data/" + self.station_name + "_output" + ".xlsx")
@@ -90,14 +153,6 @@ class WeatherQC:
         self.data_length = self.data_year.shape[0]
         self.station_pressure = 101.3 * (((293 - (0.0065 * self.station_elev)) / 293) ** 5.26)  # units kPa, EQ 3 ASCE
 
-        # Calculate DOY from Y/M/D values
-        self.data_doy = []
-        for i in range(self.data_length):
-            # Create list of string DOY values
-            self.data_doy.append(dt.date(self.data_year[i], self.data_month[i], self.data_day[i]).strftime("%j"))
-
-        self.data_doy = np.array(list(map(int, self.data_doy)))  # Converts list of string values into ints
-
         # Calculate tavg if it is not provided by dataset
         if self.column_ser.tavg == -1:
             # Tavg not provided
@@ -114,7 +169,8 @@ class WeatherQC:
 
         # Calculates secondary temperature values and mean monthly counterparts
         (self.delta_t, self.mm_delta_t, self.k_not, self.mm_k_not, self.mm_tmin, self.mm_tdew) = calc_functions. \
-            calc_temperature_variables(self.data_month, self.data_tmax, self.data_tmin, self.data_tdew)
+            calc_temperature_variables(self.data_month, self.data_tmax, self.data_tmin, self.data_tdew,
+                                       self.month_groups)
 
         '''
             Tdew_ko will have all missing values of tdew filled in with tmin - Ko curve method, but will keep missing
@@ -149,25 +205,28 @@ class WeatherQC:
                        of values. Unless the user specifically wants to export this day (option is in config file)
                        then this data is only used to create a complete record of Rso values for Rs correction,
                        and then is discarded at the end.
+            compiled_ea_source = the source used for each day of compiled_ea, see calc_functions.COMPILED_EA_SOURCES
         '''
-        self.compiled_ea = calc_functions.calc_compiled_ea(self.data_tmax, self.data_tmin, self.data_tavg,
-                                                           self.data_ea, self.data_tdew, self.column_ser.tdew,
-                                                           self.data_rhmax, self.column_ser.rhmax, self.data_rhmin,
-                                                           self.column_ser.rhmin, self.data_rhavg,
-                                                           self.column_ser.rhavg, self.data_tdew_ko)
+        (self.compiled_ea, self.compiled_ea_source) = calc_functions.\
+            calc_compiled_ea(self.data_tmax, self.data_tmin, self.data_tavg, self.data_ea, self.data_tdew,
+                             self.column_ser.tdew, self.data_rhmax, self.column_ser.rhmax, self.data_rhmin,
+                             self.column_ser.rhmin, self.data_rhavg, self.column_ser.rhavg, self.data_tdew_ko)
 
         # Calculates rso and grass/alfalfa reference evapotranspiration from refet package
         warnings.filterwarnings('ignore', 'invalid value encountered')  # invalid value warning for nans
         (self.rso, self.mm_rs, self.eto, self.etr, self.mm_eto, self.mm_etr) = calc_functions.\
             calc_rso_and_refet(self.station_lat, self.station_elev, self.ws_anemometer_height, self.data_doy,
                                self.data_month, self.data_tmax, self.data_tmin, self.compiled_ea, self.data_ws,
-                               self.data_rs)
+                               self.data_rs, self.month_groups)
 
         # Calculate original and optimized Thornton Running solar radiation using a monte carlo approach.
         # Only do a few number of iterations here as this will be recomputed once the data has been corrected
         (self.orig_rs_tr, self.mm_orig_rs_tr, self.opt_rs_tr, self.mm_opt_rs_tr) = calc_functions. \
             calc_org_and_opt_rs_tr(self.mc_iterations_pre_corrections, self.log_file, self.data_month,
-                                   self.delta_t, self.mm_delta_t, self.data_rs, self.rso)
+                                   self.delta_t, self.mm_delta_t, self.data_rs, self.rso, self.month_groups,
+                                   self.config_dict['rs_tr_optimizer'], self.config_dict['rs_tr_tolerance'],
+                                   self.config_dict['rs_tr_max_evaluations'],
+                                   self.config_dict['rs_tr_monthly_coefficients'], self.fill_rng)
 
         warnings.resetwarnings()  # reset warning filter to default
 
@@ -181,19 +240,16 @@ class WeatherQC:
         self.original_df['compiled_ea'] = self.compiled_ea
 
         # Create datetime variables that will be used by bokeh plot and correction functions
-        self.dt_array = []
-        for i in range(self.data_length):
-            self.dt_array.append(dt.datetime(self.data_year[i], self.data_month[i], self.data_day[i]))
-        self.dt_array = np.array(self.dt_array, dtype=np.datetime64)
+        self.dt_array = self.data_dates.astype('datetime64[us]')
         self.mm_dt_array = np.array([1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12])
-        self.data_null = np.empty(self.data_length) * np.nan
+        self.data_null = np.full(self.data_length, np.nan, dtype=self.float_dtype)
         self.mm_data_null = np.zeros(12) * np.nan
 
     def _correct_data(self):
         """
             Correct data
             Loop where user selects an option, corrects it,
-            then the script recalculates all downstream variables,
+            then the script recalculates the downstream variables that depend on it,
             and finally prompts the user again.
         """
 
@@ -201,6 +257,12 @@ class WeatherQC:
         # create a flag to check if composite ea has been adjusted or not before correcting solar radiation
         self.humidity_adjusted = False
 
+        # Every pass through the correction menu is recorded as a recipe step, so that the session can be replayed
+        # without prompts. If a recipe was provided its steps are replayed in order instead of asking the user.
+        self.correction_recipe = {'station': self.station_name, 'fill_random_seed': self.fill_random_seed, 'steps': []}
+        if self.recipe_path is not None:
+            replay_steps = iter(self.replay_recipe['steps'])
+
         # Complete_vars are going to be filled for the whole record, which may be put into output file if user requests
         self.complete_tmax = np.array(self.data_tmax)
         self.complete_tmin = np.array(self.data_tmin)
@@ -208,114 +270,69 @@ class WeatherQC:
         self.complete_tdew = np.array(self.data_tdew)
 
         # Create arrays that will track which values have been filled (replace missing data) by the script
-        self.fill_tmax = np.zeros(self.data_length)
-        self.fill_tmin = np.zeros(self.data_length)
-        self.fill_ea = np.zeros(self.data_length)
-        self.fill_tdew = np.zeros(self.data_length)
-        self.fill_rs = np.zeros(self.data_length)
-        self.fill_ws = np.zeros(self.data_length)
-        self.fill_rso = np.zeros(self.data_length)
+        self.fill_tmax = np.zeros(self.data_length, dtype=self.float_dtype)
+        self.fill_tmin = np.zeros(self.data_length, dtype=self.float_dtype)
+        self.fill_ea = np.zeros(self.data_length, dtype=self.float_dtype)
+        self.fill_tdew = np.zeros(self.data_length, dtype=self.float_dtype)
+        self.fill_rs = np.zeros(self.data_length, dtype=self.float_dtype)
+        self.fill_ws = np.zeros(self.data_length, dtype=self.float_dtype)
+        self.fill_rso = np.zeros(self.data_length, dtype=self.float_dtype)
+
+        # Rso, ETo, and ETr are recalculated into the same buffers after every correction instead of new arrays,
+        # the values calculated before corrections are kept separately in original_df
+        self.refet_buffers = tuple(np.empty(self.data_length, dtype=self.float_dtype) for _ in range(3))
+
+        # Derived quantities that need to be recalculated, see DERIVED_DEPENDENCIES. Rso is recalculated after the
+        # first correction because it was calculated from compiled_ea instead of complete_ea before corrections
+        self.stale = {'rso'}
 
         # Begin loop for correcting variables
         while True:
             reset_output()  # clears bokeh output, prevents ballooning file sizes
-            print('\nPlease select which of the following variables you want to correct'
-                  '\n   Enter 1 for TMax and TMin.'
-                  '\n   Enter 2 for TMin and TDew, if TDew was provided.'
-                  '\n   Enter 3 for Windspeed.'
-                  '\n   Enter 4 for Precipitation.'
-                  '\n   Enter 5 for Solar Radiation (Rs).'
-                  '\n   Enter 6 for Vapor Pressure (Ea), if it was provided.'
-                  '\n   Enter 7 for RH Maximum and Minimum, if they were provided.'
-                  '\n   Enter 8 for RH Average, if it was provided.'
-                  '\n   Enter 9 to adjust how compiled humidity is sourced.'
-                  '\n   Enter 0 to stop applying corrections.'
-                  )
-
-            choice_loop = True
-            while choice_loop:
-                user = utils.get_int_input(0, 9, "\nEnter your selection: ")
-                # The following if statements check whether user tries to correct a variable that was not provided
-                # or make sure correction is being done in the ideal order
-                if user == 2 and self.column_ser.tdew == -1:
-                    print('\nDewpoint temperature was not provided by the file, please choose a different option.')
-                elif user == 6 and self.column_ser.ea == -1:
-                    print('\nVapor Pressure was not provided by the file, please choose a different option.')
-                elif user == 7 and (self.column_ser.rhmax == -1 or self.column_ser.rhmin == -1):
-                    print('\nRHMax and RHMin were not provided by the file, please choose a different option.')
-                elif user == 8 and self.column_ser.rhavg == -1:
-                    print('\nRHAvg was not provided by the file, please choose a different option.')
-                elif user == 5 and not self.humidity_adjusted:
-                    print('\n\nBefore correcting solar radiation, did you want to adjust compiled humidity?.')
-                    print('Doing so may allow you to get the best possible humidity record for Rs correction.')
-                    print('\nEnter 1 to adjust compiled humidity or 0 to skip.')
-
-                    humid_choice = utils.get_int_input(0, 1, 'Enter your selection: ')
-                    if humid_choice == 1:  # change original choice to the adjust humidity option
-                        user = 9
-                    choice_loop = False
-                else:
-                    choice_loop = False
+            if self.recipe_path is not None:
+                # Replaying a recipe, the next step selects the option and 0 stops once every step has been replayed
+                recipe_step = next(replay_steps, {'option': 0})
+                user = self._check_recipe_option(recipe_step['option'])
+            else:
+                user = self._select_correction_option()
+                recipe_step = {'option': user}
+                if user != 0:
+                    self.correction_recipe['steps'].append(recipe_step)
 
             ##########
             # Correcting individual variables based on user choice
             # Correcting Max/Min Temperature data
             if user == 1:
-                (self.data_tmax, self.data_tmin) = qaqc_functions.\
-                    correction(self.station_name, self.log_file, self.folder_path,
-                               self.data_tmax, self.data_tmin, self.dt_array,
-                               self.data_month, self.data_year, 1, self.auto_mode)
+                (self.data_tmax, self.data_tmin) = self._correct_variables(self.data_tmax, self.data_tmin, 1,
+                                                                           recipe_step)
             # Correcting Min/Dew Temperature data
             elif user == 2:
-                (self.data_tmin, self.data_tdew) = qaqc_functions.\
-                    correction(self.station_name, self.log_file, self.folder_path,
-                               self.data_tmin, self.data_tdew, self.dt_array,
-                               self.data_month, self.data_year, 2, self.auto_mode)
+                (self.data_tmin, self.data_tdew) = self._correct_variables(self.data_tmin, self.data_tdew, 2,
+                                                                           recipe_step)
             # Correcting Windspeed
             elif user == 3:
-                (self.data_ws, self.data_null) = qaqc_functions.\
-                    correction(self.station_name, self.log_file, self.folder_path,
-                               self.data_ws, self.data_null, self.dt_array,
-                               self.data_month, self.data_year, 3, self.auto_mode)
+                (self.data_ws, self.data_null) = self._correct_variables(self.data_ws, self.data_null, 3, recipe_step)
             # Correcting Precipitation
             elif user == 4:
-                (self.data_precip, self.data_null) = qaqc_functions.\
-                    correction(self.station_name, self.log_file, self.folder_path,
-                               self.data_precip, self.data_null, self.dt_array,
-                               self.data_month, self.data_year, 4, self.auto_mode)
+                (self.data_precip, self.data_null) = self._correct_variables(self.data_precip, self.data_null, 4,
+                                                                             recipe_step)
             # Correcting Solar radiation
             elif user == 5:
-                (self.data_rs, self.data_null) = qaqc_functions.\
-                    correction(self.station_name, self.log_file, self.folder_path,
-                               self.data_rs, self.rso, self.dt_array,
-                               self.data_month, self.data_year, 5, self.auto_mode)
+                (self.data_rs, self.data_null) = self._correct_variables(self.data_rs, self.rso, 5, recipe_step)
             # Correcting Vapor Pressure
             elif user == 6:
-                (self.data_ea, self.data_null) = qaqc_functions.\
-                    correction(self.station_name, self.log_file, self.folder_path,
-                               self.data_ea, self.data_null, self.dt_array,
-                               self.data_month, self.data_year, 7, self.auto_mode)
+                (self.data_ea, self.data_null) = self._correct_variables(self.data_ea, self.data_null, 7, recipe_step)
             # Correcting Relative Humidity Max and Min
             elif user == 7:
-                (self.data_rhmax, self.data_rhmin) = qaqc_functions.\
-                    correction(self.station_name, self.log_file, self.folder_path,
-                               self.data_rhmax, self.data_rhmin, self.dt_array,
-                               self.data_month, self.data_year, 8, self.auto_mode)
+                (self.data_rhmax, self.data_rhmin) = self._correct_variables(self.data_rhmax, self.data_rhmin, 8,
+                                                                             recipe_step)
             # Correcting Relative Humidity Average
             elif user == 8:
-                (self.data_rhavg, self.data_null) = qaqc_functions.\
-                    correction(self.station_name, self.log_file, self.folder_path,
-                               self.data_rhavg, self.data_null, self.dt_array,
-                               self.data_month, self.data_year, 9, self.auto_mode)
+                (self.data_rhavg, self.data_null) = self._correct_variables(self.data_rhavg, self.data_null, 9,
+                                                                            recipe_step)
             # Adjusting compiled_ea
             elif user == 9:
-                self.compiled_ea = qaqc_functions.\
-                    compiled_humidity_adjustment(self.station_name, self.log_file, self.folder_path, self.dt_array,
-                                                 self.data_tmax, self.data_tmin, self.data_tavg, self.compiled_ea,
-                                                 self.data_ea, self.column_ser.ea, self.data_tdew, self.column_ser.tdew,
-                                                 self.data_tdew_ko, self.data_rhmax, self.column_ser.rhmax,
-                                                 self.data_rhmin, self.column_ser.rhmin,
-                                                 self.data_rhavg, self.column_ser.rhavg)
+                (self.compiled_ea, self.compiled_ea_source) = self._adjust_compiled_humidity(recipe_step)
                 self.humidity_adjusted = True
             else:
                 # user quits, exit out of loop
@@ -323,81 +340,61 @@ class WeatherQC:
                 # Break here because all recalculations were done at the end of the last loop iteration
                 break
 
-            if 1 <= user <= 2 or 6 <= user <= 8:
-                if user == 1:  # User has corrected temperature, so fill all missing values with a normal distribution
-                    # Reset 'complete' vars as the underlying var has been changed.
-                    self.complete_tmax = np.array(self.data_tmax)
-                    self.complete_tmin = np.array(self.data_tmin)
-
-                    # Remove corresponding TAvg observations after outliers have been removed from TMax and TMin
-                    tmax_removed_indices = np.array(np.where(np.isnan(self.data_tmax)))  # array of indices of nans
-                    tmin_removed_indices = np.array(np.where(np.isnan(self.data_tmin)))  # array of indices of nans
-                    self.data_tavg[tmax_removed_indices] = np.nan
-                    self.data_tavg[tmin_removed_indices] = np.nan
-
-                    # Create mean monthly and standard deviation
-                    self.mm_tmax = np.zeros(12)
-                    self.mm_tmin = np.zeros(12)
-                    self.std_tmax = np.zeros(12)
-                    self.std_tmin = np.zeros(12)
-
-                    for k in range(12):
-                        temp_indexes = np.where(self.data_month == k+1)[0]
-                        temp_indexes = np.array(temp_indexes, dtype=int)
-                        self.mm_tmax[k] = np.nanmean(self.data_tmax[temp_indexes])
-                        self.std_tmax[k] = np.nanstd(self.data_tmax[temp_indexes])
-                        self.mm_tmin[k] = np.nanmean(self.data_tmin[temp_indexes])
-                        self.std_tmin[k] = np.nanstd(self.data_tmin[temp_indexes])
-
-                    # Fill missing observations with samples from a normal distribution with monthly mean and variance
-                    for i in range(self.data_length):
-                        if np.isnan(self.data_tmax[i]):
-                            self.complete_tmax[i] = np.random.normal(self.mm_tmax[self.data_month[i] - 1],
-                                                                     self.std_tmax[self.data_month[i] - 1], 1)[0]
-                            self.fill_tmax[i] = self.complete_tmax[i]
-                        else:
-                            pass
-
-                        if np.isnan(self.data_tmin[i]):
-                            self.complete_tmin[i] = np.random.normal(self.mm_tmin[self.data_month[i] - 1],
-                                                                     self.std_tmin[self.data_month[i] - 1], 1)[0]
-                            self.fill_tmin[i] = self.complete_tmin[i]
-                        else:
-                            pass
-
-                        if (self.complete_tmax[i] <= self.complete_tmin[i]) or \
-                                (self.complete_tmax[i] - self.complete_tmin[i] <= 3):
-                            # This is a logical check to make sure that tmax is sufficiently distant from tmin once
-                            # they have been filled in, tmax needs to be warmer than tmin and daily temp isn't constant
-                            # so there should be at least a small difference in tmax-tmin
-
-                            # todo the below lines always provide a higher than average tmax
-                            #   and a lower than average tmin, this can be eventually improved
-                            # Fill this observation in with  mm observation with the difference of 1/2 of mm delta t
-                            self.complete_tmax[i] = self.mm_tmax[self.data_month[i] - 1] + \
-                                                    (0.5 * self.mm_delta_t[self.data_month[i] - 1])
-                            self.fill_tmax[i] = self.complete_tmax[i]
-
-                            self.complete_tmin[i] = self.mm_tmin[self.data_month[i] - 1] - \
-                                (0.5 * self.mm_delta_t[self.data_month[i] - 1])
-                            self.fill_tmin[i] = self.complete_tmin[i]
-                        else:
-                            # data is different enough to appear valid
-                            pass
-
-                    if self.fill_mode:
-                        # we are filling in data, so copy all the filled versions onto the original temperature
-                        self.data_tmax = np.array(self.complete_tmax)
-                        self.data_tmin = np.array(self.complete_tmin)
-                    else:
-                        # if we are not filling, we will hold the copies to later fill in rso, but will reset fill
-                        # tracking variables
-                        self.fill_tmax = np.zeros(self.data_length)
-                        self.fill_tmin = np.zeros(self.data_length)
+            # Only the derived quantities that depend on the corrected variables are recalculated below
+            self._mark_stale(CORRECTED_VARIABLES[user])
+
+            if 'complete_temperature' in self.stale:
+                # User has corrected tmax or tmin, so fill all missing values with a normal distribution
+                # Reset 'complete' vars as the underlying var has been changed.
+                self.complete_tmax = np.array(self.data_tmax)
+                self.complete_tmin = np.array(self.data_tmin)
+
+                # Remove corresponding TAvg observations after outliers have been removed from TMax and TMin
+                tmax_removed_indices = np.array(np.where(np.isnan(self.data_tmax)))  # array of indices of nans
+                tmin_removed_indices = np.array(np.where(np.isnan(self.data_tmin)))  # array of indices of nans
+                self.data_tavg[tmax_removed_indices] = np.nan
+                self.data_tavg[tmin_removed_indices] = np.nan
+
+                # Create mean monthly and standard deviation
+                (monthly_means, monthly_stds, _) = group_functions.grouped_stats(
+                    self.month_groups, np.vstack([self.data_tmax, self.data_tmin]))
+                (self.mm_tmax, self.mm_tmin) = monthly_means
+                (self.std_tmax, self.std_tmin) = monthly_stds
+
+                # Fill missing observations with samples from a normal distribution with monthly mean and variance
+                # All missing days of a variable are sampled in a single call
+                tmax_missing = np.isnan(self.data_tmax)
+                tmin_missing = np.isnan(self.data_tmin)
+                tmax_month = self.data_month[tmax_missing] - 1
+                tmin_month = self.data_month[tmin_missing] - 1
+
+                self.complete_tmax[tmax_missing] = self.fill_rng.normal(self.mm_tmax[tmax_month],
+                                                                        self.std_tmax[tmax_month])
+                self.fill_tmax[tmax_missing] = self.complete_tmax[tmax_missing]
+                self.complete_tmin[tmin_missing] = self.fill_rng.normal(self.mm_tmin[tmin_month],
+                                                                        self.std_tmin[tmin_month])
+                self.fill_tmin[tmin_missing] = self.complete_tmin[tmin_missing]
+
+                # This is a logical check to make sure that tmax is sufficiently distant from tmin once they have
+                # been filled in, tmax needs to be warmer than tmin and daily temp isn't constant so there should be
+                # at least a small difference in tmax-tmin
+                # todo the fill used always provides a higher than average tmax
+                #   and a lower than average tmin, this can be eventually improved
+                kernels.separate_temperatures(self.complete_tmax, self.complete_tmin, self.fill_tmax, self.fill_tmin,
+                                              self.data_month, self.mm_tmax, self.mm_tmin, self.mm_delta_t)
+
+                if self.fill_mode:
+                    # we are filling in data, so copy all the filled versions onto the original temperature
+                    self.data_tmax = np.array(self.complete_tmax)
+                    self.data_tmin = np.array(self.complete_tmin)
                 else:
-                    # user did not correct option 1
-                    pass
+                    # if we are not filling, we will hold the copies to later fill in rso, but will reset fill
+                    # tracking variables
+                    self.fill_tmax = np.zeros(self.data_length, dtype=self.float_dtype)
+                    self.fill_tmin = np.zeros(self.data_length, dtype=self.float_dtype)
+                self.stale.discard('complete_temperature')
 
+            if 'humidity' in self.stale:
                 # Figure out which humidity variables are provided and recalculate Ea and TDew if needed
                 # This function is safe to use after correcting because it tracks what variable was provided by the data
                 # and recalculates appropriately. It doesn't overwrite provided variables with calculated versions.
@@ -408,53 +405,52 @@ class WeatherQC:
                                             self.data_rhmax, self.column_ser.rhmax, self.data_rhmin,
                                             self.column_ser.rhmin, self.data_rhavg, self.column_ser.rhavg)
 
-                # Recalculates secondary temperature values and mean monthly counterparts
-                (self.delta_t, self.mm_delta_t, self.k_not, self.mm_k_not, self.mm_tmin, self.mm_tdew) = \
-                    calc_functions.calc_temperature_variables(self.data_month, self.data_tmax,
-                                                              self.data_tmin, self.data_tdew)
-
                 # Since we are recalculating humidity variables, we also need to reset tdew_ko to ensure it matches the
                 # underlying unfilled tdew. It is filled later after this once the user corrects a humidity var
                 # so this reset is acceptable
                 self.data_tdew_ko = np.array(self.data_tdew)
+                self.stale.discard('humidity')
 
-                if user == 2 or 6 <= user <= 8:
+            if 'delta_t' in self.stale:
+                # Recalculates secondary temperature values and mean monthly counterparts
+                (self.delta_t, self.mm_delta_t, self.k_not, self.mm_k_not, self.mm_tmin, self.mm_tdew) = \
+                    calc_functions.calc_temperature_variables(self.data_month, self.data_tmax,
+                                                              self.data_tmin, self.data_tdew, self.month_groups)
+                self.stale.discard('delta_t')
 
-                    # Reset 'complete' version as underlying variable may have changed
-                    self.complete_tdew = np.array(self.data_tdew)
-                    '''
-                        Fill in any missing tdew data with tmin - k0 curve.
-                        
-                        As detailed above, data_tdew_ko only fills in missing tdew observations with real tmin obs,
-                        while complete_tdew is a full record filled in using a filled in tmin.
-                        
-                        Nothing occurs if this fill code is run a second time because vars are already filled unless
-                        correction methods throw out data, in which case we need to refill for the complete record
-                        that Rs correction requires.
-                    '''
-                    for i in range(self.data_length):
-                        if np.isnan(self.data_tdew[i]):
-
-                            # Tdew_ko will have gaps that match gaps in Tmin
-                            # Complete_tdew will match complete_tmin in having no gaps
-                            self.data_tdew_ko[i] = self.data_tmin[i] - self.mm_k_not[self.data_month[i] - 1]
-                            self.complete_tdew[i] = self.complete_tmin[i] - self.mm_k_not[self.data_month[i] - 1]
-                            self.fill_tdew[i] = self.complete_tdew[i]
-                        else:
-                            # If TDew isn't empty then nothing is required to be done.
-                            pass
-
-                    if self.fill_mode:
-                        # we are filling in data, so copy all the filled versions onto the original arrays
-                        self.data_tdew = np.array(self.complete_tdew)
-                    else:
-                        # if we are not filling, we will hold the copies to later fill in rso, but will reset fill
-                        # tracking variables
-                        self.fill_tdew = np.zeros(self.data_length)
+            if 'complete_tdew' in self.stale:
+                # Reset 'complete' version as underlying variable may have changed
+                self.complete_tdew = np.array(self.data_tdew)
+                '''
+                    Fill in any missing tdew data with tmin - k0 curve.
+                    
+                    As detailed above, data_tdew_ko only fills in missing tdew observations with real tmin obs,
+                    while complete_tdew is a full record filled in using a filled in tmin.
+                    
+                    Nothing occurs if this fill code is run a second time because vars are already filled unless
+                    correction methods throw out data, in which case we need to refill for the complete record
+                    that Rs correction requires.
+                '''
+                # Only days missing TDew are filled, provided observations are left as they are
+                tdew_missing = np.isnan(self.data_tdew)
+                tdew_k_not = self.mm_k_not[self.data_month[tdew_missing] - 1]
+
+                # Tdew_ko will have gaps that match gaps in Tmin
+                # Complete_tdew will match complete_tmin in having no gaps
+                self.data_tdew_ko[tdew_missing] = self.data_tmin[tdew_missing] - tdew_k_not
+                self.complete_tdew[tdew_missing] = self.complete_tmin[tdew_missing] - tdew_k_not
+                self.fill_tdew[tdew_missing] = self.complete_tdew[tdew_missing]
+
+                if self.fill_mode:
+                    # we are filling in data, so copy all the filled versions onto the original arrays
+                    self.data_tdew = np.array(self.complete_tdew)
                 else:
-                    # user did not select option 2 or 6-8
-                    pass
+                    # if we are not filling, we will hold the copies to later fill in rso, but will reset fill
+                    # tracking variables
+                    self.fill_tdew = np.zeros(self.data_length, dtype=self.float_dtype)
+                self.stale.discard('complete_tdew')
 
+            if 'compiled_ea' in self.stale:
                 '''
                     Recreate the 'compiled' ea as temperature or humidity vars were corrected and may have changed the
                     data underlying the compiled ea. Once that is done we will fill in all the gaps with the 
@@ -463,24 +459,23 @@ class WeatherQC:
                     The gaps in compiled_ea are reset every time temperature or humidity is corrected so this code is 
                     okay to run multiple times
                 '''
-                self.compiled_ea = calc_functions.calc_compiled_ea(self.data_tmax, self.data_tmin, self.data_tavg,
-                                                                   self.data_ea, self.data_tdew, self.column_ser.tdew,
-                                                                   self.data_rhmax, self.column_ser.rhmax,
-                                                                   self.data_rhmin, self.column_ser.rhmin,
-                                                                   self.data_rhavg, self.column_ser.rhavg,
-                                                                   self.data_tdew_ko)
+                (self.compiled_ea, self.compiled_ea_source) = calc_functions.\
+                    calc_compiled_ea(self.data_tmax, self.data_tmin, self.data_tavg, self.data_ea, self.data_tdew,
+                                     self.column_ser.tdew, self.data_rhmax, self.column_ser.rhmax, self.data_rhmin,
+                                     self.column_ser.rhmin, self.data_rhavg, self.column_ser.rhavg,
+                                     self.data_tdew_ko)
+                self.stale.discard('compiled_ea')
+
+            if 'complete_ea' in self.stale:
 
                 # Reset 'complete' version as underlying variable may have changed.
                 self.complete_ea = np.array(self.compiled_ea)
 
-                for i in range(self.data_length):
-                    if np.isnan(self.compiled_ea[i]):
-                        self.complete_ea[i] = (0.6108 * np.exp((17.27 * self.complete_tdew[i]) / (self.complete_tdew[i]
-                                                                                                  + 237.3)))
-                        self.fill_ea[i] = self.complete_ea[i]
-                else:
-                    # Ea is provided and the index is not empty, do nothing to avoid overwriting actual data
-                    pass
+                # Only gaps are filled, where ea is provided nothing is done to avoid overwriting actual data
+                ea_missing = np.isnan(self.compiled_ea)
+                missing_tdew = self.complete_tdew[ea_missing]
+                self.complete_ea[ea_missing] = (0.6108 * np.exp((17.27 * missing_tdew) / (missing_tdew + 237.3)))
+                self.fill_ea[ea_missing] = self.complete_ea[ea_missing]
 
                 if self.fill_mode:
                     # we are filling in data, so copy all the filled versions onto the original arrays
@@ -489,63 +484,42 @@ class WeatherQC:
                 else:
                     # if we are not filling, we will hold the copies to later fill in rso, but will reset fill
                     # tracking variables
-                    self.fill_ea = np.zeros(self.data_length)
-
-            elif user == 9:  # User has adjusted how the compiled humidity is sourced, recreate complete_ea
-                self.complete_ea = np.array(self.compiled_ea)
+                    self.fill_ea = np.zeros(self.data_length, dtype=self.float_dtype)
+                self.stale.discard('complete_ea')
 
-                for i in range(self.data_length):
-                    if np.isnan(self.compiled_ea[i]):
-                        self.complete_ea[i] = (0.6108 * np.exp((17.27 * self.complete_tdew[i]) /
-                                                               (self.complete_tdew[i] + 237.3)))
-                        self.fill_ea[i] = self.complete_ea[i]
-                else:
-                    # the index is not empty, do nothing to avoid overwriting actual data
-                    pass
-
-                if self.fill_mode:
-                    # we are filling in data, so copy all the filled versions onto the original arrays
-                    self.data_ea = np.array(self.complete_ea)
-                    self.compiled_ea = np.array(self.complete_ea)
-                else:
-                    # if we are not filling, we will hold the copies to later fill in rso, but will reset fill
-                    # tracking variables
-                    self.fill_ea = np.zeros(self.data_length)
-            else:
-                # user did not select options 1,2, 6, 7, 8, or 9.
-                pass
-
-            '''
-                Even if the user doesn't want to put filled data into their output file, we still need to use complete
-                records to get a complete record of Rso for use in Rs correction. This completed rso is only used for 
-                this step and is not written as data to the output file
-            '''
-            if self.fill_mode:
-                '''                  
-                    This recalculates Rso and ETr values using the filled 'completed_' versions to provide a complete
-                    record of ETr values.
-                    
-                    If this code is executing then 'data_' vars have already been replaced by their 'completed_' 
-                    versions so the code is accurate in calling them 'data_'
+            if 'rso' in self.stale:
                 '''
-                warnings.filterwarnings('ignore', 'invalid value encountered')  # catch invalid value warning, nans
-                (self.rso, self.mm_rs, self.eto, self.etr, self.mm_eto, self.mm_etr) = calc_functions. \
-                    calc_rso_and_refet(self.station_lat, self.station_elev, self.ws_anemometer_height, self.data_doy,
-                                       self.data_month, self.data_tmax, self.data_tmin, self.data_ea, self.data_ws,
-                                       self.data_rs)
-                warnings.resetwarnings()
-            else:
-                '''
-                    User doesn't want to keep filled in data, so use complete versions to create a filled version of
-                    rso while saving the other outputs of calc_rso_and_refet as temporary names which are unused to 
-                    prevent them from impacting later calculations
+                    Even if the user doesn't want to put filled data into their output file, we still need to use
+                    complete records to get a complete record of Rso for use in Rs correction. This completed rso is
+                    only used for this step and is not written as data to the output file
                 '''
                 warnings.filterwarnings('ignore', 'invalid value encountered')  # catch invalid value warning, nans
-                (self.rso, self._mm_rs, self._eto, self._etr, self._mm_eto, self._mm_etr) = \
-                    calc_functions.calc_rso_and_refet(self.station_lat, self.station_elev, self.ws_anemometer_height,
-                                                      self.data_doy, self.data_month, self.complete_tmax,
-                                                      self.complete_tmin, self.complete_ea, self.data_ws, self.data_rs)
+                if self.fill_mode:
+                    '''
+                        This recalculates Rso and ETr values using the filled 'completed_' versions to provide a
+                        complete record of ETr values.
+
+                        If this code is executing then 'data_' vars have already been replaced by their 'completed_'
+                        versions so the code is accurate in calling them 'data_'
+                    '''
+                    (self.rso, self.mm_rs, self.eto, self.etr, self.mm_eto, self.mm_etr) = calc_functions. \
+                        calc_rso_and_refet(self.station_lat, self.station_elev, self.ws_anemometer_height,
+                                           self.data_doy, self.data_month, self.data_tmax, self.data_tmin,
+                                           self.data_ea, self.data_ws, self.data_rs, self.month_groups,
+                                           self.refet_buffers)
+                else:
+                    '''
+                        User doesn't want to keep filled in data, so use complete versions to create a filled version
+                        of rso while saving the other outputs of calc_rso_and_refet as temporary names which are
+                        unused to prevent them from impacting later calculations
+                    '''
+                    (self.rso, self._mm_rs, self._eto, self._etr, self._mm_eto, self._mm_etr) = calc_functions. \
+                        calc_rso_and_refet(self.station_lat, self.station_elev, self.ws_anemometer_height,
+                                           self.data_doy, self.data_month, self.complete_tmax, self.complete_tmin,
+                                           self.complete_ea, self.data_ws, self.data_rs, self.month_groups,
+                                           self.refet_buffers)
                 warnings.resetwarnings()
+                self.stale.discard('rso')
 
         '''
             At this point the user has finished correcting all variables they want to.
@@ -563,39 +537,26 @@ class WeatherQC:
 
         (self.orig_rs_tr, self.mm_orig_rs_tr, self.opt_rs_tr, self.mm_opt_rs_tr) = calc_functions. \
             calc_org_and_opt_rs_tr(self.mc_iterations_post_corrections, self.log_file, self.data_month,
-                                   self.delta_t, self.mm_delta_t, self.data_rs, self.rso)
+                                   self.delta_t, self.mm_delta_t, self.data_rs, self.rso, self.month_groups,
+                                   self.config_dict['rs_tr_optimizer'], self.config_dict['rs_tr_tolerance'],
+                                   self.config_dict['rs_tr_max_evaluations'],
+                                   self.config_dict['rs_tr_monthly_coefficients'], self.fill_rng)
 
         # This section provides for the filling of data should fill_mode be set to true
-        self.mm_ws = np.zeros(12)
-        self.std_ws = np.zeros(12)
-        for k in range(12):
-            temp_indexes = np.where(self.data_month == k + 1)[0]
-            temp_indexes = np.array(temp_indexes, dtype=int)
-            self.mm_ws[k] = np.nanmean(self.data_ws[temp_indexes])
-            self.std_ws[k] = np.nanmean(self.data_ws[temp_indexes])
+        (self.mm_ws, self.std_ws, _) = group_functions.grouped_stats(self.month_groups, self.data_ws)
 
         if self.fill_mode:
-            for i in range(self.data_length):
-                # fill data_rs with rs_tr and data_ws with an exponential function centered on mm_ws for that month
-                if np.isnan(self.data_rs[i]):
-                    self.data_rs[i] = self.opt_rs_tr[i]
-                    self.fill_rs[i] = self.opt_rs_tr[i]
-                else:
-                    # If rs isn't empty then nothing is required to be done.
-                    pass
-                if np.isnan(self.data_ws[i]):
-                    self.data_ws[i] = np.random.normal(self.mm_ws[self.data_month[i] - 1],
-                                                       self.std_ws[self.data_month[i] - 1], 1)
-
-                    if self.data_ws[i] < 0.2:  # check to see if filled windspeed is lower than reasonable
-                        self.data_ws[i] = 0.2
-                    else:
-                        pass
-
-                    self.fill_ws[i] = self.data_ws[i]
-                else:
-                    # If ws isn't empty then nothing is required to be done.
-                    pass
+            # fill data_rs with rs_tr and data_ws with a normal distribution centered on mm_ws for that month
+            rs_missing = np.isnan(self.data_rs)
+            self.data_rs[rs_missing] = self.opt_rs_tr[rs_missing]
+            self.fill_rs[rs_missing] = self.opt_rs_tr[rs_missing]
+
+            ws_missing = np.isnan(self.data_ws)
+            ws_month = self.data_month[ws_missing] - 1
+            self.data_ws[ws_missing] = self.fill_rng.normal(self.mm_ws[ws_month], self.std_ws[ws_month])
+            # filled windspeed lower than reasonable is raised to 0.2
+            self.data_ws[ws_missing] = np.maximum(self.data_ws[ws_missing], 0.2)
+            self.fill_ws[ws_missing] = self.data_ws[ws_missing]
         else:
             pass
 
@@ -606,7 +567,123 @@ class WeatherQC:
         (self.rso, self.mm_rs, self.eto, self.etr, self.mm_eto, self.mm_etr) = calc_functions. \
             calc_rso_and_refet(self.station_lat, self.station_elev, self.ws_anemometer_height, self.data_doy,
                                self.data_month, self.data_tmax, self.data_tmin, self.compiled_ea,
-                               self.data_ws, self.data_rs)
+                               self.data_ws, self.data_rs, self.month_groups, self.refet_buffers)
+
+        if self.recipe_path is None:
+            # Save the corrections of this session so that they can be replayed by passing recipe_file_path
+            recipe_output_path = self.folder_path + "/correction_files/" + self.station_name + "_correction_recipe.json"
+            with open(recipe_output_path, 'w') as recipe_file:
+                json.dump(self.correction_recipe, recipe_file, indent=2)
+            print('\nSystem: Corrections were saved as a correction recipe at {}.'.format(recipe_output_path))
+
+    def _select_correction_option(self):
+        """
+            Asks the user which variable they want to correct next, only allowing variables provided by the file.
+
+            Returns:
+                :user: (int) option of the correction menu, 0 to stop applying corrections
+        """
+        print('\nPlease select which of the following variables you want to correct'
+              '\n   Enter 1 for TMax and TMin.'
+              '\n   Enter 2 for TMin and TDew, if TDew was provided.'
+              '\n   Enter 3 for Windspeed.'
+              '\n   Enter 4 for Precipitation.'
+              '\n   Enter 5 for Solar Radiation (Rs).'
+              '\n   Enter 6 for Vapor Pressure (Ea), if it was provided.'
+              '\n   Enter 7 for RH Maximum and Minimum, if they were provided.'
+              '\n   Enter 8 for RH Average, if it was provided.'
+              '\n   Enter 9 to adjust how compiled humidity is sourced.'
+              '\n   Enter 0 to stop applying corrections.'
+              )
+
+        choice_loop = True
+        while choice_loop:
+            user = utils.get_int_input(0, 9, "\nEnter your selection: ")
+            # The following if statements check whether user tries to correct a variable that was not provided
+            # or make sure correction is being done in the ideal order
+            if user == 2 and self.column_ser.tdew == -1:
+                print('\nDewpoint temperature was not provided by the file, please choose a different option.')
+            elif user == 6 and self.column_ser.ea == -1:
+                print('\nVapor Pressure was not provided by the file, please choose a different option.')
+            elif user == 7 and (self.column_ser.rhmax == -1 or self.column_ser.rhmin == -1):
+                print('\nRHMax and RHMin were not provided by the file, please choose a different option.')
+            elif user == 8 and self.column_ser.rhavg == -1:
+                print('\nRHAvg was not provided by the file, please choose a different option.')
+            elif user == 5 and not self.humidity_adjusted:
+                print('\n\nBefore correcting solar radiation, did you want to adjust compiled humidity?.')
+                print('Doing so may allow you to get the best possible humidity record for Rs correction.')
+                print('\nEnter 1 to adjust compiled humidity or 0 to skip.')
+
+                humid_choice = utils.get_int_input(0, 1, 'Enter your selection: ')
+                if humid_choice == 1:  # change original choice to the adjust humidity option
+                    user = 9
+                choice_loop = False
+            else:
+                choice_loop = False
+
+        return user
+
+    def _check_recipe_option(self, option):
+        """
+            Checks that an option of the correction menu read from a recipe can be used on this station.
+
+            Returns:
+                :option: (int) the checked option
+        """
+        unprovided = {2: self.column_ser.tdew == -1, 6: self.column_ser.ea == -1,
+                      7: self.column_ser.rhmax == -1 or self.column_ser.rhmin == -1, 8: self.column_ser.rhavg == -1}
+        if option not in range(10):
+            raise ValueError('\n\nCorrection recipe option {} is not an option of the correction menu.'.format(option))
+        elif unprovided.get(option, False):
+            raise ValueError('\n\nCorrection recipe option {} corrects a variable that was not provided by the file.'
+                             .format(option))
+        return option
+
+    def _correct_variables(self, var_one, var_two, code, recipe_step):
+        """
+            Corrects a pair of variables with qaqc_functions.correction and records the corrections that were kept
+            into recipe_step, or replays the corrections of recipe_step without prompting if a recipe was provided.
+        """
+        if self.recipe_path is not None:
+            return qaqc_functions.replay_correction(self.log_file, var_one, var_two, self.dt_array, self.data_month,
+                                                    self.data_year, code, recipe_step.get('corrections', []))
+        else:
+            recipe_step['corrections'] = []
+            return qaqc_functions.correction(self.station_name, self.log_file, self.folder_path, var_one, var_two,
+                                             self.dt_array, self.data_month, self.data_year, code, self.auto_mode,
+                                             recipe_step['corrections'])
+
+    def _adjust_compiled_humidity(self, recipe_step):
+        """
+            Adjusts how compiled ea is sourced with qaqc_functions.compiled_humidity_adjustment and records the
+            adjustments that were kept into recipe_step, or replays the adjustments of recipe_step without prompting
+            if a recipe was provided.
+        """
+        if self.recipe_path is not None:
+            return qaqc_functions.replay_humidity_adjustment(
+                self.log_file, self.data_tmax, self.data_tmin, self.data_tavg, self.compiled_ea,
+                self.compiled_ea_source, self.data_ea, self.column_ser.ea, self.data_tdew, self.column_ser.tdew,
+                self.data_tdew_ko, self.data_rhmax, self.column_ser.rhmax, self.data_rhmin, self.column_ser.rhmin,
+                self.data_rhavg, self.column_ser.rhavg, recipe_step.get('adjustments', []))
+        else:
+            recipe_step['adjustments'] = []
+            return qaqc_functions.compiled_humidity_adjustment(
+                self.station_name, self.log_file, self.folder_path, self.dt_array, self.data_tmax, self.data_tmin,
+                self.data_tavg, self.compiled_ea, self.compiled_ea_source, self.data_ea, self.column_ser.ea,
+                self.data_tdew, self.column_ser.tdew, self.data_tdew_ko, self.data_rhmax, self.column_ser.rhmax,
+                self.data_rhmin, self.column_ser.rhmin, self.data_rhavg, self.column_ser.rhavg,
+                recipe_step['adjustments'])
+
+    def _mark_stale(self, changed_variables):
+        """
+            Marks every derived quantity that depends on the changed variables, directly or through other derived
+            quantities, as needing to be recalculated.
+        """
+        changed = set(changed_variables)
+        for (derived, inputs) in DERIVED_DEPENDENCIES.items():
+            if changed.intersection(inputs):
+                changed.add(derived)
+                self.stale.add(derived)
 
     def _create_plots(self):
         """
@@ -753,8 +830,8 @@ class WeatherQC:
         #########################
         # Create necessary variables for generic metadata file, as well as
         # generate and fill metadata file
-        record_start = pd.to_datetime(self.dt_array[0]).date()
-        record_end = pd.to_datetime(self.dt_array[-1]).date()
+        record_start = self.data_dates[0].item()
+        record_end = self.data_dates[-1].item()
 
         # Generate metadata output file that saves the site-specific data for each run (appended to end)
         if not os.path.isfile('correction_metadata.xlsx'):
@@ -833,12 +910,11 @@ class WeatherQC:
         diff_eto = np.array(self.eto - self.original_df.eto)
 
         # Create k0 array to output values
-        k_not_vals = np.zeros(self.data_length)
+        k_not_vals = np.zeros(self.data_length, dtype=self.float_dtype)
         k_not_vals[0:12] = self.mm_k_not[0:12]
 
         # Create datetime for output dataframe
-        datetime_df = pd.DataFrame({'year': self.data_year, 'month': self.data_month, 'day': self.data_day})
-        datetime_df = pd.to_datetime(datetime_df[['month', 'day', 'year']])
+        datetime_df = pd.DatetimeIndex(self.data_dates)
 
         # Create output dataframe
         output_df = pd.DataFrame({'year': self.data_year, 'month': self.data_month,
@@ -865,7 +941,10 @@ class WeatherQC:
         fill_df = pd.DataFrame({'year': self.data_year, 'month': self.data_month,
                                 'day': self.data_day, 'TMax (C)': self.fill_tmax, 'TMin (C)': self.fill_tmin,
                                 'TDew (C)': self.fill_tdew, 'Vapor Pres (kPa)': self.fill_ea, 'Rs (w/m2)': self.fill_rs,
-                                'Complete Record Rso (w/m2)': self.fill_rso, 'mm k0 values': k_not_vals},
+                                'Complete Record Rso (w/m2)': self.fill_rso,
+                                'Compiled Ea Source': np.array(calc_functions.COMPILED_EA_SOURCES)[
+                                    self.compiled_ea_source],
+                                'mm k0 values': k_not_vals},
                                index=datetime_df)
         output_df.index.name = 'date'
         delta_df.index.name = 'date'
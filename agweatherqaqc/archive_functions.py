@@ -0,0 +1,117 @@
+import json
+import numpy as np
+import pandas as pd
+
+from agweatherqaqc.date_functions import split_dates
+
+
+# Station archives are a small JSON header followed by a single fixed-dtype block of (variables x days) data, with
+# each variable stored contiguously so it can be used directly as a 1D array once the file is memory-mapped
+ARCHIVE_EXTENSION = '.agwqc'
+ARCHIVE_MAGIC = b'AGWQCARC'
+ARCHIVE_VERSION = 1
+ARCHIVE_DTYPE = '<f8'
+ARCHIVE_ALIGNMENT = 64  # data block starts on a multiple of this many bytes
+ARCHIVE_VARIABLES = ['tmax', 'tmin', 'tavg', 'tdew', 'ea', 'rhmax', 'rhmin', 'rhavg', 'rs', 'ws', 'precip']
+
+
+def write_station_archive(archive_path, data_df, col_ser, config_dict):
+    """
+        Writes a processed station record into the binary station archive format.
+
+        Args:
+            :archive_path: (str) path to write the archive to, should end in ARCHIVE_EXTENSION
+            :data_df: (pd.DataFrame) processed data with a continuous daily index, as returned by
+                input_functions._obtain_data
+            :col_ser: (pd.Series) column indices of the variables in the original data file, -1 if not provided
+            :config_dict: (dict) dictionary of all config file values, used for the station metadata
+
+        Returns:
+            None
+    """
+    header = {'archive_version': ARCHIVE_VERSION,
+              'station_name': str(config_dict['station_name']),
+              'latitude': float(config_dict['station_latitude']),
+              'longitude': float(config_dict['station_longitude']),
+              'elevation': float(config_dict['station_elevation']),
+              'anemometer_height': float(config_dict['anemometer_height']),
+              'start_date': data_df.index[0].strftime('%Y-%m-%d'),
+              'number_of_days': int(data_df.shape[0]),
+              'variables': ARCHIVE_VARIABLES,
+              'provided_columns': {var: int(col_ser[var]) for var in ARCHIVE_VARIABLES},
+              'dtype': ARCHIVE_DTYPE}
+
+    # The header is padded with spaces so the data block that follows it is aligned
+    header_bytes = json.dumps(header).encode('utf-8')
+    data_offset = -(-(len(ARCHIVE_MAGIC) + 8 + len(header_bytes)) // ARCHIVE_ALIGNMENT) * ARCHIVE_ALIGNMENT
+    header_bytes = header_bytes.ljust(data_offset - len(ARCHIVE_MAGIC) - 8)
+
+    station_data = np.vstack([data_df[var].to_numpy(dtype=ARCHIVE_DTYPE) for var in ARCHIVE_VARIABLES])
+
+    with open(archive_path, 'wb') as archive_file:
+        archive_file.write(ARCHIVE_MAGIC)
+        archive_file.write(len(header_bytes).to_bytes(8, 'little'))
+        archive_file.write(header_bytes)
+        station_data.tofile(archive_file)
+
+
+def read_station_archive(archive_path, mode='c'):
+    """
+        Opens a binary station archive as a memory-mapped array, so no data is read or copied until it is used.
+        The default copy-on-write mode allows the data to be modified in memory without changing the archive.
+
+        Args:
+            :archive_path: (str) path to the archive
+            :mode: (str) mode passed to np.memmap, 'c' for copy-on-write, 'r' for read-only, 'r+' to modify the archive
+
+        Returns:
+            :station_data: (np.ndarray) 2D array of (variables x days), in the order of header['variables']
+            :header: (dict) archive header containing the station metadata
+    """
+    with open(archive_path, 'rb') as archive_file:
+        if archive_file.read(len(ARCHIVE_MAGIC)) != ARCHIVE_MAGIC:
+            raise IOError(f'\n\nThe file at \'{archive_path}\' is not a valid station archive.')
+        header_length = int.from_bytes(archive_file.read(8), 'little')
+        header = json.loads(archive_file.read(header_length).decode('utf-8'))
+
+    if header['archive_version'] > ARCHIVE_VERSION:
+        raise IOError(f'\n\nThe station archive at \'{archive_path}\' is version {header["archive_version"]}, '
+                      f'but only versions up to {ARCHIVE_VERSION} are supported.')
+
+    data_offset = len(ARCHIVE_MAGIC) + 8 + header_length
+    station_data = np.memmap(archive_path, dtype=header['dtype'], mode=mode, offset=data_offset,
+                             shape=(len(header['variables']), header['number_of_days']))
+
+    return np.asarray(station_data), header
+
+
+def archive_to_dataframe(station_data, header):
+    """
+        Creates the data_df and col_ser structures used by WeatherQC from an opened station archive. The variable
+        columns of data_df share memory with station_data instead of copying it.
+
+        Args:
+            :station_data: (np.ndarray) 2D array of (variables x days) returned by read_station_archive
+            :header: (dict) archive header returned by read_station_archive
+
+        Returns:
+            :data_df: (pd.DataFrame) dataframe of the station record, with the variables organized into columns
+            :col_ser: (pd.Series) column indices of the variables in the original data file, -1 if not provided
+    """
+    date_index = pd.date_range(header['start_date'], periods=header['number_of_days'])
+    (year, month, day, _) = split_dates(np.datetime64(header['start_date'], 'D') + np.arange(header['number_of_days']))
+
+    station_vars = {var: station_data[j] for (j, var) in enumerate(header['variables'])}
+    data = {'year': year, 'month': month, 'day': day}
+    for var in ['tavg', 'tmax', 'tmin', 'tdew', 'ea', 'rhavg', 'rhmax', 'rhmin', 'rs', 'ws', 'precip']:
+        data[var] = station_vars[var]
+    data_df = pd.DataFrame(data, index=date_index, copy=False)
+
+    col_ser = pd.Series(header['provided_columns'])
+
+    return data_df, col_ser
+
+
+# This is never run by itself
+if __name__ == "__main__":
+    print("\nThis module is called as a part of the QAQC script, it does nothing by itself.")
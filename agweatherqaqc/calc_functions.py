@@ -1,10 +1,27 @@
 import logging as log
+import math
 import numpy as np
-from refet import Daily
-from refet.calcs import _air_pressure, _ra_daily, _rso_daily
 
+from agweatherqaqc.group_functions import grouped_nanmean, make_groups, month_groups
 
-def calc_temperature_variables(month, tmax, tmin, tdew):
+
+# Maximum number of (iterations x days) values evaluated at once by the Thornton-Running Monte Carlo simulation,
+# bounds its memory use to a few multiples of 8 bytes times this regardless of the number of iterations
+MC_CHUNK_ELEMENTS = 2 ** 21
+
+# Original Thornton-Running B coefficients, and the fraction of each that optimized coefficients may differ by
+TR_ORIGINAL_COEFFICIENTS = np.array([0.031, 0.201, -0.185])
+TR_COEFFICIENT_BRACKET = 0.5
+
+# Methods used by calc_org_and_opt_rs_tr to optimize the Thornton-Running B coefficients
+RS_TR_OPTIMIZERS = ['monte_carlo', 'pattern_search']
+
+# Sources of compiled ea in order of preference, the source code of each day is its index in this list, which also
+# matches the numbering of the sources in qaqc_functions.compiled_humidity_adjustment
+COMPILED_EA_SOURCES = ['none', 'ea', 'tdew', 'rhmax_rhmin', 'rhavg', 'tdew_ko']
+
+
+def calc_temperature_variables(month, tmax, tmin, tdew, groups=None):
     """
     Calculates the secondary temperature variables like mean monthly values
 
@@ -13,6 +30,7 @@ def calc_temperature_variables(month, tmax, tmin, tdew):
         :tmax: (ndarray) 1D numpy array of maximum temperature values
         :tmin: (ndarray) 1D numpy array of minimum temperature values
         :tdew: (ndarray) 1D numpy array of dewpoint temperature values
+        :groups: (GroupIndex) optional month group structure of the record, computed from month if not provided
 
     Returns:
         :delta_t: (ndarray) the daily difference between maximum temperature and minimum temperature
@@ -24,23 +42,12 @@ def calc_temperature_variables(month, tmax, tmin, tdew):
     """
     delta_t = np.array(tmax - tmin)
     k_not = np.array(tmin - tdew)  # ASCE Ref Appendix E Eq. 1
-    monthly_tmin = np.empty(12)
-    monthly_tdew = np.empty(12)
-    monthly_delta_t = np.empty(12)
-    monthly_k_not = np.empty(12)
 
     # Create average monthly delta_t and average monthly k_not for downstream analysis
-    j = 1
-    for k in range(12):
-        temp_indexes = [ex for ex, ind in enumerate(month) if ind == j]
-        temp_indexes = np.array(temp_indexes, dtype=int)
-
-        monthly_tmin[k] = np.nanmean(tmin[temp_indexes])
-        monthly_tdew[k] = np.nanmean(tdew[temp_indexes])
-        monthly_delta_t[k] = np.nanmean(delta_t[temp_indexes])
-        monthly_k_not[k] = np.nanmean(k_not[temp_indexes])
-
-        j += 1
+    if groups is None:
+        groups = month_groups(month)
+    (monthly_tmin, monthly_tdew, monthly_delta_t, monthly_k_not) = \
+        grouped_nanmean(groups, np.vstack([tmin, tdew, delta_t, k_not]))
 
     return delta_t, monthly_delta_t, k_not, monthly_k_not, monthly_tmin, monthly_tdew
 
@@ -140,10 +147,94 @@ def calc_humidity_variables(tmax, tmin, tavg, ea, ea_col, tdew, tdew_col, rhmax,
         raise ValueError('calc_humidity_variables encountered an unexpected combination of inputs.')
 
 
-def calc_rso_and_refet(lat, elev, wind_anemom, doy, month, tmax, tmin, ea, uz, rs):
+def calc_refet_daily(lat, elev, wind_anemom, doy, tmax, tmin, ea, uz, rs, out=None):
+    """
+        Calculates clear-sky solar radiation and grass and alfalfa reference evapotranspiration in a single pass,
+        according to the ASCE-EWRI (2005) standardized daily equations. Intermediate values shared by ETo and ETr
+        (vapor pressure deficit, net radiation, 2m windspeed, etc.) are only calculated once. Results match the 'asce'
+        method of the refet package (https://github.com/DRI-WSWUP/RefET), which is used to validate this function.
+
+        Like refet, ETo and ETr use the simplified clear-sky solar radiation to calculate net longwave radiation,
+        while the returned rso uses the full formulation (ASCE Appendix D) for use in solar radiation correction.
+
+        Args:
+            :lat: (float) station latitude in decimal degrees
+            :elev: (float) station elevation in meters
+            :wind_anemom: (float) height of windspeed anemometer in meters
+            :doy: (ndarray) 1D numpy array of day of year in record
+            :tmax: (ndarray) 1D numpy array of maximum temperature values in C
+            :tmin: (ndarray) 1D numpy array of minimum temperature values in C
+            :ea: (ndarray) 1D numpy array of vapor pressure in kPa
+            :uz: (ndarray) 1D numpy array of average windspeed values in m/s
+            :rs: (ndarray) 1D numpy array of solar radiation values in w/m2
+            :out: (tuple) optional tuple of three 1D numpy arrays to write rso, eto, and etr into, so that the same
+                buffers can be reused between calls instead of allocating new arrays
+
+        Returns:
+            :rso: (ndarray) 1D numpy array of clear sky solar radiation in w/m2
+            :eto: (ndarray) 1D numpy array of grass reference evapotranspiration in units mm/day
+            :etr: (ndarray) 1D numpy array of alfalfa reference evapotranspiration in units mm/day
     """
-        Calculates clear-sky solar radiation and reference evapotranspiration
-        variables using the refet package (https://github.com/DRI-WSWUP/RefET)
+    # Calculations are done in 64 bit, and results are stored in the precision of the inputs unless out is given
+    result_dtype = np.result_type(tmax, tmin, ea, uz, rs)
+    (tmax, tmin, ea, uz) = (np.asarray(var, dtype=np.float64) for var in (tmax, tmin, ea, uz))
+    if out is None:
+        out = tuple(np.empty(tmax.shape, dtype=result_dtype) for _ in range(3))
+    (rso, eto, etr) = out
+
+    # Station constants
+    lat_radians = lat * (math.pi / 180.0)
+    pressure = 101.3 * np.power((-0.0065 * elev + 293) / 293, 5.26)  # air pressure in kPa, ASCE Eq. 3
+    psy = 0.000665 * pressure  # psychrometric constant, ASCE Eq. 4
+    log_wind_height = np.log(67.8 * wind_anemom - 5.42)  # for the wind height adjustment, ASCE Eq. 33
+
+    # Extraterrestrial radiation in MJ/m2, ASCE Eq. 21 - 27
+    doy_fraction = np.asarray(doy) * (2 * math.pi / 365)
+    delta = 0.409 * np.sin(doy_fraction - 1.39)
+    omega_sunset = np.arccos(np.clip(-np.tan(lat_radians) * np.tan(delta), -1, 1))
+    ra = omega_sunset * np.sin(lat_radians) * np.sin(delta) + \
+        np.cos(lat_radians) * np.cos(delta) * np.sin(omega_sunset)
+    ra *= (24. / math.pi) * 4.92 * (1.0 + 0.033 * np.cos(doy_fraction))
+
+    # Full clear-sky solar radiation, ASCE Appendix D
+    sin_beta_24 = np.maximum(np.sin(0.85 + 0.3 * lat_radians * np.sin(doy_fraction - 1.39) -
+                                    0.42 * np.power(lat_radians, 2)), 0.1)
+    precipitable_water = pressure * 0.14 * ea + 2.1
+    kb = 0.98 * np.exp((-0.00146 * pressure) / sin_beta_24 - 0.075 * np.power(precipitable_water / sin_beta_24, 0.4))
+    kd = np.minimum(-0.36 * kb + 0.35, 0.82 * kb + 0.18)
+    np.multiply(kb + kd, ra, out=rso)
+
+    # Temperature and vapor pressure terms, ASCE Eq. 5 - 8 and 37
+    tmean = 0.5 * (tmax + tmin)
+    es_slope = 2503.0 * (np.exp(17.27 * tmean / (tmean + 237.3)) / np.power(tmean + 237.3, 2))
+    es = 0.5 * (0.6108 * np.exp(1 / (tmax + 237.3) * tmax * 17.27) + 0.6108 * np.exp(1 / (tmin + 237.3) * tmin * 17.27))
+    vpd = np.maximum(es - ea, 0)
+
+    # Net radiation, using the simplified clear-sky solar radiation, ASCE Eq. 15 - 19
+    rs_mj = np.asarray(rs, dtype=np.float64) * 0.0864  # w/m2 to MJ/m2/day
+    rso_simple = (0.75 + 2E-5 * elev) * ra
+    cloudiness = np.divide(rs_mj, rso_simple, out=np.ones_like(rs_mj), where=rso_simple != 0)
+    cloudiness = 1.35 * np.clip(cloudiness, 0.3, 1.0) - 0.35
+    rnl = 4.901E-9 * cloudiness * (0.34 - 0.14 * np.sqrt(ea)) * \
+        0.5 * (np.power(tmax + 273.16, 4) + np.power(tmin + 273.16, 4))
+    rn = 0.77 * rs_mj - rnl
+
+    # Standardized reference ET for the short (grass) and tall (alfalfa) reference surfaces, ASCE Eq. 1
+    u2 = uz * 4.87 / log_wind_height
+    radiation_term = 0.408 * es_slope * rn
+    tmean_kelvin = tmean + 273
+    for (et, cn, cd) in ((eto, 900, 0.34), (etr, 1600, 0.38)):
+        np.divide(radiation_term + psy * cn * u2 * vpd / tmean_kelvin, es_slope + psy * (cd * u2 + 1), out=et)
+
+    rso *= 1000000  # Convert rso from MJ/m2 to w/m2
+    rso /= 86400
+    return rso, eto, etr
+
+
+def calc_rso_and_refet(lat, elev, wind_anemom, doy, month, tmax, tmin, ea, uz, rs, groups=None, out=None):
+    """
+        Calculates clear-sky solar radiation and reference evapotranspiration variables, see calc_refet_daily,
+        along with their mean monthly values
 
         Args:
             :lat: (float) station latitude in decimal degrees
@@ -156,6 +247,8 @@ def calc_rso_and_refet(lat, elev, wind_anemom, doy, month, tmax, tmin, ea, uz, r
             :ea: (ndarray) 1D numpy array of vapor pressure in kPa
             :uz: (ndarray) 1D numpy array of average windspeed values
             :rs: (ndarray) 1D numpy array of solar radiation values
+            :groups: (GroupIndex) optional month group structure of the record, computed from month if not provided
+            :out: (tuple) optional tuple of three 1D numpy arrays to write rso, eto, and etr into
 
         Returns:
             :rso: (ndarray) 1-D array of clear sky solar radiation
@@ -165,44 +258,17 @@ def calc_rso_and_refet(lat, elev, wind_anemom, doy, month, tmax, tmin, ea, uz, r
             :monthly_eto: (ndarray) 1-D array of monthly averaged grass reference ET (12 values total) values
             :monthly_etr: (ndarray) 1-D array of monthly averaged alfalfa reference ET (12 values total) values
     """
-
-    monthly_rs = np.empty(12)
-    monthly_eto = np.empty(12)
-    monthly_etr = np.empty(12)
-
-    # Calculate rso values
-    lat_radians = lat * np.pi / 180.0  # convert latitude into radians
-    pressure = _air_pressure(elev=elev, method='asce')  # returns air pressure in kpa
-    ra = _ra_daily(lat=lat_radians, doy=doy, method='asce')  # returns ra in mj/m2
-    rso = _rso_daily(ra=ra, ea=ea, pair=pressure, doy=doy, lat=lat_radians)
-
-    # Calculating ETo in mm using refET package
-    eto = Daily(tmin=tmin, tmax=tmax, ea=ea, rs=rs, uz=uz,
-                zw=wind_anemom, elev=elev, lat=lat, doy=doy, method='asce',
-                input_units={'tmin': 'c', 'tmax': 'c', 'ea': 'kpa', 'rs': 'w/m2', 'uz': 'm/s', 'lat': 'deg'}).eto()
-
-    # Calculating ETr in mm using refET package
-    etr = Daily(tmin=tmin, tmax=tmax, ea=ea, rs=rs, uz=uz,
-                zw=wind_anemom, elev=elev, lat=lat, doy=doy, method='asce',
-                input_units={'tmin': 'c', 'tmax': 'c', 'ea': 'kpa', 'rs': 'w/m2', 'uz': 'm/s', 'lat': 'deg'}).etr()
+    (rso, eto, etr) = calc_refet_daily(lat, elev, wind_anemom, doy, tmax, tmin, ea, uz, rs, out)
 
     # Calculate mean monthly values
-    j = 1
-    for k in range(12):
-        temp_indexes = [ex for ex, ind in enumerate(month) if ind == j]
-        temp_indexes = np.array(temp_indexes, dtype=int)
+    if groups is None:
+        groups = month_groups(month)
+    (monthly_rs, monthly_eto, monthly_etr) = grouped_nanmean(groups, np.vstack([rs, eto, etr]))
 
-        monthly_rs[k] = np.nanmean(rs[temp_indexes])
-        monthly_eto[k] = np.nanmean(eto[temp_indexes])
-        monthly_etr[k] = np.nanmean(etr[temp_indexes])
-
-        j += 1
-
-    rso = (rso * 1000000) / 86400  # Convert rso from MJ/m2 to w/m2
     return rso, monthly_rs, eto, etr, monthly_eto, monthly_etr
 
 
-def calc_rs_tr(month, rso, delta_t, mm_delta_t, b_zero, b_one, b_two):
+def calc_rs_tr(month, rso, delta_t, mm_delta_t, b_zero, b_one, b_two, groups=None):
     """
         Calculates theoretical daily solar radiation according to the Thornton and Running 1999 model.
         Paper can be found here: http://www.engr.scu.edu/~emaurer/chile/vic_taller/papers/thornton_running_1997.pdf
@@ -215,34 +281,135 @@ def calc_rs_tr(month, rso, delta_t, mm_delta_t, b_zero, b_one, b_two):
             :b_zero: (float) first B coefficient used in calculation of rs_tr, original value is 0.031
             :b_one: (float) second B coefficient used in calculation of rs_tr, original value is 0.201
             :b_two: (float) third B coefficient used in the calculation of rs_tr, original value is -0.185
+            :groups: (GroupIndex) optional month group structure of the record, computed from month if not provided
+
+            The B coefficients may also each be an array of 12 values, to use separate coefficients for each month.
 
         Returns:
             :rs_tr: (ndarray) 1D numpy array of thornton-running solar radiation
             :mm_rs_tr: (ndarray) mean monthly averaged rs_tr (12 values total) values
     """
-    mm_rs_tr = np.empty(12)
+    if groups is None:
+        groups = month_groups(month)
     b_coefficient = np.array(b_zero + b_one * np.exp(b_two * mm_delta_t))
-    rs_tr = np.array(rso * (1 - 0.9 * np.exp(-1 * b_coefficient[month - 1] * delta_t ** 1.5)))
+    rs_tr = np.array(rso * (1 - 0.9 * np.exp(-1 * b_coefficient[groups.codes] * delta_t ** 1.5)))
 
     # Create mean monthly values
-    j = 1
-    for k in range(12):
-        temp_indexes = [ex for ex, ind in enumerate(month) if ind == j]
-        temp_indexes = np.array(temp_indexes, dtype=int)
-
-        mm_rs_tr[k] = np.nanmean(rs_tr[temp_indexes])
-        j += 1
+    mm_rs_tr = grouped_nanmean(groups, rs_tr)
 
     return rs_tr, mm_rs_tr
 
 
-def calc_org_and_opt_rs_tr(mc_iterations, log_path, month, delta_t, mm_delta_t, rs, rso):
+def _batch_rs_tr_rmse(month_codes, rso, delta_t_factor, mm_delta_t, rs, b_zero, b_one, b_two, monthly_groups=None):
+    """
+        Calculates the RMSE against observed solar radiation of thornton-running solar radiation for a batch of
+        B coefficients at once, as a (coefficients x days) broadcast. Only days where rs_tr and rs are both defined
+        should be passed, which makes the RMSE the same as that of calc_rs_tr using np.nanmean.
+
+        Each set of coefficients may also have separate values for each month, and if monthly_groups is provided the
+        RMSE is calculated separately for each month.
+
+        Args:
+            :month_codes: (ndarray) 1D numpy array of zero-based months of each day
+            :rso: (ndarray) 1D numpy array of clear-sky solar radiation values in w/m2
+            :delta_t_factor: (ndarray) 1D numpy array of delta_t ** 1.5
+            :mm_delta_t: (ndarray) monthly averaged delta_t (12 values total) values
+            :rs: (ndarray) 1D numpy array of observed solar radiation values in w/m2
+            :b_zero: (ndarray) 1D numpy array of first B coefficients, or 2D array of (coefficients x 12 months)
+            :b_one: (ndarray) 1D numpy array of second B coefficients, or 2D array of (coefficients x 12 months)
+            :b_two: (ndarray) 1D numpy array of third B coefficients, or 2D array of (coefficients x 12 months)
+            :monthly_groups: (GroupIndex) optional month group structure of the days passed
+
+        Returns:
+            :rmse: (ndarray) 1D numpy array of the RMSE of each set of coefficients, or if monthly_groups is provided
+                a 2D array of (coefficients x 12 months)
+    """
+    (b_zero, b_one, b_two) = (np.reshape(b, (np.shape(b)[0], -1)) for b in (b_zero, b_one, b_two))
+
+    # B coefficient of each month for every set of coefficients, which is then expanded to every day
+    b_coefficient = b_zero + b_one * np.exp(b_two * mm_delta_t)
+    squared_error = np.exp(-1 * b_coefficient[:, month_codes] * delta_t_factor)
+    squared_error *= -0.9
+    squared_error += 1
+    squared_error *= rso
+    squared_error -= rs
+    squared_error **= 2
+
+    if monthly_groups is not None:
+        return np.sqrt(grouped_nanmean(monthly_groups, squared_error))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.sqrt(squared_error.sum(axis=1) / rs.size)
+
+
+def _pattern_search_rs_tr(rmse_function, tolerance, max_evaluations, n_searches=1):
+    """
+        Deterministic bounded pattern search for the B coefficients that minimize the RMSE of thornton-running solar
+        radiation. Coefficients are searched within the same bracket as the monte carlo simulation, scaled so that
+        each one ranges from -1 to 1. Starting from the original coefficients, each step tries moving each coefficient
+        up and down by the step size and moves to the best of them, or halves the step size if none improve the RMSE.
+        As it starts from the original coefficients, the result is never worse than them.
+
+        Several independent searches (ex. one for each month) can be run together, each step of all of them is
+        evaluated in one call to rmse_function.
+
+        Args:
+            :rmse_function: (function) takes 2D numpy arrays of b_zero, b_one, and b_two of shape (points x searches),
+                and returns a 2D array of the RMSE of each point for each search
+            :tolerance: (float) a search stops once its step size falls below this fraction of the bracket
+            :max_evaluations: (int) a search stops once RMSE has been calculated for this many sets of coefficients
+            :n_searches: (int) number of independent searches
+
+        Returns:
+            :best_coefficients: (ndarray) 2D numpy array of the optimized (b_zero, b_one, b_two) of each search
+            :best_rmse: (ndarray) 1D numpy array of the RMSE of the optimized coefficients of each search
+            :evaluations: (ndarray) 1D numpy array of the number of sets of coefficients evaluated by each search
+    """
+    def scaled_rmse(points):
+        coefficients = TR_ORIGINAL_COEFFICIENTS + TR_ORIGINAL_COEFFICIENTS * TR_COEFFICIENT_BRACKET * points
+        return rmse_function(coefficients[..., 0], coefficients[..., 1], coefficients[..., 2])
+
+    directions = np.vstack([np.eye(3), -np.eye(3)])[:, np.newaxis, :]
+    best_points = np.zeros((n_searches, 3))
+    best_rmse = scaled_rmse(best_points[np.newaxis])[0]
+    evaluations = np.ones(n_searches, dtype=int)
+    steps = np.where(np.isnan(best_rmse), 0.0, 0.5)  # searches without any valid days have nothing to fit
+
+    while True:
+        # Poll the neighboring points that are within the bracket, skipping any that were clipped onto the best
+        # point, as well as searches that have converged or run out of evaluations
+        polled_points = np.clip(best_points + steps[:, np.newaxis] * directions, -1, 1)
+        polled = np.any(polled_points != best_points, axis=2) & (steps >= tolerance)
+        polled &= np.cumsum(polled, axis=0) <= max_evaluations - evaluations
+        if not polled.any():
+            break
+
+        polled_rmse = np.where(polled, scaled_rmse(polled_points), np.nan)
+        evaluations += polled.sum(axis=0)
+
+        # Each search either moves to its best improvement or halves its step size
+        best_index = np.argmin(np.where(np.isnan(polled_rmse), np.inf, polled_rmse), axis=0)
+        search_index = np.arange(n_searches)
+        improved = polled_rmse[best_index, search_index] < best_rmse
+        best_points[improved] = polled_points[best_index, search_index][improved]
+        best_rmse[improved] = polled_rmse[best_index, search_index][improved]
+        steps[~improved & polled.any(axis=0)] /= 2
+
+    best_coefficients = TR_ORIGINAL_COEFFICIENTS + TR_ORIGINAL_COEFFICIENTS * TR_COEFFICIENT_BRACKET * best_points
+    return best_coefficients, best_rmse, evaluations
+
+
+def calc_org_and_opt_rs_tr(mc_iterations, log_path, month, delta_t, mm_delta_t, rs, rso, groups=None,
+                           optimizer='monte_carlo', tolerance=0.001, max_evaluations=300, monthly_coefficients=False,
+                           rng=None):
     """
     This function performs a monte carlo simulation on the b coefficients that go into generating thornton-
     running solar radiation in an attempt to optimize a model that best fits observed solar radiation data.
     That best fit model will then be used to fill any missing observations in actual solar radiation for the
     calculation of reference evapotranspiration. See the function `calc_rs_tr()` for more information.
 
+    All randomized coefficients are evaluated together in chunks of at most MC_CHUNK_ELEMENTS values, see
+    `_batch_rs_tr_rmse()`, which selects the same coefficients as running `calc_rs_tr()` on each of them in turn.
+
     The bracket size with which to generate random values
     is 0.5, this factor was chosen after trying different values on several stations and were a good balance of
     minimizing RMSE and processing speed.
@@ -250,6 +417,14 @@ def calc_org_and_opt_rs_tr(mc_iterations, log_path, month, delta_t, mm_delta_t,
     When running the script on the first mode, only 100 iterations are done to save time, it may be that optimized
     has worse parameters than original in this case, so we just return the original parameters as the optimized
 
+    Alternatively, if optimizer is 'pattern_search', the coefficients are instead optimized within the same bracket
+    by a deterministic pattern search, see `_pattern_search_rs_tr()`, which usually reaches a lower RMSE in a
+    fraction of the evaluations, and never does worse than the original coefficients. mc_iterations is then unused.
+
+    If monthly_coefficients is True, a separate set of coefficients is fit for each month, as residuals of the
+    original model often vary by season. The months are fit together from the same set of evaluations, rather than
+    as 12 separate optimizations, and the returned opt_rs_tr uses the coefficients of each day's month.
+
     Args:
         :mc_iterations: (int) number of iterations in monte carlo simulation
         :log_path: (str) path to log file that we will write the b coefficients and other relevant info to
@@ -258,67 +433,132 @@ def calc_org_and_opt_rs_tr(mc_iterations, log_path, month, delta_t, mm_delta_t,
         :mm_delta_t: (ndarray) monthly averaged delta_t (12 values total) values
         :rs: (ndarray) 1D numpy array of observed solar radiation values in w/m2
         :rso: (ndarray) 1D numpy array of clear-sky solar radiation values in w/m2
+        :groups: (GroupIndex) optional month group structure of the record, computed from month if not provided
+        :optimizer: (str) method used to optimize the coefficients, one of RS_TR_OPTIMIZERS
+        :tolerance: (float) pattern search stops once its step size falls below this fraction of the bracket
+        :max_evaluations: (int) maximum number of sets of coefficients the pattern search will evaluate (per month)
+        :monthly_coefficients: (bool) whether to fit separate coefficients for each month
+        :rng: (Generator) optional generator the monte carlo coefficients are drawn from, np.random is used if None
     Returns:
         :org_rs_tr: (ndarray) 1D numpy array of thornton-running solar radiation with original B coefficient values
         :mm_org_rs_tr: (ndarray) 1D numpy array of monthly averaged org_rs_tr (12 values total) values
         :opt_rs_tr: (ndarray) 1D numpy array of thornton-running solar radiation with optimized B coefficient values
         :mm_opt_rs_tr: (ndarray) 1D numpy array of monthly averaged opt_rs_tr (12 values total) values
     """
-    print("\nSystem: Now performing a Monte Carlo simulation to optimize Thornton Running solar radiation parameters.")
-    print("System: %s iterations are being run, this may take some time." % mc_iterations)
+    if optimizer not in RS_TR_OPTIMIZERS:
+        raise ValueError('\n\nThornton-Running optimizer \'{}\' is not one of {}.'.format(optimizer, RS_TR_OPTIMIZERS))
+    if groups is None:
+        groups = month_groups(month)
 
-    b_zero = np.array(0.031 + (0.031 * 0.5) * np.random.uniform(low=-1, high=1, size=mc_iterations))
-    b_one = np.array(0.201 + (0.201 * 0.5) * np.random.uniform(low=-1, high=1, size=mc_iterations))
-    b_two = np.array(-0.185 + (-0.185 * 0.5) * np.random.uniform(low=-1, high=1, size=mc_iterations))
-
-    mc_rmse = np.zeros(mc_iterations)
+    # Fitting is always done in 64 bit so the RMSE of small differences in coefficients can be told apart, results
+    # are returned in the precision of the inputs
+    result_dtype = np.result_type(rs, rso, delta_t)
+    (delta_t, rs, rso) = (np.asarray(var, dtype=np.float64) for var in (delta_t, rs, rso))
 
     # Calculate rs_tr using original, unoptimized B coefficients
-    (orig_rs_tr, mm_orig_rs_tr) = calc_rs_tr(month, rso, delta_t, mm_delta_t, 0.031, 0.201, -0.185)
+    (orig_rs_tr, mm_orig_rs_tr) = calc_rs_tr(month, rso, delta_t, mm_delta_t, 0.031, 0.201, -0.185, groups)
+    # Calculate RMSE of original rs_tr B coefficients
+    orig_rmse = np.sqrt(np.nanmean((orig_rs_tr - rs) ** 2))
 
-    for i in range(mc_iterations):
-        # Run all randomized b coefficients through thornton running calculation
-        (mc_rs_tr, mm_mc_rs_tr) = calc_rs_tr(month, rso, delta_t, mm_delta_t, b_zero[i], b_one[i], b_two[i])
+    # Terms that do not depend on the coefficients are computed once, on the days where RMSE can be calculated
+    delta_t_factor = np.asarray(delta_t, dtype=float) ** 1.5
+    valid_days = ~(np.isnan(rs) | np.isnan(rso) | np.isnan(delta_t_factor) | np.isnan(mm_delta_t[groups.codes]))
+    valid_codes = groups.codes[valid_days]
+    (valid_rso, valid_delta_t_factor, valid_rs) = (rso[valid_days], delta_t_factor[valid_days], rs[valid_days])
 
-        mc_rmse[i] = np.sqrt(np.nanmean((mc_rs_tr - rs) ** 2))  # Calculate RMSE to track how good those parameters were
+    # Monthly RMSE is reduced over the valid days of each month
+    monthly_groups = make_groups(valid_codes, 12) if monthly_coefficients else None
 
-        if (i % 100) == 0:  # Update user so they don't think script is frozen.
-            print('System: Processing Thornton-Running iteration: {} of {}'.format(i, mc_iterations))
-        else:
-            pass
+    if optimizer == 'pattern_search':
+        print("\nSystem: Now performing a pattern search to optimize Thornton Running solar radiation parameters.")
 
-    # Now that we've iterated through all variations, find the best one
-    min_rmse_index = np.nanargmin(mc_rmse)
-    # Calculate RMSE of original rs_tr B coefficients
-    orig_rmse = np.sqrt(np.nanmean((orig_rs_tr - rs) ** 2))
+        (opt_coefficients, search_rmse, evaluations) = _pattern_search_rs_tr(
+            lambda b_zero, b_one, b_two: _batch_rs_tr_rmse(valid_codes, valid_rso, valid_delta_t_factor, mm_delta_t,
+                                                           valid_rs, b_zero, b_one, b_two, monthly_groups)
+            .reshape(b_zero.shape), tolerance, max_evaluations, 12 if monthly_coefficients else 1)
 
-    print('System: Original coefficients for TR Solar Radiation produced an RMSE of: {0:.4f}'.format(orig_rmse))
-    print('System: Optimized coefficients for TR Solar Radiation produced an RMSE of: {0:.4f}'.
-          format(mc_rmse[min_rmse_index]))
+        if monthly_coefficients:
+            (opt_b_zero, opt_b_one, opt_b_two) = opt_coefficients.T
+            (opt_rmse, monthly_rmse) = (None, search_rmse)
+            optimization_description = 'Pattern search with a tolerance of {} ({} evaluations, a maximum of {} ' \
+                                       'per month)'.format(tolerance, evaluations.sum(), max_evaluations)
+        else:
+            (opt_b_zero, opt_b_one, opt_b_two) = opt_coefficients[0]
+            opt_rmse = search_rmse[0]
+            optimization_description = 'Pattern search with a tolerance of {} ({} of a maximum {} evaluations)'\
+                .format(tolerance, evaluations[0], max_evaluations)
+
+    else:
+        print("\nSystem: Now performing a Monte Carlo simulation to optimize Thornton Running solar radiation "
+              "parameters.")
+        print("System: %s iterations are being run, this may take some time." % mc_iterations)
+
+        random_source = np.random if rng is None else rng
+        b_zero = np.array(0.031 + (0.031 * 0.5) * random_source.uniform(low=-1, high=1, size=mc_iterations))
+        b_one = np.array(0.201 + (0.201 * 0.5) * random_source.uniform(low=-1, high=1, size=mc_iterations))
+        b_two = np.array(-0.185 + (-0.185 * 0.5) * random_source.uniform(low=-1, high=1, size=mc_iterations))
+
+        mc_rmse = np.zeros((mc_iterations, 12) if monthly_coefficients else mc_iterations)
+        chunk_size = max(1, MC_CHUNK_ELEMENTS // max(1, valid_rs.size))
+        for i in range(0, mc_iterations, chunk_size):
+            # Run a chunk of the randomized b coefficients through thornton running calculation
+            chunk = slice(i, min(i + chunk_size, mc_iterations))
+            mc_rmse[chunk] = _batch_rs_tr_rmse(valid_codes, valid_rso, valid_delta_t_factor, mm_delta_t, valid_rs,
+                                               b_zero[chunk], b_one[chunk], b_two[chunk], monthly_groups)
+
+            if chunk.stop < mc_iterations:  # Update user so they don't think script is frozen.
+                print('System: Processing Thornton-Running iteration: {} of {}'.format(chunk.stop, mc_iterations))
+
+        # Now that we've iterated through all variations, find the best one
+        if monthly_coefficients:
+            # Each month takes its best coefficients, months without any valid days keep the original coefficients
+            min_rmse_index = np.argmin(np.where(np.isnan(mc_rmse), np.inf, mc_rmse), axis=0)
+            fitted_months = ~np.all(np.isnan(mc_rmse), axis=0)
+            (opt_b_zero, opt_b_one, opt_b_two) = (np.where(fitted_months, b[min_rmse_index], original) for (b, original)
+                                                  in zip((b_zero, b_one, b_two), TR_ORIGINAL_COEFFICIENTS))
+            (opt_rmse, monthly_rmse) = (None, mc_rmse[min_rmse_index, np.arange(12)])
+        else:
+            min_rmse_index = np.nanargmin(mc_rmse)
+            (opt_b_zero, opt_b_one, opt_b_two) = (b_zero[min_rmse_index], b_one[min_rmse_index],
+                                                  b_two[min_rmse_index])
+            opt_rmse = mc_rmse[min_rmse_index]
+        optimization_description = 'Monte Carlo simulation with %s iterations' % mc_iterations
 
     # Calculate the optimized rs_tr using the B coefficients that caused the lowest rmse
-    (opt_rs_tr, mm_opt_rs_tr) = calc_rs_tr(month, rso, delta_t, mm_delta_t, b_zero[min_rmse_index],
-                                           b_one[min_rmse_index], b_two[min_rmse_index])
+    (opt_rs_tr, mm_opt_rs_tr) = calc_rs_tr(month, rso, delta_t, mm_delta_t, opt_b_zero, opt_b_one, opt_b_two, groups)
+    if monthly_coefficients:
+        # The RMSE of the whole record combines the fits of each month
+        opt_rmse = np.sqrt(np.nanmean((opt_rs_tr - rs) ** 2))
+
+    print('System: Original coefficients for TR Solar Radiation produced an RMSE of: {0:.4f}'.format(orig_rmse))
+    print('System: Optimized coefficients for TR Solar Radiation produced an RMSE of: {0:.4f}'.format(opt_rmse))
 
     # Write the b coefficients used to the log file then close it
     log.basicConfig()
     corr_log = open(log_path, 'a')
     corr_log.write('\n\nThornton-Running Solar Radiation Optimization')
-    corr_log.write('\nMonte Carlo simulation with %s iterations produced the coefficients:' % mc_iterations)
-    corr_log.write('\nb_zero = {0:.4f}, b_one = {1:.4f}, b_two = {2:.4f}'.
-                   format(b_zero[min_rmse_index], b_one[min_rmse_index], b_two[min_rmse_index]))
-    corr_log.write('\nOptimized coefficients RMSE against observed solar radiation was: {0:.4f}'.
-                   format(mc_rmse[min_rmse_index]))
+    if monthly_coefficients:
+        corr_log.write('\n%s produced the monthly coefficients:' % optimization_description)
+        for k in range(12):
+            corr_log.write('\nMonth {0:2d}: b_zero = {1:.4f}, b_one = {2:.4f}, b_two = {3:.4f}, RMSE = {4:.4f}'
+                           .format(k + 1, opt_b_zero[k], opt_b_one[k], opt_b_two[k], monthly_rmse[k]))
+    else:
+        corr_log.write('\n%s produced the coefficients:' % optimization_description)
+        corr_log.write('\nb_zero = {0:.4f}, b_one = {1:.4f}, b_two = {2:.4f}'.format(opt_b_zero, opt_b_one, opt_b_two))
+    corr_log.write('\nOptimized coefficients RMSE against observed solar radiation was: {0:.4f}'.format(opt_rmse))
     corr_log.write('\nOriginal coefficients RMSE against observed solar radiation was: {0:.4f} \n\n'
                    .format(orig_rmse))
     corr_log.close()
 
-    if orig_rmse < mc_rmse[min_rmse_index] and mc_iterations == 100:
+    # The pattern search starts from the original coefficients, so only the monte carlo simulation can be worse
+    if optimizer == 'pattern_search':
+        pass
+    elif orig_rmse < opt_rmse and mc_iterations == 100:
         # if original was better than optimized, it is likely because we didn't do enough iterations
         # which is likely because we're not correcting data, so just return original as optimized
         opt_rs_tr = orig_rs_tr
         mm_opt_rs_tr = mm_orig_rs_tr
-    elif orig_rmse < mc_rmse[min_rmse_index] and mc_iterations != 100:
+    elif orig_rmse < opt_rmse and mc_iterations != 100:
         # this shouldn't happen, as we should have done enough iterations to beat original values, so raise an error
         raise ValueError('Thornton running optimization failed to beat original coefficient values.' +
                          ' Try running again, and if this error persists please report it on github.')
@@ -326,7 +566,8 @@ def calc_org_and_opt_rs_tr(mc_iterations, log_path, month, delta_t, mm_delta_t,
         pass
 
     # Return both original and optimized rs_tr
-    return orig_rs_tr, mm_orig_rs_tr, opt_rs_tr, mm_opt_rs_tr
+    return orig_rs_tr.astype(result_dtype, copy=False), mm_orig_rs_tr, opt_rs_tr.astype(result_dtype, copy=False), \
+        mm_opt_rs_tr
 
 
 def calc_compiled_ea(tmax, tmin, tavg, ea, tdew, tdew_col,
@@ -336,6 +577,9 @@ def calc_compiled_ea(tmax, tmin, tavg, ea, tdew, tdew_col,
         provided within the dataset for each given day of the record. This function will work regardless of if ea is
         provided by the dataset or not. See `qaqc_functions.compiled_humidity_adjustment` for more information.
 
+        The best source is selected for every day at once, in order of preference ea, tdew, rhmax and rhmin, rhavg,
+        and finally tdew filled in by the tmin - ko curve.
+
         Args:
             :tmax: (ndarray) 1D array of maximum temperature values
             :tmin: (ndarray) 1D array of minimum temperature values
@@ -353,51 +597,37 @@ def calc_compiled_ea(tmax, tmin, tavg, ea, tdew, tdew_col,
 
         Returns:
             :compiled_ea: (ndarray) 1D array of vapor pressure that has been compiled from the "best" data sources
+            :compiled_ea_source: (ndarray) 1D int8 array of the source used for each day, as an index into
+                COMPILED_EA_SOURCES, 0 if no source was available
     """
-    data_length = ea.shape[0]
-    compiled_ea = np.empty(data_length) * np.nan
-    tdew_calc_ea = np.empty(data_length) * np.nan
-    rh_max_min_calc_ea = np.empty(data_length) * np.nan
-    rh_avg_calc_ea = np.empty(data_length) * np.nan
-
-    # TDew data filled in with TMin - Ko curve is always an option
-    tdew_ko_calc_ea = np.array(0.6108 * np.exp((17.27 * tdew_ko) / (tdew_ko + 237.3)))  # EQ 8, units kPa
+    # Candidate sources in order of preference, ea is always first since it may already be calculated from the best
+    # humidity variable available, and TDew data filled in with TMin - Ko curve is always an option
+    candidates = [(1, ea)]
 
     if tdew_col != -1:  # Dewpoint temperature is provided
-
-        tdew_calc_ea = np.array(0.6108 * np.exp((17.27 * tdew) / (tdew + 237.3)))  # EQ 8, units kPa
+        candidates.append((2, 0.6108 * np.exp((17.27 * tdew) / (tdew + 237.3))))  # EQ 8, units kPa
 
     if rhmax_col != -1 and rhmin_col != -1:  # relative humidity is provided
-
-        eo_tmax = np.array(0.6108 * np.exp((17.27 * tmax) / (tmax + 237.3)))  # units kPa, EQ 7
-        eo_tmin = np.array(0.6108 * np.exp((17.27 * tmin) / (tmin + 237.3)))  # units kPa, EQ 7
-
-        rh_max_min_calc_ea = np.array(((eo_tmin * (rhmax / 100)) + (eo_tmax * (rhmin / 100))) / 2)  # EQ 11
+        eo_tmax = 0.6108 * np.exp((17.27 * tmax) / (tmax + 237.3))  # units kPa, EQ 7
+        eo_tmin = 0.6108 * np.exp((17.27 * tmin) / (tmin + 237.3))  # units kPa, EQ 7
+        candidates.append((3, ((eo_tmin * (rhmax / 100)) + (eo_tmax * (rhmin / 100))) / 2))  # EQ 11
 
     if rhavg_col != -1:  # RHAvg is provided
+        eo_tavg = 0.6108 * np.exp((17.27 * tavg) / (tavg + 237.3))  # units kPa, EQ 7
+        candidates.append((4, eo_tavg * (rhavg / 100)))  # EQ 14
 
-        eo_tavg = np.array(0.6108 * np.exp((17.27 * tavg) / (tavg + 237.3)))  # units kPa, EQ 7
-        rh_avg_calc_ea = np.array(eo_tavg * (rhavg / 100))  # EQ 14
-
-    for i in range(data_length):
-        if np.isnan(ea[i]):  # Either Ea is provided or is already calculated by the best humidity variable available
-
-            if not np.isnan(tdew_calc_ea[i]):
-                compiled_ea[i] = tdew_calc_ea[i]
-
-            elif np.isnan(tdew_calc_ea[i]) and not np.isnan(rh_max_min_calc_ea[i]):
-                compiled_ea[i] = rh_max_min_calc_ea[i]
-
-            elif np.isnan(tdew_calc_ea[i]) and np.isnan(rh_max_min_calc_ea[i]) and not np.isnan(rh_avg_calc_ea[i]):
-                compiled_ea[i] = rh_avg_calc_ea[i]
+    candidates.append((5, 0.6108 * np.exp((17.27 * tdew_ko) / (tdew_ko + 237.3))))  # EQ 8, units kPa
 
-            elif np.isnan(tdew_calc_ea[i]) and np.isnan(rh_max_min_calc_ea[i]) and np.isnan(rh_avg_calc_ea[i]):
-                compiled_ea[i] = tdew_ko_calc_ea[i]
+    # Pick the first valid candidate of each day, days without any valid candidate are left as nan
+    (source_codes, candidate_ea) = zip(*candidates)
+    candidate_ea = np.vstack(candidate_ea)
+    valid = ~np.isnan(candidate_ea)
+    best = valid.argmax(axis=0)
+    compiled_ea = np.take_along_axis(candidate_ea, best[np.newaxis, :], axis=0)[0]
+    compiled_ea_source = np.where(valid.any(axis=0), np.array(source_codes, dtype=np.int8)[best], 0).astype(np.int8)
 
-        else:  # ea exists here so no need to fill
-            compiled_ea[i] = ea[i]
+    return compiled_ea, compiled_ea_source
 
-    return compiled_ea
 
 # This is never run by itself
 if __name__ == "__main__":
@@ -0,0 +1,115 @@
+import numpy as np
+
+
+# Dates are handled as datetime64[D] arrays, which store each date as an integer number of days since 1970-01-01,
+# so converting between dates and year/month/day/doy values and filling gaps are done for a whole record at once
+
+
+def dates_from_ymd(year, month, day):
+    """
+        Creates an array of dates from separate year, month, and day values.
+
+        Args:
+            :year: (ndarray) 1D array of year values
+            :month: (ndarray) 1D array of month values from 1 to 12
+            :day: (ndarray) 1D array of day of month values
+
+        Returns:
+            :dates: (ndarray) 1D datetime64[D] array of dates
+    """
+    (year, month, day) = (np.asarray(var, dtype=np.int64) for var in (year, month, day))
+    if np.any((month < 1) | (month > 12)):
+        raise ValueError('\n\nMonth values must be between 1 and 12.')
+
+    months = (year - 1970) * 12 + (month - 1)
+    dates = months.astype('datetime64[M]').astype('datetime64[D]') + (day - 1)
+
+    # Days past the end of their month roll over into the next month, so they are found by converting back
+    if np.any((day < 1) | (dates.astype('datetime64[M]') != months.astype('datetime64[M]'))):
+        raise ValueError('\n\nOne or more day values are not valid days of their month.')
+
+    return dates
+
+
+def dates_from_year_doy(year, doy):
+    """
+        Creates an array of dates from separate year and day of year values.
+
+        Args:
+            :year: (ndarray) 1D array of year values
+            :doy: (ndarray) 1D array of day of year values from 1 to 365, or 366 in leap years
+
+        Returns:
+            :dates: (ndarray) 1D datetime64[D] array of dates
+    """
+    (year, doy) = (np.asarray(var, dtype=np.int64) for var in (year, doy))
+    year_start = (year - 1970).astype('datetime64[Y]')
+    dates = year_start.astype('datetime64[D]') + (doy - 1)
+
+    if np.any((doy < 1) | (dates.astype('datetime64[Y]') != year_start)):
+        raise ValueError('\n\nOne or more day of year values are not valid days of their year.')
+
+    return dates
+
+
+def split_dates(dates):
+    """
+        Splits an array of dates into year, month, day, and day of year values.
+
+        Args:
+            :dates: (ndarray) 1D array of datetime64 values, any time of day is ignored
+
+        Returns:
+            :year: (ndarray) 1D array of year values
+            :month: (ndarray) 1D array of month values from 1 to 12
+            :day: (ndarray) 1D array of day of month values
+            :doy: (ndarray) 1D array of day of year values
+    """
+    dates = np.asarray(dates).astype('datetime64[D]')
+    year_start = dates.astype('datetime64[Y]')
+    month_start = dates.astype('datetime64[M]')
+
+    year = year_start.astype(np.int64) + 1970
+    month = (month_start - year_start.astype('datetime64[M]')).astype(np.int64) + 1
+    day = (dates - month_start.astype('datetime64[D]')).astype(np.int64) + 1
+    doy = (dates - year_start.astype('datetime64[D]')).astype(np.int64) + 1
+
+    return year, month, day, doy
+
+
+def reindex_daily(dates, values):
+    """
+        Places the rows of a record onto a continuous daily record that runs from its first date to its last date.
+        Days missing from the record are filled with nan, and if a date appears more than once only its first row is
+        kept, since it cannot be determined which one is correct. Rows with dates outside of the first to last date
+        range are dropped.
+
+        Args:
+            :dates: (ndarray) 1D datetime64[D] array of the date of each row
+            :values: (ndarray) 2D array of (rows x variables) data
+
+        Returns:
+            :daily_dates: (ndarray) 1D datetime64[D] array of every date from the first to the last date of the record
+            :daily_values: (ndarray) 2D array of (days x variables) data
+            :missing_dates: (int) number of dates that did not appear in the record
+    """
+    dates = np.asarray(dates).astype('datetime64[D]')
+    values = np.asarray(values, dtype=float)
+
+    number_of_days = max(int((dates[-1] - dates[0]).astype(np.int64)) + 1, 0)
+    daily_dates = dates[0] + np.arange(number_of_days)
+
+    # Position of each row in the daily record, the first occurrence of each date is kept
+    positions = (dates - dates[0]).astype(np.int64)
+    in_range = np.flatnonzero((positions >= 0) & (positions < number_of_days))
+    (unique_positions, first_rows) = np.unique(positions[in_range], return_index=True)
+
+    daily_values = np.full((number_of_days, values.shape[1]), np.nan)
+    daily_values[unique_positions] = values[in_range[first_rows]]
+
+    return daily_dates, daily_values, number_of_days - unique_positions.size
+
+
+# This is never run by itself
+if __name__ == "__main__":
+    print("\nThis module is called as a part of the QAQC script, it does nothing by itself.")
@@ -0,0 +1,300 @@
+import numpy as np
+from collections import namedtuple
+
+
+# Group structure of a record, computed once and reused for every grouped reduction over that record
+#   codes: (ndarray) 1D array of the zero-based group of each observation
+#   n_groups: (int) number of groups
+#   sizes: (ndarray) number of observations in each group, including nans
+#   order: (ndarray) stable sort order of the observations by group
+#   offsets: (ndarray) group k occupies order[offsets[k]:offsets[k + 1]]
+GroupIndex = namedtuple('GroupIndex', ['codes', 'n_groups', 'sizes', 'order', 'offsets'])
+
+
+def make_groups(codes, n_groups):
+    """
+        Builds the group structure for a record from the zero-based group code of each observation.
+
+        Args:
+            :codes: (ndarray) 1D array of integer group codes, all between 0 and n_groups - 1
+            :n_groups: (int) number of groups
+
+        Returns:
+            :groups: (GroupIndex) group structure to pass to the grouped reductions
+    """
+    codes = np.asarray(codes, dtype=np.intp)
+    if codes.size and (codes.min() < 0 or codes.max() >= n_groups):
+        raise ValueError('\n\nGroup codes must be between 0 and {} inclusive.'.format(n_groups - 1))
+
+    sizes = np.bincount(codes, minlength=n_groups)
+    order = np.argsort(codes, kind='stable')
+    offsets = np.concatenate(([0], np.cumsum(sizes)))
+
+    return GroupIndex(codes, n_groups, sizes, order, offsets)
+
+
+def month_groups(month):
+    """
+        Builds the group structure of a record by month, so January observations are group 0, etc.
+
+        Args:
+            :month: (ndarray) 1D array of month values from 1 to 12
+
+        Returns:
+            :groups: (GroupIndex) group structure of the 12 months
+    """
+    return make_groups(np.asarray(month) - 1, 12)
+
+
+def group_members(groups, k):
+    """
+        Returns the indices of the observations in a group, in record order.
+
+        Args:
+            :groups: (GroupIndex) group structure returned by make_groups or month_groups
+            :k: (int) zero-based group
+
+        Returns:
+            :indices: (ndarray) 1D array of the indices of observations in group k
+    """
+    return groups.order[groups.offsets[k]:groups.offsets[k + 1]]
+
+
+def _grouped_sums(groups, values, weights):
+    """
+        Sums weights by group for each row of values with a single bincount, rows are offset into separate ranges of
+        bins so that all variables are reduced at once. Nan values are excluded.
+
+        Args:
+            :groups: (GroupIndex) group structure of the record
+            :values: (ndarray) 2D array of (variables x observations), used to find nans
+            :weights: (ndarray) 2D array of (variables x observations) to sum, or None to count valid values
+
+        Returns:
+            :sums: (ndarray) 2D array of (variables x groups)
+    """
+    valid = ~np.isnan(values)
+    bins = groups.codes + groups.n_groups * np.arange(values.shape[0])[:, np.newaxis]
+    sums = np.bincount(bins[valid], weights=None if weights is None else weights[valid],
+                       minlength=values.shape[0] * groups.n_groups)
+
+    return sums.reshape(values.shape[0], groups.n_groups)
+
+
+def grouped_stats(groups, values):
+    """
+        Calculates the nanmean, nanstd, and count of valid observations of each group, for one or many variables at
+        once. Results match calling np.nanmean and np.nanstd on each group, so groups without valid observations
+        have a nan mean and standard deviation.
+
+        Args:
+            :groups: (GroupIndex) group structure returned by make_groups or month_groups
+            :values: (ndarray) 1D array of observations, or 2D array of (variables x observations)
+
+        Returns:
+            :means: (ndarray) mean of each group, (groups) for 1D values or (variables x groups) for 2D values
+            :stds: (ndarray) population standard deviation of each group, same shape as means
+            :counts: (ndarray) number of non-nan observations in each group, same shape as means
+    """
+    values = np.asarray(values, dtype=float)
+    stacked = np.atleast_2d(values)
+
+    counts = _grouped_sums(groups, stacked, None).astype(int)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = _grouped_sums(groups, stacked, stacked) / counts
+        # Two passes, deviations from the group mean are squared to avoid the cancellation of E[x^2] - E[x]^2
+        deviations = stacked - means[:, groups.codes]
+        stds = np.sqrt(_grouped_sums(groups, stacked, deviations ** 2) / counts)
+
+    if values.ndim == 1:
+        return means[0], stds[0], counts[0]
+    return means, stds, counts
+
+
+def grouped_nanmean(groups, values):
+    """
+        Calculates the mean of each group ignoring nans, see grouped_stats.
+
+        Args:
+            :groups: (GroupIndex) group structure returned by make_groups or month_groups
+            :values: (ndarray) 1D array of observations, or 2D array of (variables x observations)
+
+        Returns:
+            :means: (ndarray) mean of each group, (groups) for 1D values or (variables x groups) for 2D values
+    """
+    values = np.asarray(values, dtype=float)
+    stacked = np.atleast_2d(values)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = _grouped_sums(groups, stacked, stacked) / _grouped_sums(groups, stacked, None)
+
+    return means[0] if values.ndim == 1 else means
+
+
+def grouped_nanstd(groups, values):
+    """
+        Calculates the population standard deviation of each group ignoring nans, see grouped_stats.
+
+        Args:
+            :groups: (GroupIndex) group structure returned by make_groups or month_groups
+            :values: (ndarray) 1D array of observations, or 2D array of (variables x observations)
+
+        Returns:
+            :stds: (ndarray) standard deviation of each group, (groups) for 1D values or (variables x groups) for 2D
+    """
+    return grouped_stats(groups, values)[1]
+
+
+def grouped_nanmedian(groups, values):
+    """
+        Calculates the median of each group ignoring nans, for one or many variables at once. Each variable is put in
+        group order and sorted within the segment of each group, so every median is found by indexing. Results match
+        calling np.nanmedian on each group, so groups without valid observations have a nan median, and 32 bit values
+        give 32 bit medians.
+
+        Args:
+            :groups: (GroupIndex) group structure returned by make_groups or month_groups
+            :values: (ndarray) 1D array of observations, or 2D array of (variables x observations)
+
+        Returns:
+            :medians: (ndarray) median of each group, (groups) for 1D values or (variables x groups) for 2D values
+    """
+    values = np.asarray(values)
+    if values.dtype.kind != 'f':
+        values = values.astype(float)
+    stacked = np.atleast_2d(values)
+
+    counts = _grouped_sums(groups, stacked, None).astype(int)
+    lower = groups.offsets[:-1] + (counts - 1) // 2
+    upper = groups.offsets[:-1] + counts // 2
+    valid_groups = counts > 0
+
+    medians = np.full(counts.shape, np.nan, dtype=stacked.dtype)
+    for (row, variable) in enumerate(stacked):
+        # Each group occupies a contiguous segment once the variable is put in group order, sorting every segment
+        # in place leaves its valid values in order at the start, followed by its nans
+        ordered = variable[groups.order]
+        for k in range(groups.n_groups):
+            ordered[groups.offsets[k]:groups.offsets[k + 1]].sort()
+        row_lower = lower[row, valid_groups[row]]
+        row_upper = upper[row, valid_groups[row]]
+        medians[row, valid_groups[row]] = (ordered[row_lower] + ordered[row_upper]) / 2
+
+    return medians[0] if values.ndim == 1 else medians
+
+
+def grouped_count(groups, values):
+    """
+        Counts the non-nan observations in each group.
+
+        Args:
+            :groups: (GroupIndex) group structure returned by make_groups or month_groups
+            :values: (ndarray) 1D array of observations, or 2D array of (variables x observations)
+
+        Returns:
+            :counts: (ndarray) count of each group, (groups) for 1D values or (variables x groups) for 2D values
+    """
+    values = np.asarray(values, dtype=float)
+    counts = _grouped_sums(groups, np.atleast_2d(values), None).astype(int)
+
+    return counts[0] if values.ndim == 1 else counts
+
+
+def _kth_smallest_deviation(window, center, split, k):
+    """
+        Finds the k-th smallest absolute deviation from center of the values in a sorted window without calculating
+        every deviation. Deviations of the values below center increase moving down from split, and deviations of the
+        rest increase moving up from split, so the k-th smallest of the two sorted sequences is found by bisecting
+        how many of them come from below center.
+
+        Args:
+            :window: (ndarray) 1D sorted array of values, without nans
+            :center: (float) value that deviations are taken from
+            :split: (int) number of values in window that are below center
+            :k: (int) zero-based rank of the deviation to find
+
+        Returns:
+            :deviation: (float) k-th smallest absolute deviation
+    """
+    (below, above) = (split, window.size - split)
+    low = max(0, k + 1 - above)
+    high = min(k + 1, below)
+    while low < high:
+        taken = (low + high) // 2
+        if center - window[split - 1 - taken] < window[split + k - taken] - center:
+            low = taken + 1
+        else:
+            high = taken
+
+    candidates = []
+    if low > 0:
+        candidates.append(center - window[split - low])
+    if low <= k:
+        candidates.append(window[split + k - low] - center)
+    return max(candidates)
+
+
+def rolling_doy_median_mad(doy, values, half_width):
+    """
+        Calculates the median and median absolute deviation of a centered window of days of year, pooling every year of
+        the record, so that day of year d uses all observations within half_width days of d, wrapping around the end of
+        the year. The window is kept sorted and slid one day of year at a time by removing and inserting the sorted
+        observations of the days that leave and enter it, and the median absolute deviation is found from the sorted
+        window by bisection, so neither statistic is recomputed from scratch for each day. Results match calling
+        np.nanmedian on the observations of each window, so windows without valid observations have nan statistics.
+
+        Args:
+            :doy: (ndarray) 1D array of day of year values from 1 to 366
+            :values: (ndarray) 1D array of observations
+            :half_width: (int) number of days of year on each side of the center day included in the window
+
+        Returns:
+            :medians: (ndarray) 1D array of the median of each day of year window, index 0 is day of year 1
+            :mads: (ndarray) 1D array of the median absolute deviation of each day of year window
+    """
+    days_in_cycle = 366
+    if not 0 <= half_width < days_in_cycle // 2:
+        raise ValueError('\n\nThe day of year window half width must be between 0 and {}, not {}.'
+                         .format(days_in_cycle // 2 - 1, half_width))
+
+    values = np.asarray(values)
+    if values.dtype.kind != 'f':
+        values = values.astype(float)
+    groups = make_groups(np.asarray(doy) - 1, days_in_cycle)
+
+    # Sorting the segment of each day of year leaves its valid observations in order, followed by its nans
+    ordered = values[groups.order]
+    for k in range(days_in_cycle):
+        ordered[groups.offsets[k]:groups.offsets[k + 1]].sort()
+    counts = grouped_count(groups, values)
+
+    def day_values(k):
+        k %= days_in_cycle
+        return ordered[groups.offsets[k]:groups.offsets[k] + counts[k]]
+
+    window = np.sort(np.concatenate([day_values(k) for k in range(-half_width, half_width + 1)]))
+    medians = np.full(days_in_cycle, np.nan)
+    mads = np.full(days_in_cycle, np.nan)
+    for center_day in range(days_in_cycle):
+        if center_day > 0:
+            # Slide the window forward a day, values repeated in the leaving day are removed from consecutive positions
+            leaving = day_values(center_day - half_width - 1)
+            repeat_offsets = np.arange(leaving.size) - np.searchsorted(leaving, leaving, side='left')
+            window = np.delete(window, np.searchsorted(window, leaving, side='left') + repeat_offsets)
+            entering = day_values(center_day + half_width)
+            window = np.insert(window, np.searchsorted(window, entering), entering)
+
+        if window.size:
+            (lower, upper) = ((window.size - 1) // 2, window.size // 2)
+            center = (window[lower] + window[upper]) / 2
+            split = int(np.searchsorted(window, center, side='left'))
+            medians[center_day] = center
+            mads[center_day] = (_kth_smallest_deviation(window, center, split, lower) +
+                                _kth_smallest_deviation(window, center, split, upper)) / 2
+
+    return medians, mads
+
+
+# This is never run by itself
+if __name__ == "__main__":
+    print("\nThis module is called as a part of the QAQC script, it does nothing by itself.")
@@ -1,11 +1,107 @@
 import configparser as cp
+import hashlib
+import json
 import logging as log
 import numpy as np
+import openpyxl
 import os
 import pandas as pd
-import warnings
-
-from agweatherqaqc.utils import validate_file, determine_delimiter
+import zipfile
+
+from openpyxl.cell.cell import ERROR_CODES
+from pandas.io.parsers import TextParser
+
+from agweatherqaqc.archive_functions import ARCHIVE_EXTENSION, archive_to_dataframe, read_station_archive, \
+    write_station_archive
+from agweatherqaqc.date_functions import dates_from_year_doy, dates_from_ymd, reindex_daily, split_dates
+from agweatherqaqc.utils import validate_file, determine_delimiter, find_footer_start, open_truncated
+
+# Excel workbooks are read with the Rust-backed calamine engine when it is installed (pip install python-calamine), it
+# requires pandas 2.2 or newer, otherwise they are streamed row by row with openpyxl in read-only mode
+try:
+    import python_calamine  # noqa: F401, only used through pandas
+    EXCEL_CALAMINE_AVAILABLE = tuple(int(v) for v in pd.__version__.split('.')[:2]) >= (2, 2)
+except ImportError:
+    EXCEL_CALAMINE_AVAILABLE = False
+
+
+# Network-specific strings that signify missing data and are not covered by the config's MISSING_INPUT_VALUE
+NETWORK_NA_VALUES = ['NO RECORD   ']  # agrimet pads its missing flag with whitespace
+
+# Config keys of the columns that hold weather variables, and of the date columns required by each DATE_FORMAT
+VARIABLE_COL_KEYS = ['tmax_col', 'tavg_col', 'tmin_col', 'tdew_col', 'uz_col', 'pp_col', 'rs_col', 'ea_col',
+                     'rhmax_col', 'rhavg_col', 'rhmin_col']
+DATE_COL_KEYS = {1: ['string_date_col'], 2: ['year_col', 'month_col', 'day_col'], 3: ['year_col', 'day_of_year_col']}
+
+# Weather variables in the order they are stored in the station matrix, along with the config key of their column and
+# the type of variable, which determines how they are converted and limited
+STATION_VARIABLES = {'tmax': ('tmax_col', 'temperature'), 'tmin': ('tmin_col', 'temperature'),
+                     'tavg': ('tavg_col', 'temperature'), 'tdew': ('tdew_col', 'temperature'),
+                     'ea': ('ea_col', 'vapor_pressure'), 'rhmax': ('rhmax_col', 'relative_humidity'),
+                     'rhmin': ('rhmin_col', 'relative_humidity'), 'rhavg': ('rhavg_col', 'relative_humidity'),
+                     'rs': ('rs_col', 'solar_radiation'), 'ws': ('uz_col', 'wind_speed'),
+                     'precip': ('pp_col', 'precipitation')}
+
+# Unit conversions for each variable type, as the config key of the unit flag and a dictionary of each flag value's
+# (offset, multiplier, divisor), converted data is ((original + offset) * multiplier) / divisor
+# Sources:
+#   https://www.wcc.nrcs.usda.gov/ftpref/wntsc/H&H/GEM/SolarRadConversion.pdf
+#   https://cliflo-niwa.niwa.co.nz/pls/niwp/wh.do_help?id=ls_rad
+#   FAO 56
+UNIT_CONVERSIONS = {
+    'temperature': ('temperature_units', {
+        0: (0.0, 1.0, 1.0),  # Celsius
+        1: (-32.0, 5.0 / 9.0, 1.0),  # Fahrenheit
+        2: (-273.15, 1.0, 1.0)}),  # kelvin
+    'wind_speed': ('wind_units', {
+        0: (0.0, 1.0, 1.0),  # m/s
+        1: (0.0, 0.44704, 1.0),  # mph
+        2: (0.0, 0.27778, 1.0),  # kmh
+        3: (0.0, 1609.34, 86400.0),  # wind run, miles per day, miles to meters and day to seconds
+        4: (0.0, 1000.0, 86400.0)}),  # wind run, kilometers per day, kilometers to meters and day to seconds
+    'precipitation': ('precipitation_units', {
+        0: (0.0, 1.0, 1.0),  # mm/day
+        1: (0.0, 1000.0, 1.0),  # meters/day
+        2: (0.0, 25.4, 1.0)}),  # inches/day
+    'solar_radiation': ('solar_radiation_units', {
+        0: (0.0, 1.0, 1.0),  # w/m2
+        1: (0.0, 1000000.0, 86400.0),  # mj/m2, convert MJ to J and divide by seconds in the day
+        2: (0.0, 1000.0, 24.0),  # kw-hr/m2, convert kw to w and divide by hours per day
+        3: (0.0, 0.484583, 1.0)}),  # langleys
+    'vapor_pressure': ('vapor_pressure_units', {
+        0: (0.0, 1.0, 1.0),  # kpa
+        1: (0.0, 1.0, 1000.0),  # pa
+        2: (0.0, 0.133322, 1.0),  # torr or mmhg
+        3: (0.0, 0.1, 1.0),  # millibars
+        4: (0.0, 101.325, 1.0)}),  # atmospheres
+    'relative_humidity': ('relative_humidity_units', {
+        0: (0.0, 1.0, 1.0),  # percentage
+        1: (0.0, 100.0, 1.0)})}  # decimal
+
+# Realistic limits for each variable type in metric units, as (lower, lower_inclusive, upper, upper_inclusive)
+# values beyond these limits most likely result from sensor malfunctions, sensor degradation, etc.
+REALISTIC_LIMITS = {
+    'temperature': (-50.0, True, 60.0, True),  # -50 C is -58 F, 60 C is 140 F
+    'wind_speed': (0.1, False, 35.0, True),  # Negative wind speed is impossible, 35 m/s is a cat 1 hurricane
+    'precipitation': (0.0, False, 610.0, True),  # Negative precipitation is impossible, 610 mm is 2 ft of rain a day
+    'solar_radiation': (5.0, True, 700.0, True),
+    'vapor_pressure': (0.0, True, 8.0, True),  # Negative vapor pressure is impossible
+    'relative_humidity': (2.0, False, 110.0, False)}  # avg relative humidity above 100% is unlikely even with drift
+
+# How each variable is aggregated from sub-daily observations into a daily value, 'integral' variables are averaged if
+# provided as a rate (ex. w/m2) or summed over the day if provided as a total per timestep (ex. MJ/m2, see below)
+SUBDAILY_AGGREGATION = {'tmax': 'max', 'tmin': 'min', 'tavg': 'mean', 'tdew': 'mean', 'ea': 'mean', 'rhmax': 'max',
+                        'rhmin': 'min', 'rhavg': 'mean', 'rs': 'integral', 'ws': 'integral', 'precip': 'sum'}
+SUBDAILY_TOTAL_UNITS = {'solar_radiation_units': [1, 2, 3], 'wind_units': [3, 4]}
+
+# Config keys that change how a data file is processed into data_df, these are part of the input cache key
+# INPUT_CACHE_VERSION should be incremented whenever a change to ingest would alter the processed data
+INPUT_CACHE_VERSION = 2
+INPUT_CACHE_CONFIG_KEYS = ['station_extension', 'missing_input_value', 'lines_of_header', 'lines_of_footer',
+                           'data_timestep_minutes', 'daily_completeness', 'date_format', 'temperature_units',
+                           'wind_units', 'precipitation_units', 'solar_radiation_units', 'vapor_pressure_units',
+                           'relative_humidity_units'] + \
+    VARIABLE_COL_KEYS + sorted(set(sum(DATE_COL_KEYS.values(), [])))
 
 
 def _read_config(config_file_path):
@@ -45,6 +141,31 @@ def _read_config(config_file_path):
     config_dict['output_file_format'] = config_reader['OPTIONS']['OUTPUT_DATA_FORMAT']  # either .csv or .xlsx
     config_dict['auto_flag'] = config_reader['OPTIONS'].getboolean('AUTOMATIC_OPTION')  # auto first iteration of QAQC
     config_dict['fill_flag'] = config_reader['OPTIONS'].getboolean('FILL_OPTION')  # Option to fill in missing data
+    # Seed of the random draws that fill missing temperature and wind speed observations, so that filled records can
+    # be reproduced, -1 draws a different fill on every run, older configs may not have this option
+    config_dict['fill_random_seed'] = config_reader['OPTIONS'].getint('FILL_RANDOM_SEED', fallback=-1)
+    if config_dict['fill_random_seed'] < -1:
+        raise ValueError('\n\nFILL_RANDOM_SEED must be -1 (unseeded) or a non-negative integer, not {}.'
+                         .format(config_dict['fill_random_seed']))
+    # Size limit of the cache of processed input files, 0 disables the cache, older configs may not have this option
+    config_dict['input_cache_size_mb'] = config_reader['OPTIONS'].getfloat('INPUT_CACHE_SIZE_MB', fallback=256)
+    # Thornton-Running coefficient optimization, 0 for the monte carlo simulation or 1 for the deterministic pattern
+    # search along with its tolerance and budget of evaluations, older configs may not have these options
+    rs_tr_optimizer = config_reader['OPTIONS'].getint('RS_TR_OPTIMIZER', fallback=0)
+    if rs_tr_optimizer not in [0, 1]:
+        raise ValueError('\n\nRS_TR_OPTIMIZER must be either 0 (monte carlo) or 1 (pattern search), '
+                         'not {}.'.format(rs_tr_optimizer))
+    config_dict['rs_tr_optimizer'] = ['monte_carlo', 'pattern_search'][rs_tr_optimizer]
+    config_dict['rs_tr_tolerance'] = config_reader['OPTIONS'].getfloat('RS_TR_TOLERANCE', fallback=0.001)
+    config_dict['rs_tr_max_evaluations'] = config_reader['OPTIONS'].getint('RS_TR_MAX_EVALUATIONS', fallback=300)
+    config_dict['rs_tr_monthly_coefficients'] = config_reader['OPTIONS'].getboolean('RS_TR_MONTHLY_COEFFICIENTS',
+                                                                                   fallback=False)
+    # Precision that station variables are stored and calculated in, 32 halves memory use for batch runs while
+    # precision sensitive reductions are still done in 64 bit, older configs may not have this option
+    float_precision = config_reader['OPTIONS'].getint('FLOAT_PRECISION', fallback=64)
+    if float_precision not in [32, 64]:
+        raise ValueError('\n\nFLOAT_PRECISION must be either 32 or 64, not {}.'.format(float_precision))
+    config_dict['float_dtype'] = np.float32 if float_precision == 32 else np.float64
 
     # DATA Section - Data Columns
     config_dict['date_format'] = config_reader['DATA'].getint('DATE_FORMAT')
@@ -73,6 +194,10 @@ def _read_config(config_file_path):
     config_dict['vapor_pressure_units'] = config_reader['DATA'].getint('VAPOR_PRESSURE_UNITS')
     config_dict['relative_humidity_units'] = config_reader['DATA'].getint('RELATIVE_HUMIDITY_UNITS')
 
+    # DATA Section - Sub-daily data, these options are not present in older config files
+    config_dict['data_timestep_minutes'] = config_reader['DATA'].getint('DATA_TIMESTEP_MINUTES', fallback=1440)
+    config_dict['daily_completeness'] = config_reader['DATA'].getfloat('DAILY_COMPLETENESS_THRESHOLD', fallback=0.9)
+
     # Check to see that all expected variables are provided, ConfigParser defaults to None if it can't find something.
     if None in config_dict.values():
         # Find all keys where value is None
@@ -83,296 +208,614 @@ def _read_config(config_file_path):
         return config_dict
 
 
-def _extract_variable(raw_data, col):
+def _convert_units(config_dict, original_data, var_type):
     """
-        Pulls individual variable from raw data array and returns it as a numpy array.
+    Takes in 1d numpy array of original data, and then converts it to the appropriate units.
+    What actions are taken are dependent on what parameters were read in/stored into config_dict, and the conversion
+    factors are found in UNIT_CONVERSIONS.
 
-        Args:
-            raw_data : 2D matrix of raw data pulled from input file
-            col : integer specifying column to pull out
+    Args:
+        config_dict: dictionary of all config file values
+        original_data: 1d numpy array of original values
+        var_type: string indicating what data type has been passed, ex. 'temperature', 'precipitation'
 
-        Returns:
-            var : 1D numpy array of the individual variable
+    Returns:
+        converted_data: 1D numpy array of the converted values
     """
-    data_size = raw_data.shape[0]  # size of data set
-    if col != -1:  # Column of -1 indicates variable isn't included in data
-        var = np.array(pd.to_numeric(raw_data.iloc[:, col], errors='coerce'))  # force all misc strings into NaN
-    else:
-        var = np.zeros(data_size)
-        var[:] = np.nan
 
-    return var
+    (offset, multiplier, divisor) = _unit_conversion_factors(config_dict, var_type)
 
+    return np.array(((original_data + offset) * multiplier) / divisor)
 
-def _convert_units(config_dict, original_data, var_type):
-    """
-    Takes in 1d numpy array of original data, and then converts it to the appropriate units.
-    What actions are taken are dependent on what parameters were read in/stored into config_dict.
 
-    Sources:
-        https://www.wcc.nrcs.usda.gov/ftpref/wntsc/H&H/GEM/SolarRadConversion.pdf
-        https://cliflo-niwa.niwa.co.nz/pls/niwp/wh.do_help?id=ls_rad
-        FAO 56
+def _unit_conversion_factors(config_dict, var_type):
+    """
+    Looks up the conversion factors that take a variable type from the units specified in the config into metric.
 
     Args:
         config_dict: dictionary of all config file values
-        original_data: 1d numpy array of original values
         var_type: string indicating what data type has been passed, ex. 'temperature', 'precipitation'
 
     Returns:
-        converted_data: 1D numpy array of the converted values
+        offset: value added to the original data
+        multiplier: value the offset data is multiplied by
+        divisor: value the multiplied data is divided by
     """
 
-    converted_data = np.array(original_data)  # If we don't have to convert units then just return original data
-
     var_type = var_type.lower()
 
-    if var_type == 'temperature':
-        if config_dict['temperature_units'] == 0:  # Celsius
-            pass
-        elif config_dict['temperature_units'] == 1:  # Fahrenheit
-            converted_data = np.array(((original_data - 32.0) * (5.0 / 9.0)))
-        elif config_dict['temperature_units'] == 2:  # kelvin
-            converted_data = np.array(original_data - 273.15)
-        else:
-            raise ValueError('Incorrect parameters: TEMPERATURE_UNITS in config is not set up correctly.')
-
-    elif var_type == 'wind_speed':
-        if config_dict['wind_units'] == 0:  # m/s
-            pass
-        elif config_dict['wind_units'] == 1:  # mph
-            converted_data = np.array(original_data * 0.44704)
-        elif config_dict['wind_units'] == 2:  # kmh
-            converted_data = np.array(original_data * 0.27778)
-        elif config_dict['wind_units'] == 3:  # wind run, miles per day
-            converted_data = np.array((original_data * 1609.34) / 86400)  # miles to meters, day to seconds
-        elif config_dict['wind_units'] == 4:  # wind run, kilometers per day
-            converted_data = np.array((original_data * 1000) / 86400)  # kilometers to meters, day to seconds
-        else:
-            raise ValueError('Incorrect parameters: WIND_UNITS in config is not set up correctly.')
-
-    elif var_type == 'precipitation':
-        if config_dict['precipitation_units'] == 0:  # mm/day
-            pass
-        elif config_dict['precipitation_units'] == 1:  # meters/day
-            converted_data = np.array(original_data * 1000)
-        elif config_dict['precipitation_units'] == 2:  # inches/day
-            converted_data = np.array(original_data * 25.4)
-        else:
-            raise ValueError('Incorrect parameters: PRECIPITATION_UNITS in config is not set up correctly.')
-
-    elif var_type == 'solar_radiation':
-        if config_dict['solar_radiation_units'] == 0:  # w/m2
-            pass
-        elif config_dict['solar_radiation_units'] == 1:  # mj/m2
-            # convert MJ to J and divide by seconds in the day
-            converted_data = np.array((original_data * 1000000) / 86400)
-        elif config_dict['solar_radiation_units'] == 2:  # kw-hr/m2
-            # convert kw to w and divide by hours per day
-            converted_data = np.array((original_data * 1000) / 24)
-        elif config_dict['solar_radiation_units'] == 3:  # langleys
-            # equation from https://www.wcc.nrcs.usda.gov/ftpref/wntsc/H&H/GEM/SolarRadConversion.pdf
-            converted_data = np.array(original_data * 0.484583)
-        else:
-            raise ValueError('Incorrect parameters: SOLAR_RADIATION_UNITS in config is not set up correctly.')
-
-    elif var_type == 'vapor_pressure':
-        if config_dict['vapor_pressure_units'] == 0:  # kpa
-            pass
-        elif config_dict['vapor_pressure_units'] == 1:  # pa
-            converted_data = np.array(original_data / 1000)
-        elif config_dict['vapor_pressure_units'] == 2:  # torr or mmhg
-            converted_data = np.array(original_data * 0.133322)
-        elif config_dict['vapor_pressure_units'] == 3:  # millibars
-            converted_data = np.array(original_data * 0.1)
-        elif config_dict['vapor_pressure_units'] == 4:  # atmospheres
-            converted_data = np.array(original_data * 101.325)
-        else:
-            raise ValueError('Incorrect parameters: VAPOR_PRESSURE_UNITS in config is not set up correctly.')
-
-    elif var_type == 'relative_humidity':
-        if config_dict['relative_humidity_units'] == 0:  # percentage
-            pass
-        elif config_dict['relative_humidity_units'] == 1:  # decimal
-            converted_data = np.array(original_data * 100.0)
-        else:
-            raise ValueError('Incorrect parameters: RELATIVE_HUMIDITY_UNITS in config is not set up correctly.')
-
-    else:
+    if var_type not in UNIT_CONVERSIONS:
         # If an unsupported variable type is passed, raise a value error to point it out.
         raise ValueError('Unsupported variable type {} passed to convert_units function.'.format(var_type))
 
-    return converted_data
+    (unit_key, conversions) = UNIT_CONVERSIONS[var_type]
+    if config_dict[unit_key] not in conversions:
+        raise ValueError('Incorrect parameters: {} in config is not set up correctly.'.format(unit_key.upper()))
+
+    return conversions[config_dict[unit_key]]
 
 
-def _daily_realistic_limits(original_data, log_path, var_type):
+def _remove_isolated_observations(original_var):
     """
-        Applies a realistic limit to data to automatically catch and remove bad values that may have resulted
-        from sensor malfunctions, sensor degradation, etc. Caught values are replaced by a numpy nan. This function
-        assumes all variables are already in metric units
+        Finds any isolated observation, here defined as any observation that is surrounded by missing observations, and
+        sets them to nan. The first and last observations only have one neighbor, so they are removed if that neighbor
+        is missing.
+
+        While this is deleting likely valid data, it is an important step because data is evaluated visually using bokeh
+        plots, which will not display isolated points, we do not want possibly bad values to slip though.
+
+        The actual occurrence of an observation being surrounded by nans should be rare enough that this function has
+        little impact.
 
         Args:
-            original_data : 1D numpy array of original data from input file.
-            log_path : path of the log file that is used to track how the data is modified
-            var_type : string of text used to signify what type of data has been passed.
+            original_var : 1D numpy array of original variable data, or a 2D array of (days x variables) in which case
+                each column is filtered independently
 
         Returns:
-            limited_data : 1D numpy array of data after it has been checked for bad values.
+            processed_var : numpy array of variable(s) that have been filtered of all isolated observations.
     """
-    clip_value = np.nan
-    var_type = var_type.lower()
 
-    limited_data = np.array(original_data)
-    limited_data = limited_data.astype('float')  # np.nan is treated as a float so it needs to go into a float array
-
-    warnings.filterwarnings('ignore', 'invalid value encountered')  # catch invalid value warning for nans in data
-
-    if var_type in ['temperature']:
-        limited_data[original_data <= -50] = clip_value  # -50 C is -58 F
-        limited_data[original_data >= 60] = clip_value  # 60 C is 140 F
-    elif var_type == 'wind_speed':
-        limited_data[original_data < 0.1] = clip_value  # Negative wind speed is impossible
-        limited_data[original_data >= 35] = clip_value  # 35 m/s is a cat 1 hurricane
-    elif var_type == 'precipitation':
-        limited_data[original_data < 0] = clip_value  # Negative precipitation is impossible
-        limited_data[original_data >= 610] = clip_value  # 610 mm is 2 ft of rain a day
-    elif var_type == 'solar_radiation':
-        limited_data[original_data <= 5] = clip_value
-        limited_data[original_data >= 700] = clip_value
-    elif var_type == 'vapor_pressure':
-        limited_data[original_data <= 0] = clip_value  # Negative vapor pressure is impossible
-        limited_data[original_data >= 8] = clip_value
-    elif var_type == 'relative_humidity':
-        limited_data[original_data < 2] = clip_value
-        limited_data[original_data > 110] = clip_value  # avg relative humidity above 100% is unlikely even with drift
-    else:
-        # If an unsupported variable type is passed, raise a value error to point it out.
-        raise ValueError('Unsupported variable type {} passed to daily_realistic_limits function.'.format(var_type))
+    processed_var = np.array(original_var, dtype='float')
+    missing = np.isnan(processed_var)
+
+    # Shift the missing mask forwards and backwards by one day, anything beyond the ends of the record counts as missing
+    prev_missing = np.ones_like(missing)
+    prev_missing[1:] = missing[:-1]
+    next_missing = np.ones_like(missing)
+    next_missing[:-1] = missing[1:]
 
-    # Count how many values were changed by this procedure and then write that to the log file
-    mask = ~(np.isnan(original_data))  # create an inverse mask for when the original data has so they don't get counted
-    num_clipped_values = np.sum(limited_data[mask] != original_data[mask])  # Count the values that were clipped out
+    # Observations that are themselves missing are unaffected by this, as they are already nan
+    processed_var[prev_missing & next_missing] = np.nan
+
+    return processed_var
 
+
+def _process_station_matrix(config_dict, raw_data):
+    """
+        Extracts all weather variables from the raw data into a single matrix, with one column per variable, and then
+        processes them all at once. The variables are converted into the expected metric units and passed through a
+        filter to make sure there are no unrealistic values, isolated observations that will not display on bokeh plots
+        are removed, and finally days where tmax is equal to tmin are removed. How many values were removed by each
+        step is written to the log file.
+
+        Args:
+            config_dict : dictionary of all config file values, with columns indices matching those of raw_data
+            raw_data : 2D matrix of raw data pulled from input file specified in config file
+
+        Returns:
+            station_matrix : 2D numpy array of (days x variables), with variables in the order of STATION_VARIABLES
+    """
+
+    var_names = list(STATION_VARIABLES.keys())
+    var_types = [var_type for (col_key, var_type) in STATION_VARIABLES.values()]
+
+    # Extract variables, any variable that isn't included in the data (column of -1) is left as nan
+    station_matrix = np.full((raw_data.shape[0], len(var_names)), np.nan)
+    for (j, (col_key, var_type)) in enumerate(STATION_VARIABLES.values()):
+        if config_dict[col_key] != -1:
+            # force all misc strings into NaN
+            station_matrix[:, j] = pd.to_numeric(raw_data.iloc[:, config_dict[col_key]], errors='coerce')
+
+    # Convert all variables into metric units at once
+    (offsets, multipliers, divisors) = np.array([_unit_conversion_factors(config_dict, var_type)
+                                                 for var_type in var_types]).T
+    station_matrix += offsets
+    station_matrix *= multipliers
+    station_matrix /= divisors
+
+    # Remove values beyond realistic limits, nan values compare as false so they are not counted
+    (lower, lower_inclusive, upper, upper_inclusive) = np.array([REALISTIC_LIMITS[var_type]
+                                                                 for var_type in var_types]).T
+    with np.errstate(invalid='ignore'):
+        unrealistic = np.where(lower_inclusive.astype(bool), station_matrix <= lower, station_matrix < lower) | \
+            np.where(upper_inclusive.astype(bool), station_matrix >= upper, station_matrix > upper)
+    station_matrix[unrealistic] = np.nan
+    num_unrealistic = unrealistic.sum(axis=0)
+
+    station_matrix = _remove_isolated_observations(station_matrix)
+
+    # HPRCC data reports '0' for missing observations as well as a text column, but this script doesn't interpret text
+    # columns, so instead we see if both tmax and tmin have the same value (0, or -17.7778 depending on units) and if so
+    # mark that row as missing
+    # realistically tmax should never equal tmin, so this is an okay check to have in general
+    equal_temperatures = station_matrix[:, var_names.index('tmax')] == station_matrix[:, var_names.index('tmin')]
+    station_matrix[equal_temperatures, :] = np.nan
+
+    # Write one combined entry to the log file of how many values were removed
+    limits_summary = ''.join(['    %s: %s \n' % (var_names[j], num_unrealistic[j]) for j in range(len(var_names))])
     log.basicConfig()
-    # Reopen log file to append corrections, then close it.
-    corr_log = open(log_path, 'a')
-    corr_log.write('%s %s values were removed for exceeding realistic limits. \n' % (num_clipped_values, var_type))
+    corr_log = open(config_dict['log_file_path'], 'a')
+    corr_log.write('The following number of values were removed for exceeding realistic limits: \n%s'
+                   '%s days were removed for having identical maximum and minimum temperatures. \n \n' %
+                   (limits_summary, np.sum(equal_temperatures)))
     corr_log.close()
 
-    warnings.resetwarnings()  # reset warning filter to default
-    return limited_data  # Return the limited data
+    return station_matrix
 
 
-def _remove_isolated_observations(original_var):
+def _project_columns(config_dict):
     """
-        Iterates through provided variable and tries to find any isolated observation, here defined as any observation
-        that is surrounded by missing observations, and sets them to nan.
+        Determines which columns of the data file are actually referenced by the config file, so that only those
+        columns are parsed, and where each of them will be located in the projected (reduced) dataframe.
 
-        While this is deleting likely valid data, it is an important step because data is evaluated visually using bokeh
-        plots, which will not display isolated points, we do not want possibly bad values to slip though.
+        Args:
+            config_dict : dictionary of all config file values
 
-        The actual occurrence of an observation being surrounded by nans should be rare enough that this function has
-        little impact.
+        Returns:
+            used_cols : sorted list of the column indices in the data file that need to be read
+            column_lookup : dictionary of the config column keys and their indices within the projected dataframe
+    """
+    col_keys = VARIABLE_COL_KEYS + DATE_COL_KEYS.get(config_dict['date_format'], [])
+    used_cols = sorted(set(config_dict[key] for key in col_keys if config_dict[key] != -1))
+
+    # Readers return projected columns in file order, so a column's new index is its rank among the used columns
+    column_lookup = {key: (used_cols.index(config_dict[key]) if config_dict[key] in used_cols else -1)
+                     for key in VARIABLE_COL_KEYS + sum(DATE_COL_KEYS.values(), [])}
+
+    return used_cols, column_lookup
+
+
+def _read_delimited_file(config_dict, delimiter, usecols=None):
+    """
+        Reads a delimited text file into a dataframe using the pandas C parsing engine. The C engine does not support
+        skipfooter, so any footer is trimmed beforehand by scanning the tail of the file for where it starts. Missing
+        data flags, including network-specific ones, are converted to nan while parsing.
+
+        If the C engine is unable to parse the file (ex. ragged rows in the header) it falls back on the python engine.
 
         Args:
-            original_var : 1D numpy array of original variable data
+            config_dict : dictionary of all config file values
+            delimiter : string of the delimiter used in the file
+            usecols : optional list of column indices to parse, if None all columns are parsed
 
         Returns:
-            processed_var : 1D numpy array of variable that has been filtered of all isolated observations.
-    """
-
-    data_size = original_var.shape[0]  # number of rows in data
-    processed_var = np.empty(data_size) * np.nan
-
-    for i in range(data_size):
-        if i == 0 or i == (data_size - 1):  # Special handling for first and last index
-            if i == 0:  # First index
-                if np.isnan(original_var[i + 1]):
-                    # Very first observation is followed by a nan, remove it
-                    pass
-                else:
-                    # First observation is not followed by a nan
-                    processed_var[i] = original_var[i]
-            else:  # last index
-                if np.isnan(original_var[i - 1]):
-                    # Very last observation is preceded by a nan, remove it
-                    pass
-                else:
-                    # Last observation is not preceded by a nan
-                    processed_var[i] = original_var[i]
-
-        elif np.isnan(original_var[i - 1]) and np.isnan(original_var[i + 1]) and not np.isnan(original_var[i]):
-            # Observation is surrounded by nans, remove it.
-            pass
-        else:
-            # Either observation is valid and not surrounded by nans or is itself a nan.
-            processed_var[i] = original_var[i]
+            raw_data : pandas dataframe of the file contents
+    """
+    file_path = config_dict['data_file_path']
+    read_kwargs = dict(delimiter=delimiter, header=config_dict['lines_of_header'], index_col=None,
+                       usecols=usecols, na_values=[config_dict['missing_input_value']] + NETWORK_NA_VALUES,
+                       keep_default_na=True, na_filter=True, skip_blank_lines=True)
 
-    return processed_var
+    try:
+        # Only pass the C engine the bytes that precede the footer
+        footer_start = find_footer_start(file_path, config_dict['lines_of_footer'])
+        with open_truncated(file_path, footer_start) as data_source:
+            raw_data = pd.read_csv(data_source, engine='c', low_memory=False, **read_kwargs)
+
+    except (pd.errors.ParserError, UnicodeDecodeError):
+        print('\nSystem: The fast parser was unable to read the data file, retrying with the python parsing engine.')
+        raw_data = pd.read_csv(file_path, engine='python', skipfooter=config_dict['lines_of_footer'], **read_kwargs)
 
+    return raw_data
 
-def _process_variable(config_dict, raw_data, var_name):
+
+def _excel_cell_value(value):
     """
-        Combines the functions extract_var, convert_units, and daily_realistic_limits to increase readability. First,
-        the function extracts individual variables from the raw data, then converts them into the expected metric units,
-        sends them through a pass through filter to make sure there are no unrealistic values, and finally filters them
-        again to remove all isolated observations that will not display on bokeh plots.
+        Converts a cell value streamed from openpyxl to what pandas' own openpyxl reader would produce for it, so that
+        both Excel read paths parse identically.
+
+        Args:
+            value : value of the cell as returned by openpyxl, None for empty cells
+
+        Returns:
+            value : the converted cell value
+    """
+    if value is None:
+        return ''
+    elif isinstance(value, float):
+        return int(value) if value.is_integer() else value
+    elif isinstance(value, str) and value in ERROR_CODES:
+        return np.nan
+    return value
+
+
+def _read_excel_file(file_path, header=0, footer=0, usecols=None, index_col=None, na_values=None):
+    """
+        Reads the first sheet of an .xlsx workbook into a dataframe, with the same header, footer, column and missing
+        data handling as pd.read_excel. The calamine engine is used if it is available, otherwise the sheet is
+        streamed with openpyxl in read-only mode, which never loads the whole workbook into memory, and only the range
+        of columns that contains usecols is converted.
+
+        Args:
+            file_path : string of the path to the workbook
+            header : row number to use as the column names, None if there is no header
+            footer : number of rows at the end of the sheet to skip
+            usecols : optional list of column indices to parse, if None all columns are parsed
+            index_col : optional column index to use as the row labels of the dataframe
+            na_values : optional list of additional strings to recognize as missing data
+
+        Returns:
+            excel_data : pandas dataframe of the sheet contents
+    """
+    read_kwargs = dict(header=header, index_col=index_col, usecols=usecols, skipfooter=footer, na_values=na_values,
+                       keep_default_na=True, na_filter=True)
+
+    if EXCEL_CALAMINE_AVAILABLE:
+        return pd.read_excel(file_path, sheet_name=0, engine='calamine', **read_kwargs)
+
+    # Only the range of columns that contains usecols is converted, usecols are shifted to index into that range
+    if usecols is None:
+        col_range = slice(None)
+    else:
+        col_range = slice(min(usecols), max(usecols) + 1)
+        read_kwargs['usecols'] = [col - col_range.start for col in usecols]
+
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
+    try:
+        sheet = workbook.worksheets[0]
+        sheet.reset_dimensions()  # some writers record incorrect dimensions, which read-only mode would trust
+
+        sheet_rows = []
+        last_row_with_data = -1
+        for row in sheet.iter_rows(values_only=True):
+            # Whether a row is empty depends on all of its cells, as a footer may be outside of the converted range
+            if any(value is not None and value != '' for value in row):
+                last_row_with_data = len(sheet_rows)
+            converted_row = [_excel_cell_value(value) for value in row[col_range]]
+            while converted_row and converted_row[-1] == '':
+                converted_row.pop()  # trim trailing empty cells
+            sheet_rows.append(converted_row)
+    finally:
+        workbook.close()
+
+    # Trim trailing empty rows and pad the rest to a common width
+    sheet_rows = sheet_rows[:last_row_with_data + 1]
+    if sheet_rows:
+        sheet_width = max(len(row) for row in sheet_rows)
+        if usecols is not None:
+            sheet_width = max(sheet_width, col_range.stop - col_range.start)
+        sheet_rows = [row + [''] * (sheet_width - len(row)) for row in sheet_rows]
+
+    # Parse the rows the same way pd.read_excel does
+    parser = TextParser(sheet_rows, skip_blank_lines=False, **read_kwargs)
+    try:
+        excel_data = parser.read()
+    finally:
+        parser.close()
+
+    return excel_data
+
+
+def _aggregate_subdaily_file(config_dict, delimiter, used_cols, column_lookup, chunksize=100000):
+    """
+        Streams a sub-daily (ex. 15 minute or hourly) delimited logger file in chunks and aggregates it into daily
+        values, so memory use depends on the length of the record in days rather than the number of observations.
+        Timestamps are treated as the end of each interval, so an observation at midnight belongs to the previous day.
+
+        Each variable is aggregated according to SUBDAILY_AGGREGATION. Days where the fraction of expected observations
+        of a variable is below DAILY_COMPLETENESS_THRESHOLD are set to nan for that variable.
 
         Args:
             config_dict : dictionary of all config file values
-            raw_data : 2D matrix of raw data pulled from input file specified in config file
-            var_name : string of text used to signify what variable has been requested.
+            delimiter : string of the delimiter used in the file
+            used_cols : list of the column indices in the data file that need to be read
+            column_lookup : dictionary of config column keys and their indices within the projected columns
+
+        Returns:
+            daily_data : pandas dataframe of daily values, with the date in the first column and then one column for
+                each provided variable
+            daily_lookup : dictionary of config column keys and their indices within daily_data
+    """
+    timestep = config_dict['data_timestep_minutes']
+    if timestep <= 0 or 1440 % timestep != 0:
+        raise ValueError('\n\nDATA_TIMESTEP_MINUTES was set to {}, but it must evenly divide a day (1440 minutes).'
+                         .format(timestep))
+    if config_dict['date_format'] != 1 or column_lookup['string_date_col'] == -1:
+        raise ValueError('\n\nSub-daily data requires a timestamp column, DATE_FORMAT must be 1 and STRING_DATE_COL '
+                         'must be provided.')
+    intervals_per_day = 1440 // timestep
+
+    provided_vars = {var_name: column_lookup[col_key] for (var_name, (col_key, _)) in STATION_VARIABLES.items()
+                     if column_lookup[col_key] != -1}
+
+    # Accumulate the count, sum, max, and min of each variable for every day in each chunk, the partial results of a
+    # day that is split between two chunks are combined afterwards
+    partial_stats = []
+    footer_start = find_footer_start(config_dict['data_file_path'], config_dict['lines_of_footer'])
+    with open_truncated(config_dict['data_file_path'], footer_start) as data_source:
+        chunk_reader = pd.read_csv(data_source, delimiter=delimiter, header=config_dict['lines_of_header'],
+                                   index_col=None, usecols=used_cols, engine='c', chunksize=chunksize,
+                                   na_values=[config_dict['missing_input_value']] + NETWORK_NA_VALUES,
+                                   keep_default_na=True, na_filter=True, skip_blank_lines=True)
+        for chunk in chunk_reader:
+            interval_end = pd.to_datetime(chunk.iloc[:, column_lookup['string_date_col']], errors='raise')
+            chunk_day = (interval_end - pd.Timedelta(minutes=timestep)).dt.normalize().to_numpy()
+            chunk_values = pd.DataFrame({var_name: pd.to_numeric(chunk.iloc[:, col], errors='coerce').to_numpy()
+                                         for (var_name, col) in provided_vars.items()})
+            grouped = chunk_values.groupby(chunk_day)
+            partial_stats.append(pd.concat({'count': grouped.count(), 'sum': grouped.sum(), 'max': grouped.max(),
+                                            'min': grouped.min()}, axis=1))
+
+    partial_stats = pd.concat(partial_stats)
+    daily_count = partial_stats['count'].groupby(level=0).sum()
+    daily_sum = partial_stats['sum'].groupby(level=0).sum()
+    daily_max = partial_stats['max'].groupby(level=0).max()
+    daily_min = partial_stats['min'].groupby(level=0).min()
+    daily_mean = daily_sum / daily_count
+
+    complete = (daily_count / intervals_per_day) >= config_dict['daily_completeness']
+
+    daily_data = pd.DataFrame({'date': daily_count.index})
+    daily_lookup = {key: -1 for key in column_lookup}
+    daily_lookup['string_date_col'] = 0
+    for (j, var_name) in enumerate(provided_vars):
+        method = SUBDAILY_AGGREGATION[var_name]
+        if method == 'integral':
+            unit_key = UNIT_CONVERSIONS[STATION_VARIABLES[var_name][1]][0]
+            method = 'total' if config_dict[unit_key] in SUBDAILY_TOTAL_UNITS[unit_key] else 'mean'
+
+        if method == 'max':
+            daily_var = daily_max[var_name]
+        elif method == 'min':
+            daily_var = daily_min[var_name]
+        elif method == 'mean':
+            daily_var = daily_mean[var_name]
+        elif method == 'total':
+            daily_var = daily_mean[var_name] * intervals_per_day  # scaled up to a full day if some are missing
+        else:
+            daily_var = daily_sum[var_name]
+
+        daily_data[var_name] = daily_var.where(complete[var_name]).to_numpy()
+        daily_lookup[STATION_VARIABLES[var_name][0]] = j + 1
+
+    num_incomplete = int(((daily_count > 0) & ~complete).to_numpy().sum())
+
+    log.basicConfig()
+    corr_log = open(config_dict['log_file_path'], 'a')
+    corr_log.write('Sub-daily data at a %s minute timestep was aggregated into %s days. %s daily values were removed '
+                   'for having less than %s percent of their expected observations. \n \n' %
+                   (timestep, daily_data.shape[0], num_incomplete, config_dict['daily_completeness'] * 100))
+    corr_log.close()
+
+    return daily_data, daily_lookup
+
+
+def _input_cache_key(config_dict):
+    """
+        Creates the key used to identify a processed data file in the input cache. The key is a hash of the contents
+        of the data file combined with every config value that affects how it is processed, so any change to either
+        results in a new key.
+
+        Args:
+            config_dict : dictionary of all config file values, including the path keys added by _obtain_data
 
         Returns:
-            processed_var : 1D numpy array of variable that has been extracted, converted, and filtered
-            var_col : column of pulled variable, used to track what is provided and what is calculated
-    """
-
-    var_name = var_name.lower()
-
-    if var_name == 'maximum_temperature':
-        var_col = config_dict['tmax_col']
-        var_type = 'temperature'
-    elif var_name == 'minimum_temperature':
-        var_col = config_dict['tmin_col']
-        var_type = 'temperature'
-    elif var_name == 'average_temperature':
-        var_col = config_dict['tavg_col']
-        var_type = 'temperature'
-    elif var_name == 'dewpoint_temperature':
-        var_col = config_dict['tdew_col']
-        var_type = 'temperature'
-    elif var_name == 'maximum_relative_humidity':
-        var_col = config_dict['rhmax_col']
-        var_type = 'relative_humidity'
-    elif var_name == 'minimum_relative_humidity':
-        var_col = config_dict['rhmin_col']
-        var_type = 'relative_humidity'
-    elif var_name == 'average_relative_humidity':
-        var_col = config_dict['rhavg_col']
-        var_type = 'relative_humidity'
-    elif var_name == 'vapor_pressure':
-        var_col = config_dict['ea_col']
-        var_type = 'vapor_pressure'
-    elif var_name == 'wind_speed':
-        var_col = config_dict['uz_col']
-        var_type = 'wind_speed'
-    elif var_name == 'precipitation':
-        var_col = config_dict['pp_col']
-        var_type = 'precipitation'
-    elif var_name == 'solar_radiation':
-        var_col = config_dict['rs_col']
-        var_type = 'solar_radiation'
+            cache_key : string of the hexadecimal hash for this data file and config
+    """
+    file_hash = hashlib.sha256()
+    with open(config_dict['data_file_path'], 'rb') as data_file:
+        for block in iter(lambda: data_file.read(1048576), b''):
+            file_hash.update(block)
+
+    cache_fields = {key: config_dict[key] for key in INPUT_CACHE_CONFIG_KEYS}
+    cache_fields['cache_version'] = INPUT_CACHE_VERSION
+    file_hash.update(json.dumps(cache_fields, sort_keys=True).encode('utf-8'))
+
+    return file_hash.hexdigest()
+
+
+def _save_cached_input(cache_path, data_df, col_ser, ingest_log, missing_dates, cache_size_mb):
+    """
+        Saves a processed data file into the input cache as an uncompressed .npz archive of its columns, and then
+        evicts the least recently used entries of the cache until it is within its size limit.
+
+        Args:
+            cache_path : string of path to save the cache entry at
+            data_df : pandas dataframe of processed data, as returned by _parse_data_file
+            col_ser : pandas series of variable columns, as returned by _parse_data_file
+            ingest_log : string of the log entries written while the data file was processed
+            missing_dates : number of dates that were missing from the time record of the data file
+            cache_size_mb : size limit of the input cache folder in megabytes
+
+        Returns:
+            None
+    """
+    cache_arrays = {'data_' + col: data_df[col].to_numpy() for col in data_df.columns}
+    cache_arrays['data_columns'] = np.array(data_df.columns, dtype=str)
+    cache_arrays['start_date'] = np.array(data_df.index[0].strftime('%Y-%m-%d'))
+    cache_arrays['col_names'] = np.array(col_ser.index, dtype=str)
+    cache_arrays['col_values'] = col_ser.to_numpy()
+    cache_arrays['ingest_log'] = np.array(ingest_log)
+    cache_arrays['missing_dates'] = np.array(missing_dates)
+
+    # Write to a temporary file first so an interrupted run can't leave behind a partial entry
+    with open(cache_path + '.tmp', 'wb') as cache_file:
+        np.savez(cache_file, **cache_arrays)
+    os.replace(cache_path + '.tmp', cache_path)
+
+    # Evict least recently used entries, newest entries are kept first and the one just written is always kept
+    cache_folder = os.path.dirname(cache_path)
+    cache_entries = [os.path.join(cache_folder, entry) for entry in os.listdir(cache_folder) if entry.endswith('.npz')]
+    cache_entries.sort(key=os.path.getmtime, reverse=True)
+    cache_size = 0
+    for entry in cache_entries:
+        cache_size += os.path.getsize(entry)
+        if cache_size > cache_size_mb * 1048576 and entry != cache_path:
+            os.remove(entry)
+
+
+def _load_cached_input(cache_path):
+    """
+        Loads a processed data file from the input cache. The entry is marked as recently used so it is the last to be
+        evicted. If the entry cannot be read it is removed and None is returned, so the data file is parsed instead.
+
+        Args:
+            cache_path : string of path to the cache entry
+
+        Returns:
+            data_df : pandas dataframe of processed data
+            col_ser : pandas series of what variables are stored in what columns
+            ingest_log : string of the log entries written when the data file was originally processed
+            missing_dates : number of dates that were missing from the time record of the data file
+    """
+    try:
+        with np.load(cache_path, allow_pickle=False) as cache_arrays:
+            data_columns = list(cache_arrays['data_columns'])
+            data = {col: cache_arrays['data_' + col] for col in data_columns}
+            data_index = pd.date_range(str(cache_arrays['start_date']), periods=data[data_columns[0]].size)
+            data_df = pd.DataFrame(data, index=data_index)
+            col_ser = pd.Series(cache_arrays['col_values'], index=list(cache_arrays['col_names']))
+            ingest_log = str(cache_arrays['ingest_log'])
+            missing_dates = int(cache_arrays['missing_dates'])
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+        os.remove(cache_path)
+        return None
+
+    os.utime(cache_path)  # update modification time, which is used to track how recently an entry was used
+    return data_df, col_ser, ingest_log, missing_dates
+
+
+def _parse_data_file(config_dict):
+    """
+        Reads the data file specified in config_dict and extracts all weather variables from it. Each variable is
+        converted into metric units and filtered for unrealistic and isolated values, and then the record is reindexed
+        to cover any gaps in its dates and remove any duplicated days.
+
+        Args:
+            config_dict : dictionary of all config file values, including the path keys added by _obtain_data
+
+        Returns:
+            data_df : pandas dataframe of entire dataset, with the variables being organized into columns
+            col_ser : pandas series of what variables are stored in what columns, used to track which vars are provided
+            missing_dates : number of dates that were missing from the time record of the data file
+    """
+    station_extension = config_dict['station_extension']
+
+    # Only the columns referenced in the config file are parsed, wide logger exports can contain 100+ columns
+    (used_cols, column_lookup) = _project_columns(config_dict)
+
+    # Open data file
+    if config_dict['data_timestep_minutes'] != 1440:
+        # Sub-daily logger data is streamed in chunks and aggregated into daily values as it is read
+        if station_extension in ['.xlsx', '.xls']:
+            raise ValueError('\n\nSub-daily data (DATA_TIMESTEP_MINUTES less than 1440) can only be read from '
+                             'delimited text files, not \'{}\' files.'.format(station_extension))
+        elif station_extension == '.csv':
+            file_delim = ','
+        else:
+            file_delim = determine_delimiter(config_dict['data_file_path'])
+        (raw_data, column_lookup) = _aggregate_subdaily_file(config_dict, file_delim, used_cols, column_lookup)
+
+    elif station_extension == '.csv':
+        raw_data = _read_delimited_file(config_dict, ',', used_cols)
+
+    elif station_extension == '.xlsx':
+        raw_data = _read_excel_file(config_dict['data_file_path'], header=config_dict['lines_of_header'],
+                                    footer=config_dict['lines_of_footer'], usecols=used_cols,
+                                    na_values=[config_dict['missing_input_value']] + NETWORK_NA_VALUES)
+
+    elif station_extension == '.xls':
+        raw_data = pd.read_excel(config_dict['data_file_path'], sheet_name=0, header=config_dict['lines_of_header'],
+                                 index_col=None, usecols=used_cols, engine='xlrd',
+                                 skipfooter=config_dict['lines_of_footer'],
+                                 na_values=[config_dict['missing_input_value']] + NETWORK_NA_VALUES,
+                                 keep_default_na=True, na_filter=True)
     else:
-        # If an unsupported variable type is passed, raise a value error to point it out.
-        raise ValueError('Unsupported variable type {} passed to _process_variable function.'.format(var_name))
+        # a delimited file of some kind was passed, attempt to parse it
+        file_delim = determine_delimiter(config_dict['data_file_path'])
+        raw_data = _read_delimited_file(config_dict, file_delim, used_cols)
+
+    print('\nSystem: Successfully opened data file at %s' % config_dict['data_file_path'])
+
+    # Column indices in the config refer to the full file, remap them to where they are in the projected dataframe
+    projected_config = {**config_dict, **column_lookup}
+
+    # Date handling, figures out the date format and extracts from string if needed
+    if config_dict['date_format'] == 1:
+        # Date is provided as a string, expected format is MM/DD/YYYY, time can be included as well.
+        if projected_config['string_date_col'] != -1:
+            data_date = np.array(raw_data.iloc[:, projected_config['string_date_col']])
+            data_dates = np.asarray(pd.to_datetime(data_date, errors='raise')).astype('datetime64[D]')
+        else:
+            # date format was provided as a string date but no string date was given
+            raise ValueError('Date format parameter indicated a string date but none was provided')
+
+    elif config_dict['date_format'] == 2:
+
+        if projected_config['month_col'] != -1 and projected_config['day_col'] != -1 and \
+                projected_config['year_col'] != -1:
+            data_month = np.array(raw_data.iloc[:, projected_config['month_col']].astype('int'))
+            data_day = np.array(raw_data.iloc[:, projected_config['day_col']].astype('int'))
+            data_year = np.array(raw_data.iloc[:, projected_config['year_col']].astype('int'))
+        else:
+            # date format was provided as separate columns but some were missing
+            raise ValueError('Date format parameter indicated separate Y/M/D columns but some or all were missing.')
 
-    original_var = _extract_variable(raw_data, var_col)  # Will either return data or an array of nans of expected size
-    converted_var = _convert_units(config_dict, original_var, var_type)  # converts data to appropriate units
-    filtered_var = _daily_realistic_limits(converted_var, config_dict['log_file_path'], var_type)  # removed bad vals
-    processed_var = _remove_isolated_observations(filtered_var)  # returns data with no isolated observations
+        data_dates = dates_from_ymd(data_year, data_month, data_day)
 
-    return processed_var, var_col
+    elif config_dict['date_format'] == 3:
+        # Date is pre-split between year column and DOY column
+
+        if projected_config['day_of_year_col'] != -1 and projected_config['year_col'] != -1:
+            data_doy = np.array(raw_data.iloc[:, projected_config['day_of_year_col']].astype('int'))
+            data_year = np.array(raw_data.iloc[:, projected_config['year_col']].astype('int'))
+        else:
+            # date format was provided as separate year and doy columns but some were missing
+            raise ValueError('Date format parameter indicated year and DOY columns but some or all were missing.')
+
+        data_dates = dates_from_year_doy(data_year, data_doy)
+
+    else:
+        # Script cannot function without a time variable
+        raise ValueError('Parameter error: date_format is set to an unexpected value.')
+
+    #########################
+    # Variable processing
+    # Imports all weather variables, converts them into the correct units, and filters them to remove impossible values
+
+    station_matrix = _process_station_matrix(projected_config, raw_data)
+
+    #########################
+    # Dataframe Construction
+    # Rows are placed onto a continuous daily record to accomplish several goals:
+    # 1. Cover literal gaps in the dataset (not just missing values) with nan rows
+    # 2. Remove any duplicate records (same day appears twice in dataset, first instance is kept since it cannot be
+    #    determined which value is true)
+    # 3. Cleanly pass extracted data to the main script function
+    (daily_dates, daily_matrix, missing_dates) = reindex_daily(data_dates, station_matrix)
+
+    logger = open(config_dict['log_file_path'], 'a')
+    logger.write('The raw data file had %s missing date entries from its time record. \n \n' % missing_dates)
+    logger.close()
+
+    print('\nSystem: The input data file had %s missing dates in its time record.' % missing_dates)
+
+    # Create dataframe of data, the M/D/Y columns come from the reindexed dates so there are no missing days
+    (data_year, data_month, data_day, _) = split_dates(daily_dates)
+    station_data = {var_name: daily_matrix[:, j] for (j, var_name) in enumerate(STATION_VARIABLES.keys())}
+    data_df = pd.DataFrame({'year': data_year, 'month': data_month,
+                            'day': data_day, 'tavg': station_data['tavg'], 'tmax': station_data['tmax'],
+                            'tmin': station_data['tmin'], 'tdew': station_data['tdew'], 'ea': station_data['ea'],
+                            'rhavg': station_data['rhavg'], 'rhmax': station_data['rhmax'],
+                            'rhmin': station_data['rhmin'], 'rs': station_data['rs'], 'ws': station_data['ws'],
+                            'precip': station_data['precip']},
+                           index=pd.date_range(str(daily_dates[0]), periods=daily_dates.size))
+
+    # Create dataframe of column indices for weather variable, to track which ones were provided vs calculated
+    # Indices are those of the original data file, not the projected dataframe
+    col_ser = pd.Series({var_name: config_dict[col_key] for (var_name, (col_key, _)) in STATION_VARIABLES.items()})
+
+    return data_df, col_ser, missing_dates
 
 
 def _obtain_data(config_file_path, metadata_file_path=None):
@@ -383,6 +826,9 @@ def _obtain_data(config_file_path, metadata_file_path=None):
         If a metadata file is provided, the config file will still be used for data organization, but the metadata will
         be pulled from the metadata file.
 
+        Station archives are memory-mapped rather than parsed, and the mapped row of each variable, which the columns
+        of data_df are views of, is kept in config_dict['station_archive_data'] so the archive is not mapped again.
+
         Args:
             config_file_path : string of path to config file, should work with absolute or relative path
             metadata_file_path : string of path to metadata file if provided
@@ -409,8 +855,7 @@ def _obtain_data(config_file_path, metadata_file_path=None):
     if metadata_file_path is not None:
 
         validate_file(metadata_file_path, 'xlsx')  # Validate file to make sure it exists and is the right type
-        metadata_df = pd.read_excel(metadata_file_path, sheet_name=0, index_col=0, engine='openpyxl',
-                                    keep_default_na=True, na_filter=True)
+        metadata_df = _read_excel_file(metadata_file_path, index_col=0)
         print('\nSystem: Successfully opened metadata file at %s' % metadata_file_path)
 
         # Pull out the metadata for the next file to process
@@ -474,38 +919,6 @@ def _obtain_data(config_file_path, metadata_file_path=None):
     else:
         config_dict['lines_of_header'] = config_dict['lines_of_header'] - 1
 
-    # Open data file
-    if station_extension == '.csv':
-        raw_data = pd.read_csv(config_dict['data_file_path'], delimiter=',', header=config_dict['lines_of_header'],
-                               index_col=None, engine='python', skipfooter=config_dict['lines_of_footer'],
-                               na_values=config_dict['missing_input_value'], keep_default_na=True,
-                               na_filter=True, skip_blank_lines=True)
-
-    elif station_extension == '.xlsx':
-        raw_data = pd.read_excel(config_dict['data_file_path'], sheet_name=0, header=config_dict['lines_of_header'],
-                                 index_col=None, engine='openpyxl', skipfooter=config_dict['lines_of_footer'],
-                                 na_values=config_dict['missing_input_value'], keep_default_na=True,
-                                 na_filter=True)
-
-    elif station_extension == '.xls':
-        raw_data = pd.read_excel(config_dict['data_file_path'], sheet_name=0, header=config_dict['lines_of_header'],
-                                 index_col=None, engine='xlrd', skipfooter=config_dict['lines_of_footer'],
-                                 na_values=config_dict['missing_input_value'], keep_default_na=True,
-                                 na_filter=True)
-    else:
-        # a delimited file of some kind was passed, attempt to parse it
-        file_delim = determine_delimiter(config_dict['data_file_path'])
-        raw_data = pd.read_csv(config_dict['data_file_path'], delimiter=file_delim,
-                               header=config_dict['lines_of_header'], index_col=None, engine='python',
-                               skipfooter=config_dict['lines_of_footer'], na_values=config_dict['missing_input_value'],
-                               keep_default_na=True, na_filter=True, skip_blank_lines=True)
-
-
-    print('\nSystem: Successfully opened data file at %s' % config_dict['data_file_path'])
-
-    # Handle any for network-specific oddities that may have slipped through
-    raw_data = raw_data.replace(to_replace='NO RECORD   ', value=np.nan)  # catch for whitespaces on agriment
-
     # check for the existence of 'correction_files' folder and if not present make one
     if not os.path.exists(folder_path + '/correction_files'):
         os.makedirs(folder_path + '/correction_files')
@@ -517,6 +930,10 @@ def _obtain_data(config_file_path, metadata_file_path=None):
     else:
         pass
 
+    # The input cache folder was added later than the others, so check for it separately
+    if not os.path.exists(folder_path + '/correction_files/input_cache'):
+        os.makedirs(folder_path + '/correction_files/input_cache/')
+
     # Create log file for this new data file
     config_dict['log_file_path'] = config_dict['folder_path'] + \
         '/correction_files/log_files/' + config_dict['station_name'] + '_changes_log' + '.txt'
@@ -527,132 +944,116 @@ def _obtain_data(config_file_path, metadata_file_path=None):
     logger.close()
     print('\nSystem: Successfully created log file at %s.' % config_dict['log_file_path'])
 
-    # Date handling, figures out the date format and extracts from string if needed
-    if config_dict['date_format'] == 1:
-        # Date is provided as a string, expected format is MM/DD/YYYY, time can be included as well.
-        if config_dict['string_date_col'] != -1:
-            data_date = np.array(raw_data.iloc[:, config_dict['string_date_col']])
-            dt_date = pd.to_datetime(data_date, errors='raise')
-            data_day = np.array(dt_date.day.astype('int'))
-            data_month = np.array(dt_date.month.astype('int'))
-            data_year = np.array(dt_date.year.astype('int'))
-        else:
-            # date format was provided as a string date but no string date was given
-            raise ValueError('Date format parameter indicated a string date but none was provided')
-
-    elif config_dict['date_format'] == 2:
-
-        if config_dict['month_col'] != -1 and config_dict['day_col'] != -1 and config_dict['year_col'] != -1:
-            data_month = np.array(raw_data.iloc[:, config_dict['month_col']].astype('int'))
-            data_day = np.array(raw_data.iloc[:, config_dict['day_col']].astype('int'))
-            data_year = np.array(raw_data.iloc[:, config_dict['year_col']].astype('int'))
-        else:
-            # date format was provided as separate columns but some were missing
-            raise ValueError('Date format parameter indicated separate Y/M/D columns but some or all were missing.')
-
-    elif config_dict['date_format'] == 3:
-        # Date is pre-split between year column and DOY column
-
-        if config_dict['day_of_year_col'] != -1 and config_dict['year_col'] != -1:
-            data_doy = np.array(raw_data.iloc[:, config_dict['day_of_year_col']].astype('int'))
-            data_year = np.array(raw_data.iloc[:, config_dict['year_col']].astype('int'))
-        else:
-            # date format was provided as separate year and doy columns but some were missing
-            raise ValueError('Date format parameter indicated year and DOY columns but some or all were missing.')
-
-        dt_date = pd.to_datetime(data_year * 1000 + data_doy, format='%Y%j', errors='raise')
-        data_day = np.array(dt_date.day.astype('int'))
-        data_month = np.array(dt_date.month.astype('int'))
-        data_year = np.array(dt_date.year.astype('int'))
-
+    if station_extension == ARCHIVE_EXTENSION:
+        # Station archives have already been processed, so they are memory-mapped instead of being parsed or cached
+        (station_data, archive_header) = read_station_archive(config_dict['data_file_path'])
+        (data_df, col_ser) = archive_to_dataframe(station_data, archive_header)
+        config_dict['station_archive_data'] = {var: station_data[j]
+                                               for (j, var) in enumerate(archive_header['variables'])}
+
+        if metadata_file_path is None:  # a metadata file takes priority over the station metadata stored in the archive
+            config_dict['station_latitude'] = archive_header['latitude']
+            config_dict['station_longitude'] = archive_header['longitude']
+            config_dict['station_elevation'] = archive_header['elevation']
+            config_dict['anemometer_height'] = archive_header['anemometer_height']
+
+        logger = open(config_dict['log_file_path'], 'a')
+        logger.write('Data was loaded from a station archive that had been previously processed. \n \n')
+        logger.close()
+        print('\nSystem: Successfully opened station archive at %s' % config_dict['data_file_path'])
+
+        return data_df, col_ser, metadata_df, metadata_series, config_dict
+
+    # Check for a cached copy of this data file that was processed with the same config values, and if none is found
+    # parse the data file and save the result for next time
+    cache_path = None
+    if config_dict['input_cache_size_mb'] > 0:
+        cache_path = folder_path + '/correction_files/input_cache/' + _input_cache_key(config_dict) + '.npz'
+
+    cached_input = None
+    if cache_path is not None and os.path.isfile(cache_path):
+        cached_input = _load_cached_input(cache_path)
+
+    if cached_input is not None:
+        (data_df, col_ser, ingest_log, missing_dates) = cached_input
+
+        logger = open(config_dict['log_file_path'], 'a')
+        logger.write(ingest_log)
+        logger.close()
+
+        print('\nSystem: Loaded the previously processed data file from the input cache at %s' % cache_path)
+        print('\nSystem: The input data file had %s missing dates in its time record.' % missing_dates)
     else:
-        # Script cannot function without a time variable
-        raise ValueError('Parameter error: date_format is set to an unexpected value.')
-
-    #########################
-    # Variable processing
-    # Imports all weather variables, converts them into the correct units, and filters them to remove impossible values
-
-    (data_tmax, tmax_col) = _process_variable(config_dict, raw_data, 'maximum_temperature')
-    (data_tmin, tmin_col) = _process_variable(config_dict, raw_data, 'minimum_temperature')
-    (data_tavg, tavg_col) = _process_variable(config_dict, raw_data, 'average_temperature')
-    (data_tdew, tdew_col) = _process_variable(config_dict, raw_data, 'dewpoint_temperature')
-    (data_ea, ea_col) = _process_variable(config_dict, raw_data, 'vapor_pressure')
-    (data_rhmax, rhmax_col) = _process_variable(config_dict, raw_data, 'maximum_relative_humidity')
-    (data_rhmin, rhmin_col) = _process_variable(config_dict, raw_data, 'minimum_relative_humidity')
-    (data_rhavg, rhavg_col) = _process_variable(config_dict, raw_data, 'average_relative_humidity')
-    (data_rs, rs_col) = _process_variable(config_dict, raw_data, 'solar_radiation')
-    (data_ws, ws_col) = _process_variable(config_dict, raw_data, 'wind_speed')
-    (data_precip, precip_col) = _process_variable(config_dict, raw_data, 'precipitation')
-
-    # HPRCC data reports '0' for missing observations as well as a text column, but this script doesn't interpret text
-    # columns, so instead we see if both tmax and tmin have the same value (0, or -17.7778 depending on units) and if so
-    # mark that row as missing
-    # realistically tmax should never equal tmin, so this is an okay check to have in general
-    for i in range(len(data_tmax)):
-        if data_tmax[i] == data_tmin[i]:
-            data_tmax[i] = np.nan
-            data_tmin[i] = np.nan
-            data_tavg[i] = np.nan
-            data_tdew[i] = np.nan
-            data_ea[i] = np.nan
-            data_rhmax[i] = np.nan
-            data_rhmin[i] = np.nan
-            data_rhavg[i] = np.nan
-            data_rs[i] = np.nan
-            data_ws[i] = np.nan
-            data_precip[i] = np.nan
-        else:
-            pass
-
-    #########################
-    # Dataframe Construction
-    # In this section we convert the individual numpy arrays into a pandas dataframe to accomplish several goals:
-    # 1. Make use of the pandas reindexing function to cover literal gaps in the dataset (not just missing values)
-    # 2. Resample data to remove any duplicate records (same day appears twice in dataset, first instance is kept)
-    # 3. Cleanly pass extracted data to the main script function
+        log_start = os.path.getsize(config_dict['log_file_path'])  # everything written after this is from ingest
+        (data_df, col_ser, missing_dates) = _parse_data_file(config_dict)
 
-    # Create Datetime dataframe for reindexing
-    datetime_df = pd.DataFrame({'year': data_year, 'month': data_month, 'day': data_day})
-    datetime_df = pd.to_datetime(datetime_df)
+        if cache_path is not None:
+            with open(config_dict['log_file_path'], 'r') as logger:
+                logger.seek(log_start)
+                ingest_log = logger.read()
+            _save_cached_input(cache_path, data_df, col_ser, ingest_log, missing_dates,
+                               config_dict['input_cache_size_mb'])
 
-    # Create a series of all dates in time series
-    date_reindex = pd.date_range(datetime_df.iloc[0], datetime_df.iloc[-1])
+    return data_df, col_ser, metadata_df, metadata_series, config_dict
 
-    reindexing_additions = np.setdiff1d(np.array(date_reindex), np.array(datetime_df), assume_unique=False)
 
-    logger = open(config_dict['log_file_path'], 'w')
-    logger.write('The raw data file had %s missing date entries from its time record. \n \n' %
-                 reindexing_additions.size)
-    logger.close()
+def read_correction_recipe(recipe_file_path):
+    """
+        Reads a correction recipe saved by WeatherQC, so that the corrections of a station can be replayed without
+        prompting the user. A recipe is a json file with a list of steps, each step has the 'option' of the correction
+        menu that was selected along with the 'corrections' that were kept (see qaqc_functions.apply_correction_step),
+        or for option 9 the 'adjustments' that were kept (see qaqc_functions.apply_humidity_adjustment_step). The
+        'fill_random_seed' of the session is replayed as well, as rs corrections depend on the filled records.
 
-    print('\nSystem: The input data file had %s missing dates in its time record.' % reindexing_additions.size)
+        Args:
+            recipe_file_path : string of path to the json recipe file
 
-    # Create dataframe of data
-    data_df = pd.DataFrame({'year': data_year, 'month': data_month,
-                            'day': data_day, 'tavg': data_tavg, 'tmax': data_tmax, 'tmin': data_tmin,
-                            'tdew': data_tdew, 'ea': data_ea, 'rhavg': data_rhavg, 'rhmax': data_rhmax,
-                            'rhmin': data_rhmin, 'rs': data_rs, 'ws': data_ws, 'precip': data_precip},
-                           index=datetime_df)
+        Returns:
+            recipe : dictionary of the recipe and its list of 'steps'
+    """
+    validate_file(recipe_file_path, ['json'])
+    with open(recipe_file_path, 'r') as recipe_file:
+        recipe = json.load(recipe_file)
+
+    if not isinstance(recipe, dict) or not isinstance(recipe.get('steps'), list):
+        raise ValueError('\n\nThe correction recipe at \'{}\' does not have a list of steps.'.format(recipe_file_path))
+    fill_random_seed = recipe.get('fill_random_seed', 0)
+    if not isinstance(fill_random_seed, int) or fill_random_seed < 0:
+        raise ValueError('\n\nThe correction recipe fill random seed must be a non-negative integer, not {}.'
+                         .format(fill_random_seed))
+    for step in recipe['steps']:
+        option = step.get('option') if isinstance(step, dict) else None
+        actions = 'adjustments' if option == 9 else 'corrections'
+        if not isinstance(option, int) or not 1 <= option <= 9 or not isinstance(step.get(actions, []), list):
+            raise ValueError('\n\nCorrection recipe step {} needs an option from 1 to 9 and a list of {}.'
+                             .format(step, actions))
+
+    return recipe
+
+
+def export_station_archive(config_file_path, metadata_file_path=None, archive_path=None):
+    """
+        Reads in and processes a data file in the same way as WeatherQC, and then saves the result as a binary station
+        archive. Archives can be specified as the DATA_FILE_PATH of a config file (or the input_path of a metadata file)
+        and are then loaded without any parsing.
 
-    # Create dataframe of column indices for weather variable, to track which ones were provided vs calculated
-    col_ser = pd.Series({'tmax': tmax_col, 'tmin': tmin_col, 'tavg': tavg_col, 'tdew': tdew_col, 'ea': ea_col,
-                        'rhmax': rhmax_col, 'rhmin': rhmin_col, 'rhavg': rhavg_col, 'rs': rs_col, 'ws': ws_col,
-                        'precip': precip_col})
+        Args:
+            config_file_path : string of path to config file, should work with absolute or relative path
+            metadata_file_path : string of path to metadata file if provided
+            archive_path : string of path to save the archive at, if None it is saved alongside the data file
 
-    # Check for the existence of duplicate indexes
-    # if found, since it cannot be determined which value is true, we default to first instance and remove all following
-    data_df = data_df[~data_df.index.duplicated(keep='first')]
+        Returns:
+            archive_path : string of path the archive was saved at
+    """
+    (data_df, col_ser, _, _, config_dict) = _obtain_data(config_file_path, metadata_file_path)
 
-    # Reindex data with filled date series in case there are gaps in the data
-    data_df = data_df.reindex(date_reindex, fill_value=np.nan)
+    if archive_path is None:
+        archive_path = config_dict['file_name'] + ARCHIVE_EXTENSION
 
-    # Now replace M/D/Y columns with reindexed dates so there are no missing days
-    data_df.year = date_reindex.year
-    data_df.month = date_reindex.month
-    data_df.day = date_reindex.day
+    write_station_archive(archive_path, data_df, col_ser, config_dict)
+    print('\nSystem: Successfully saved station archive at %s' % archive_path)
 
-    return data_df, col_ser, metadata_df, metadata_series, config_dict
+    return archive_path
 
 
 # This is never run by itself
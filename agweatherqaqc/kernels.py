@@ -0,0 +1,535 @@
+import numpy as np
+
+# Numba is optional (pip install numba), when it is installed the scalar loops below are compiled, otherwise the
+# equivalent NumPy versions are used. Both versions produce bit-identical results.
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """
+            Stands in for numba.njit when numba is not installed, returning the decorated function unchanged.
+        """
+        return lambda function: function
+
+
+# Status of a correction period returned by rs_search_periods
+#   PERIOD_VALID: a correction factor was found
+#   PERIOD_INSUFFICIENT: the period had no finite rs/rso ratios, or fewer days than the sample size
+#   PERIOD_SAMPLE_FAILED: the period ran out of finite ratios before filling the sample size
+#   PERIOD_SEARCH_FAILED: the period ran out of finite ratios while testing for bad values
+PERIOD_VALID = 0
+PERIOD_INSUFFICIENT = 1
+PERIOD_SAMPLE_FAILED = 2
+PERIOD_SEARCH_FAILED = 3
+
+# Marker given to rs values identified as bad values, they are later set to 1.05 * rso
+BAD_VALUE_MARKER = -12345
+
+
+def _use_compiled(*arrays):
+    """
+        Determines if the compiled loops can be used, which requires numba, and 64 bit arrays as numba does not follow
+        NumPy's rules for mixing 32 bit arrays with python floats.
+    """
+    return NUMBA_AVAILABLE and all(array.dtype == np.float64 for array in arrays)
+
+
+@njit(cache=True)
+def _pairwise_sum(values, start, count):
+    """
+        Sums values[start:start + count] in the same order as the pairwise summation np.sum uses for a contiguous
+        float64 array, so that compiled means are identical to np.nanmean.
+    """
+    if count < 8:
+        result = 0.0
+        for i in range(start, start + count):
+            result += values[i]
+        return result
+    elif count <= 128:
+        partial = np.empty(8)
+        for j in range(8):
+            partial[j] = values[start + j]
+        i = 8
+        while i < count - (count % 8):
+            for j in range(8):
+                partial[j] += values[start + i + j]
+            i += 8
+        result = ((partial[0] + partial[1]) + (partial[2] + partial[3])) + \
+            ((partial[4] + partial[5]) + (partial[6] + partial[7]))
+        while i < count:
+            result += values[start + i]
+            i += 1
+        return result
+    else:
+        half = count // 2
+        half -= half % 8
+        return _pairwise_sum(values, start, half) + _pairwise_sum(values, start + half, count - half)
+
+
+@njit(cache=True, error_model='numpy')
+def _rank_period(rs_period, rso_period):
+    """
+        Orders the rs/rso ratios of a period from largest to smallest, ties are kept in index order so this is the
+        order that repeatedly calling np.nanargmax and setting the result to nan would find them in.
+
+        Returns the order, the number of finite ratios, and the number of ratios that are ranked (not nan or -inf).
+    """
+    ratios = rs_period / rso_period
+    keys = np.where(np.isnan(ratios), -np.inf, ratios)
+    order = np.argsort(-keys, kind='mergesort')
+
+    finite_ratios = 0
+    ranked_ratios = 0
+    for key in keys:
+        if np.isfinite(key):
+            finite_ratios += 1
+        if key != -np.inf:
+            ranked_ratios += 1
+
+    return order, finite_ratios, ranked_ratios
+
+
+@njit(cache=True, error_model='numpy')
+def _rs_period_search_loop(rs_period, rso_period, sample_size):
+    """
+        Finds the correction factor of a single period, returning the same values as rs_search_periods along with
+        the indices of the period sorted by descending ratio, the first bad_values of which are bad values.
+    """
+    (order, finite_ratios, ranked_ratios) = _rank_period(rs_period, rso_period)
+    if finite_ratios == 0 or rs_period.size < sample_size:
+        return np.nan, 0, PERIOD_INSUFFICIENT, 0, 0, order
+    elif ranked_ratios <= sample_size:
+        return np.nan, 0, PERIOD_SAMPLE_FAILED, ranked_ratios, 0, order
+
+    rs_sorted = rs_period[order]
+    rso_sorted = rso_period[order]
+
+    start = 0
+    bad_values = 0
+    warnings = 0
+    while True:
+        # Once every ranked ratio has been taken the next largest cannot be found, so the comparison is made with
+        # the ratios that are left and the period is thrown out afterwards
+        search_failed = ranked_ratios <= sample_size + start
+        new_count = min(sample_size, ranked_ratios - start - 1)
+
+        rs_avg = _pairwise_sum(rs_sorted, start, sample_size) / sample_size
+        rso_avg = _pairwise_sum(rso_sorted, start, sample_size) / sample_size
+        if new_count > 0:
+            new_rs_avg = _pairwise_sum(rs_sorted, start + 1, new_count) / new_count
+            new_rso_avg = _pairwise_sum(rso_sorted, start + 1, new_count) / new_count
+        else:
+            new_rs_avg = np.nan
+            new_rso_avg = np.nan
+
+        current_cf = rso_avg / rs_avg
+        new_cf = new_rso_avg / new_rs_avg
+        percent_diff_cf = ((new_cf - current_cf) / current_cf) * 100
+
+        new_cf_significant_change = percent_diff_cf >= 2.0 and rs_avg > rso_avg
+        rs_avg_greatly_exceeds_rso_avg = (rs_avg - rso_avg) >= 75
+
+        if new_cf_significant_change or rs_avg_greatly_exceeds_rso_avg:
+            start += 1
+            bad_values += 1
+            if search_failed:
+                return np.nan, bad_values, PERIOD_SEARCH_FAILED, int(not new_cf_significant_change), warnings, order
+            elif not new_cf_significant_change:
+                warnings += 1
+        elif search_failed:
+            return np.nan, bad_values, PERIOD_SEARCH_FAILED, 0, warnings, order
+        else:
+            return current_cf, bad_values, PERIOD_VALID, 0, warnings, order
+
+
+def _rs_period_search_numpy(rs_period, rso_period, sample_size):
+    """
+        NumPy version of the search of a single period, the correction factors of every candidate sample are
+        calculated at once. Used for the periods that need more candidates than rs_search_periods sorts.
+    """
+    (order, finite_ratios, ranked_ratios) = _rank_period(rs_period, rso_period)
+    if finite_ratios == 0 or rs_period.size < sample_size:
+        return np.nan, 0, PERIOD_INSUFFICIENT, 0, 0, order
+    elif ranked_ratios <= sample_size:
+        return np.nan, 0, PERIOD_SAMPLE_FAILED, ranked_ratios, 0, order
+
+    rs_sorted = rs_period[order[:ranked_ratios]]
+    rso_sorted = rso_period[order[:ranked_ratios]]
+
+    # Sample k is made of ranked ratios k to k + sample_size, the last one is the sample tested after every ranked
+    # ratio has been taken, so it is compared against the sample_size - 1 ratios that are left
+    sample_sums = np.lib.stride_tricks.sliding_window_view(np.vstack((rs_sorted, rso_sorted)), sample_size, axis=1)
+    sample_sums = np.ascontiguousarray(sample_sums).sum(axis=2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        (rs_avg, rso_avg) = sample_sums / sample_size
+        last_sums = np.array([np.sum(rs_sorted[-(sample_size - 1):]), np.sum(rso_sorted[-(sample_size - 1):])]) \
+            if sample_size > 1 else np.zeros(2)
+        (new_rs_avg, new_rso_avg) = np.hstack((sample_sums[:, 1:] / sample_size,
+                                               last_sums[:, np.newaxis] / (sample_size - 1)))
+
+        current_cf = rso_avg / rs_avg
+        new_cf = new_rso_avg / new_rs_avg
+        percent_diff_cf = ((new_cf - current_cf) / current_cf) * 100
+
+    new_cf_significant_change = (percent_diff_cf >= 2.0) & (rs_avg > rso_avg)
+    rs_avg_greatly_exceeds_rso_avg = (rs_avg - rso_avg) >= 75
+    violated = new_cf_significant_change | rs_avg_greatly_exceeds_rso_avg
+    warned = rs_avg_greatly_exceeds_rso_avg & ~new_cf_significant_change
+
+    # The first sample that breaks neither rule is used, unless it is the last sample
+    accepted = np.flatnonzero(~violated[:-1])
+    if accepted.size:
+        start = accepted[0]
+        return current_cf[start], start, PERIOD_VALID, 0, np.count_nonzero(warned[:start]), order
+    else:
+        return (np.nan, np.count_nonzero(violated), PERIOD_SEARCH_FAILED, int(warned[-1]),
+                np.count_nonzero(warned[:-1]), order)
+
+
+@njit(cache=True)
+def _rs_search_periods_loop(rs_periods, rso_periods, period_lengths, sample_size):
+    """
+        Compiled version of rs_search_periods.
+    """
+    number_of_periods = rs_periods.shape[0]
+    period_corr = np.empty(number_of_periods)
+    bad_values = np.zeros(number_of_periods, dtype=np.int64)
+    status = np.zeros(number_of_periods, dtype=np.int64)
+    status_detail = np.zeros(number_of_periods, dtype=np.int64)
+    warnings = np.zeros(number_of_periods, dtype=np.int64)
+    bad_value_mask = np.zeros(rs_periods.shape, dtype=np.bool_)
+
+    for k in range(number_of_periods):
+        (period_corr[k], bad_values[k], status[k], status_detail[k], warnings[k], order) = _rs_period_search_loop(
+            rs_periods[k, :period_lengths[k]], rso_periods[k, :period_lengths[k]], sample_size)
+        if status[k] == PERIOD_VALID:
+            for i in range(bad_values[k]):
+                bad_value_mask[k, order[i]] = True
+
+    return period_corr, bad_values, status, status_detail, warnings, bad_value_mask
+
+
+def _rs_search_periods_numpy(rs_periods, rso_periods, period_lengths, sample_size):
+    """
+        NumPy version of rs_search_periods. The largest ratios of every period are found at once with argpartition
+        and only those candidates are sorted, then the bad value rules are tested for every candidate sample of every
+        period at once. Periods that run out of candidates before settling are searched one at a time.
+    """
+    (number_of_periods, period_length) = rs_periods.shape
+    with np.errstate(divide='ignore', invalid='ignore'):
+        keys = rs_periods / rso_periods
+    keys[np.isnan(keys)] = -np.inf
+    finite_ratios = np.count_nonzero(np.isfinite(keys), axis=1)
+    ranked_ratios = np.count_nonzero(keys != -np.inf, axis=1)
+
+    period_corr = np.full(number_of_periods, np.nan)
+    bad_values = np.zeros(number_of_periods, dtype=np.int64)
+    status = np.full(number_of_periods, PERIOD_VALID)
+    status_detail = np.zeros(number_of_periods, dtype=np.int64)
+    warnings = np.zeros(number_of_periods, dtype=np.int64)
+    bad_value_mask = np.zeros(rs_periods.shape, dtype=bool)
+
+    insufficient = (finite_ratios == 0) | (period_lengths < sample_size)
+    sample_failed = ~insufficient & (ranked_ratios <= sample_size)
+    status[insufficient] = PERIOD_INSUFFICIENT
+    status[sample_failed] = PERIOD_SAMPLE_FAILED
+    status_detail[sample_failed] = ranked_ratios[sample_failed]
+    searched = np.flatnonzero(status == PERIOD_VALID)
+    if searched.size == 0:
+        return period_corr, bad_values, status, status_detail, warnings, bad_value_mask
+
+    # Most periods settle after a few bad values, so only enough of the largest ratios for that are sorted
+    candidates = min(period_length, 2 * sample_size + 8)
+    if candidates < period_length:
+        top = np.argpartition(-keys[searched], candidates - 1, axis=1)[:, :candidates]
+    else:
+        top = np.tile(np.arange(period_length), (searched.size, 1))
+    top_keys = np.take_along_axis(keys[searched], top, axis=1)
+    # Ratios are taken largest first with ties in index order, the order repeated nanargmax calls would find them in
+    candidate_order = np.lexsort((top, -top_keys), axis=1)
+    top = np.take_along_axis(top, candidate_order, axis=1)
+    top_keys = np.take_along_axis(top_keys, candidate_order, axis=1)
+
+    # Ratios tied with the smallest candidate may have been left out in favour of later days, so only the candidates
+    # larger than it are known to be in order, unless every ranked ratio is a candidate
+    if candidates < period_length:
+        ordered_candidates = np.count_nonzero(top_keys > top_keys[:, -1:], axis=1)
+    else:
+        ordered_candidates = np.full(searched.size, candidates)
+    usable_candidates = np.minimum(ordered_candidates, ranked_ratios[searched])
+
+    # Sample k is made of candidates k to k + sample_size, and is tested against the sample starting at k + 1
+    rs_candidates = np.take_along_axis(rs_periods[searched], top, axis=1)
+    rso_candidates = np.take_along_axis(rso_periods[searched], top, axis=1)
+    sample_sums = np.lib.stride_tricks.sliding_window_view(np.stack((rs_candidates, rso_candidates)), sample_size,
+                                                           axis=2)
+    sample_sums = np.ascontiguousarray(sample_sums).sum(axis=3)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        (rs_avg, rso_avg) = sample_sums / sample_size
+        current_cf = rso_avg[:, :-1] / rs_avg[:, :-1]
+        new_cf = rso_avg[:, 1:] / rs_avg[:, 1:]
+        percent_diff_cf = ((new_cf - current_cf) / current_cf) * 100
+
+    new_cf_significant_change = (percent_diff_cf >= 2.0) & (rs_avg[:, :-1] > rso_avg[:, :-1])
+    rs_avg_greatly_exceeds_rso_avg = (rs_avg[:, :-1] - rso_avg[:, :-1]) >= 75
+    warned = rs_avg_greatly_exceeds_rso_avg & ~new_cf_significant_change
+
+    # The first sample that breaks neither rule is used, among the samples that only use ordered candidates
+    sample_index = np.arange(current_cf.shape[1])
+    accepted = ~(new_cf_significant_change | rs_avg_greatly_exceeds_rso_avg) & \
+        (sample_index < (usable_candidates - sample_size)[:, np.newaxis])
+    settled = accepted.any(axis=1)
+    first_accepted = np.argmax(accepted, axis=1)
+
+    settled_periods = searched[settled]
+    period_corr[settled_periods] = current_cf[settled, first_accepted[settled]]
+    bad_values[settled_periods] = first_accepted[settled]
+    warnings[settled_periods] = np.count_nonzero(warned[settled] & (sample_index < first_accepted[settled, np.newaxis]),
+                                                 axis=1)
+    candidate_bad = np.arange(candidates) < np.where(settled, first_accepted, 0)[:, np.newaxis]
+    searched_mask = np.zeros((searched.size, period_length), dtype=bool)
+    np.put_along_axis(searched_mask, top, candidate_bad, axis=1)
+    bad_value_mask[searched] = searched_mask
+
+    for k in searched[~settled]:
+        (period_corr[k], bad_values[k], status[k], status_detail[k], warnings[k], order) = _rs_period_search_numpy(
+            rs_periods[k, :period_lengths[k]], rso_periods[k, :period_lengths[k]], sample_size)
+        if status[k] == PERIOD_VALID:
+            bad_value_mask[k, order[:bad_values[k]]] = True
+
+    return period_corr, bad_values, status, status_detail, warnings, bad_value_mask
+
+
+def rs_search_periods(rs_periods, rso_periods, period_lengths, sample_size):
+    """
+        Finds the correction factor of every rs correction period, see qaqc_functions.rs_period_ratio_corr for a
+        description of the rules used to find bad values.
+
+        Args:
+            :rs_periods: (ndarray) 2D float64 array of (periods x period length) rs values, padded with nan
+            :rso_periods: (ndarray) 2D float64 array of (periods x period length) rso values, padded with nan
+            :period_lengths: (ndarray) 1D array of the number of days in each period
+            :sample_size: (int) number of largest rs/rso ratios the correction factor is calculated from
+
+        Returns:
+            :period_corr: (ndarray) rso/rs correction factor of each period, nan if the period is not valid
+            :bad_values: (ndarray) number of the largest ratios of each period identified as bad values
+            :status: (ndarray) one of the PERIOD_ status values for each period
+            :status_detail: (ndarray) for PERIOD_SAMPLE_FAILED, the number of the sample point that could not be
+                found, for PERIOD_SEARCH_FAILED, 1 if the warning was also given when testing the final sample
+            :warnings: (ndarray) number of times rs greatly exceeded rso without the correction factor changing,
+                before the search of each period ended
+            :bad_value_mask: (ndarray) 2D boolean array of the days identified as bad values in valid periods
+    """
+    if NUMBA_AVAILABLE:
+        return _rs_search_periods_loop(rs_periods, rso_periods, period_lengths, sample_size)
+    return _rs_search_periods_numpy(rs_periods, rso_periods, period_lengths, sample_size)
+
+
+@njit(cache=True)
+def _rs_apply_period_factors_loop(rs, rso, corr_rs, period_corr, period):
+    """
+        Compiled version of rs_apply_period_factors.
+    """
+    unchanged = 0
+    clipped = 0
+    cutoff = 0
+    for i in range(rs.size):
+        correction_factor = period_corr[max(i - 1, 0) // period]
+        if 0.50 <= correction_factor <= 1.50:
+            if corr_rs[i] == BAD_VALUE_MARKER:
+                corr_rs[i] = rso[i] * 1.05
+            else:
+                if 0.97 <= correction_factor <= 1.03:
+                    unchanged += 1
+                else:
+                    corr_rs[i] = rs[i] * correction_factor
+
+                if corr_rs[i] > (rso[i] * 1.03):
+                    corr_rs[i] = rso[i]
+                    clipped += 1
+        elif not np.isnan(correction_factor):
+            corr_rs[i] = np.nan
+            cutoff += 1
+
+    return unchanged, clipped, cutoff
+
+
+def _rs_apply_period_factors_numpy(rs, rso, corr_rs, period_corr, period):
+    """
+        NumPy version of rs_apply_period_factors.
+    """
+    correction_factor = period_corr[np.maximum(np.arange(rs.size) - 1, 0) // period]
+    in_limits = (correction_factor >= 0.50) & (correction_factor <= 1.50)
+    bad_value = in_limits & (corr_rs == BAD_VALUE_MARKER)
+    adjusted = in_limits & ~bad_value
+    unchanged = adjusted & (correction_factor >= 0.97) & (correction_factor <= 1.03)
+    scaled = adjusted & ~unchanged
+    cutoff = ~in_limits & ~np.isnan(correction_factor)
+
+    corr_rs[bad_value] = rso[bad_value] * 1.05
+    corr_rs[scaled] = rs[scaled] * correction_factor[scaled]
+    clipped = adjusted & (corr_rs > (rso * 1.03))
+    corr_rs[clipped] = rso[clipped]
+    corr_rs[cutoff] = np.nan
+
+    return np.count_nonzero(unchanged), np.count_nonzero(clipped), np.count_nonzero(cutoff)
+
+
+def rs_apply_period_factors(rs, rso, corr_rs, period_corr, period):
+    """
+        Applies the correction factor of each period to an rs correction interval, in place. Like the original
+        correction loop, the first period's factor is applied to its first period + 1 days and every following period
+        is shifted one day later.
+
+        Args:
+            :rs: (ndarray) 1D array of the original rs values in the interval
+            :rso: (ndarray) 1D array of rso values in the interval
+            :corr_rs: (ndarray) 1D array of rs values in the interval with bad values marked, corrected in place
+            :period_corr: (ndarray) 1D float64 array of the correction factor of each period
+            :period: (int) length of each correction period
+
+        Returns:
+            :unchanged: (int) number of values left unchanged for having a factor between 0.97 and 1.03
+            :clipped: (int) number of values clipped to rso for exceeding 1.03 * rso after correction
+            :cutoff: (int) number of values removed for having a factor outside of 0.5 to 1.5
+    """
+    if _use_compiled(rs, rso, corr_rs):
+        return _rs_apply_period_factors_loop(rs, rso, corr_rs, period_corr, period)
+    return _rs_apply_period_factors_numpy(rs, rso, corr_rs, period_corr, period)
+
+
+@njit(cache=True)
+def _rh_apply_year_factors_loop(rhmax, rhmin, corr_rhmax, corr_rhmin, day_factors):
+    """
+        Compiled version of rh_apply_year_factors.
+    """
+    rhmax_cutoff = 0
+    rhmin_cutoff = 0
+    invert_max_min_cutoff = 0
+    for i in range(rhmax.size):
+        corr_rhmax[i] = rhmax[i] * day_factors[i]
+        corr_rhmin[i] = rhmin[i] * day_factors[i]
+
+        if corr_rhmax[i] > 100:
+            corr_rhmax[i] = 100
+            rhmax_cutoff += 1
+        elif corr_rhmax[i] <= 0:
+            corr_rhmax[i] = 1
+
+        if corr_rhmin[i] > 100:
+            corr_rhmin[i] = 100
+            rhmin_cutoff += 1
+        elif corr_rhmin[i] <= 0:
+            corr_rhmin[i] = 1
+
+        if corr_rhmax[i] < corr_rhmin[i]:
+            corr_rhmax[i] = np.nan
+            corr_rhmin[i] = np.nan
+            invert_max_min_cutoff += 1
+
+    return rhmax_cutoff, rhmin_cutoff, invert_max_min_cutoff
+
+
+def _rh_apply_year_factors_numpy(rhmax, rhmin, corr_rhmax, corr_rhmin, day_factors):
+    """
+        NumPy version of rh_apply_year_factors.
+    """
+    cutoffs = []
+    for (original, corrected) in [(rhmax, corr_rhmax), (rhmin, corr_rhmin)]:
+        corrected[:] = original * day_factors
+        exceeded = corrected > 100
+        corrected[exceeded] = 100
+        corrected[corrected <= 0] = 1
+        cutoffs.append(np.count_nonzero(exceeded))
+
+    inverted = corr_rhmax < corr_rhmin
+    corr_rhmax[inverted] = np.nan
+    corr_rhmin[inverted] = np.nan
+
+    return cutoffs[0], cutoffs[1], np.count_nonzero(inverted)
+
+
+def rh_apply_year_factors(rhmax, rhmin, corr_rhmax, corr_rhmin, day_factors):
+    """
+        Applies the yearly RH correction factors to an interval in place, clipping corrected values above 100 percent,
+        raising values at or below 0 to 1, and removing days where RHMax ends up below RHMin.
+
+        Args:
+            :rhmax: (ndarray) 1D array of original rhmax values in the interval
+            :rhmin: (ndarray) 1D array of original rhmin values in the interval
+            :corr_rhmax: (ndarray) 1D array the corrected rhmax values are written to
+            :corr_rhmin: (ndarray) 1D array the corrected rhmin values are written to
+            :day_factors: (ndarray) 1D float64 array of the correction factor of the year of each day
+
+        Returns:
+            :rhmax_cutoff: (int) number of rhmax values clipped to 100 percent
+            :rhmin_cutoff: (int) number of rhmin values clipped to 100 percent
+            :invert_max_min_cutoff: (int) number of days removed because rhmax was less than rhmin
+    """
+    if _use_compiled(rhmax, rhmin, corr_rhmax, corr_rhmin):
+        return _rh_apply_year_factors_loop(rhmax, rhmin, corr_rhmax, corr_rhmin, day_factors)
+    return _rh_apply_year_factors_numpy(rhmax, rhmin, corr_rhmax, corr_rhmin, day_factors)
+
+
+@njit(cache=True)
+def _separate_temperatures_loop(complete_tmax, complete_tmin, fill_tmax, fill_tmin, month, mm_tmax, mm_tmin,
+                                mm_delta_t):
+    """
+        Compiled version of separate_temperatures.
+    """
+    for i in range(complete_tmax.size):
+        if (complete_tmax[i] <= complete_tmin[i]) or (complete_tmax[i] - complete_tmin[i] <= 3):
+            complete_tmax[i] = mm_tmax[month[i] - 1] + (0.5 * mm_delta_t[month[i] - 1])
+            fill_tmax[i] = complete_tmax[i]
+            complete_tmin[i] = mm_tmin[month[i] - 1] - (0.5 * mm_delta_t[month[i] - 1])
+            fill_tmin[i] = complete_tmin[i]
+
+
+def _separate_temperatures_numpy(complete_tmax, complete_tmin, fill_tmax, fill_tmin, month, mm_tmax, mm_tmin,
+                                 mm_delta_t):
+    """
+        NumPy version of separate_temperatures.
+    """
+    too_close = (complete_tmax <= complete_tmin) | (complete_tmax - complete_tmin <= 3)
+    too_close_month = month[too_close] - 1
+
+    complete_tmax[too_close] = mm_tmax[too_close_month] + (0.5 * mm_delta_t[too_close_month])
+    fill_tmax[too_close] = complete_tmax[too_close]
+    complete_tmin[too_close] = mm_tmin[too_close_month] - (0.5 * mm_delta_t[too_close_month])
+    fill_tmin[too_close] = complete_tmin[too_close]
+
+
+def separate_temperatures(complete_tmax, complete_tmin, fill_tmax, fill_tmin, month, mm_tmax, mm_tmin, mm_delta_t):
+    """
+        Makes sure that filled temperature records have tmax sufficiently warmer than tmin, in place. Days where tmax
+        is not more than 3 degrees warmer than tmin are replaced by the monthly mean tmax and tmin, pushed apart by
+        half of the monthly mean delta t, and recorded as filled.
+
+        Args:
+            :complete_tmax: (ndarray) 1D array of filled tmax values
+            :complete_tmin: (ndarray) 1D array of filled tmin values
+            :fill_tmax: (ndarray) 1D array tracking filled tmax values
+            :fill_tmin: (ndarray) 1D array tracking filled tmin values
+            :month: (ndarray) 1D array of month values
+            :mm_tmax: (ndarray) 1D array of mean monthly tmax
+            :mm_tmin: (ndarray) 1D array of mean monthly tmin
+            :mm_delta_t: (ndarray) 1D array of mean monthly delta t
+
+        Returns:
+            None
+    """
+    if _use_compiled(complete_tmax, complete_tmin, fill_tmax, fill_tmin):
+        _separate_temperatures_loop(complete_tmax, complete_tmin, fill_tmax, fill_tmin, month, mm_tmax, mm_tmin,
+                                    mm_delta_t)
+    else:
+        _separate_temperatures_numpy(complete_tmax, complete_tmin, fill_tmax, fill_tmin, month, mm_tmax, mm_tmin,
+                                     mm_delta_t)
+
+
+# This is never run by itself
+if __name__ == "__main__":
+    print("\nThis module is called as a part of the QAQC script, it does nothing by itself.")
@@ -3,15 +3,48 @@ import math
 import datetime as dt
 import logging as log
 import agweatherqaqc.plot as plotting_functions
+from agweatherqaqc import kernels
+from agweatherqaqc.calc_functions import COMPILED_EA_SOURCES
+from agweatherqaqc.date_functions import split_dates
+from agweatherqaqc.group_functions import grouped_count, grouped_nanmedian, make_groups, month_groups, \
+    rolling_doy_median_mad
 from agweatherqaqc.utils import get_int_input, get_float_input, FEATURES_DICT
-import warnings
 
 from bokeh.plotting import save, show
+from collections import namedtuple
 
 
-def additive_corr(log_writer, start, end, var_one, var_two):
+# Codes of the temperature, wind speed, and humidity variables that can use the rolling seasonal z-score option
+SEASONAL_OUTLIER_CODES = (1, 2, 3, 7, 8, 9)
+
+# Correction method of option 4 of the correction menu for each code, the variables not listed skip the interval
+OPTION_FOUR_METHODS = {1: 'modified_z_score', 2: 'modified_z_score', 5: 'rs_period_ratio', 8: 'rh_yearly_percentile'}
+
+# Sources that can overwrite intervals of compiled ea, numbered the same as the options of the humidity adjustment
+# menu and COMPILED_EA_SOURCES, followed by skipping the interval
+HUMIDITY_ADJUSTMENT_SOURCES = COMPILED_EA_SOURCES[1:] + ['skip']
+
+# Parameters that correction recipe steps need to provide for each correction method, see apply_correction_step
+CORRECTION_PARAMETERS = {'additive': ('modifier',), 'multiplicative': ('modifier',),
+                         'rh_yearly_percentile': ('percentile',), 'rs_period_ratio': ('period', 'sample_size'),
+                         'rolling_modified_z_score': ('half_width',)}
+
+# Correction methods that score the whole record for outliers, regardless of the selected interval
+WHOLE_RECORD_METHODS = ('modified_z_score', 'rolling_modified_z_score')
+
+# One operation of the correction journal kept by correction(), so that it can be undone and redone
+#   step: (dict) correction step that was applied, see apply_correction_step
+#   start: (int) starting index of the values changed by the step, 0 for WHOLE_RECORD_METHODS
+#   end: (int) ending index of the values changed by the step, the record length for WHOLE_RECORD_METHODS
+#   replaced_one: (ndarray) var_one values of the interval that were replaced when the step was last applied or undone
+#   replaced_two: (ndarray) var_two values of the interval that were replaced when the step was last applied or undone
+JournalEntry = namedtuple('JournalEntry', ['step', 'start', 'end', 'replaced_one', 'replaced_two'])
+
+
+def additive_corr(log_writer, start, end, var_one, var_two, mod=None, in_place=False):
     """
-    Corrects provided interval with a flat, user-provided additive modifier obtained via the CLI
+    Corrects provided interval with a flat, user-provided additive modifier obtained via the CLI, unless the modifier
+    is passed in
 
     Args:
         :log_writer: Wrapper for writing to log file.
@@ -19,15 +52,18 @@ def additive_corr(log_writer, start, end, var_one, var_two):
         :end: (int) ending index of correction interval.
         :var_one: (ndarray) 1-D array of first variable.
         :var_two: (ndarray) 1-D array of second variable, may be entirely NaN.
+        :mod: (float) additive modifier, the user is prompted for it if None.
+        :in_place: (bool) if True the interval of var_one and var_two is corrected in place instead of copying them.
 
     Returns:
         :corr_var_one: (ndarray) 1-D array of first variable after correction.
         :corr_var_two: (ndarray) 1-D array of second variable after correction, may be entirely NaN.
     """
-    corr_var_one = np.array(var_one)
-    corr_var_two = np.array(var_two)
+    corr_var_one = var_one if in_place else np.array(var_one)
+    corr_var_two = var_two if in_place else np.array(var_two)
 
-    mod = get_float_input("\nEnter the additive modifier you want to apply to all values: ")
+    if mod is None:
+        mod = get_float_input("\nEnter the additive modifier you want to apply to all values: ")
     corr_var_one[start:end] = var_one[start:end] + mod
     corr_var_two[start:end] = var_two[start:end] + mod
     log_writer.write('Selected correction interval started at %s and ended at %s. \n' % (start, end))
@@ -50,6 +86,7 @@ def _generate_corr_menu(code, auto_corr, first_pass):
         :first_pass: (bool) flag for if this is the first iteration of correction or not
     """
     corr_method = '   To skip correcting this data, enter 4.'
+    max_choice = 4
 
     # code value is unordered here but matches what is expected by plotting functions
     if code == 1 or code == 2:
@@ -77,13 +114,16 @@ def _generate_corr_menu(code, auto_corr, first_pass):
           '\n   For user-defined multiplicative value correction, enter 2.'
           '\n   To set everything in this interval to NaN, enter 3.'.format(var_type))
     print(corr_method)
+    if code in SEASONAL_OUTLIER_CODES:
+        print('   To remove outliers using a rolling seasonal modified z-score approach, enter 5.')
+        max_choice = 5
 
     if auto_corr != 0 and first_pass == 1:  # automatic pass enabled
         choice = 4
         first_pass = 0
         print('\n Automatic first-pass correction is being performed, option 4 selected. \n')
     else:
-        choice = get_int_input(1, 4, "Enter your selection: ")
+        choice = get_int_input(1, max_choice, "Enter your selection: ")
 
     return choice, first_pass
 
@@ -122,9 +162,10 @@ def generate_interval(var_size):
     return int_start, int_end
 
 
-def multiplicative_corr(log_writer, start, end, var_one, var_two):
+def multiplicative_corr(log_writer, start, end, var_one, var_two, mod=None, in_place=False):
     """
-    Corrects provided interval with a user-provided multiplicative modifier obtained from the CLI
+    Corrects provided interval with a user-provided multiplicative modifier obtained from the CLI, unless the modifier
+    is passed in
 
     Args:
         :log_writer: Wrapper for writing to log file
@@ -132,14 +173,17 @@ def multiplicative_corr(log_writer, start, end, var_one, var_two):
         :end: (int) ending index of correction interval
         :var_one: (ndarray) 1-D numpy array of first variable
         :var_two: (ndarray) 1-D numpy array of second variable, may be entirely nan's
+        :mod: (float) multiplicative modifier, the user is prompted for it if None
+        :in_place: (bool) if True the interval of var_one and var_two is corrected in place instead of copying them
     Returns:
         :corr_var_one: (ndarray) 1-D array of first variable after correction
         :corr_var_two: (ndarray) 1-D array of second variable after correction, may be entirely nan's
     """
-    corr_var_one = np.array(var_one)
-    corr_var_two = np.array(var_two)
+    corr_var_one = var_one if in_place else np.array(var_one)
+    corr_var_two = var_two if in_place else np.array(var_two)
 
-    mod = get_float_input("\nEnter the multiplicative modifier you want to apply to all values: ")
+    if mod is None:
+        mod = get_float_input("\nEnter the multiplicative modifier you want to apply to all values: ")
     corr_var_one[start:end] = var_one[start:end] * mod
     corr_var_two[start:end] = var_two[start:end] * mod
     log_writer.write('Selected correction interval started at %s and ended at %s. \n' % (start, end))
@@ -148,7 +192,7 @@ def multiplicative_corr(log_writer, start, end, var_one, var_two):
     return corr_var_one, corr_var_two
 
 
-def set_to_nan(log_writer, start, end, var_one, var_two):
+def set_to_nan(log_writer, start, end, var_one, var_two, in_place=False):
     """
     Sets entire provided interval to nans, likely because the observations are bad and need to be thrown out.
 
@@ -158,13 +202,14 @@ def set_to_nan(log_writer, start, end, var_one, var_two):
         :end: (int) ending index of correction interval
         :var_one: (ndarray) 1-D array of first variable
         :var_two: (ndarray) 1-D array of second variable, may be entirely nan's
+        :in_place: (bool) if True the interval of var_one and var_two is removed in place instead of copying them
 
     Returns:
         :corr_var_one: (ndarray) 1-D array of first variable after data was removed
         :corr_var_two: (ndarray) 1-D array of second variable after data was removed, may be entirely nan's
     """
-    corr_var_one = np.array(var_one)
-    corr_var_two = np.array(var_two)
+    corr_var_one = var_one if in_place else np.array(var_one)
+    corr_var_two = var_two if in_place else np.array(var_two)
 
     corr_var_one[start:end] = np.nan
     corr_var_two[start:end] = np.nan
@@ -192,27 +237,52 @@ def modified_z_score_outlier_detection(data):
         :cleaned_data: (ndarray) 1-D array of values that have had outliers removed
         :outlier_count: (int) number of outliers removed
     """
+    single_group = make_groups(np.zeros(np.size(data), dtype=int), 1)
+    (cleaned_data, outlier_counts) = grouped_modified_z_score_outlier_detection(single_group, data)
+
+    return cleaned_data, int(outlier_counts[0])
+
+
+def grouped_modified_z_score_outlier_detection(groups, values):
+    """
+    Performs modified_z_score_outlier_detection() on every group of a record at once, for one or many variables, so
+    each observation is scored against the median and median absolute deviation of its own group
+    (ex. all January observations). The medians of every group are found with a single sort of each variable.
+
+    Args:
+        :groups: (GroupIndex) group structure returned by make_groups or month_groups
+        :values: (ndarray) 1-D array of values, or 2-D array of (variables x observations)
+
+    Returns:
+        :cleaned_values: (ndarray) copy of values that has had outliers removed
+        :outlier_counts: (ndarray) number of outliers removed in each group, (groups) for 1-D values or
+            (variables x groups) for 2-D values
+    """
     threshold = 3.5
-    cleaned_data = np.array(data)
+    cleaned_values = np.array(values)
+    stacked = np.atleast_2d(cleaned_values)
 
-    median = np.nanmedian(data)
-    median_absolute_deviation = np.nanmedian([np.abs(x - median) for x in data])
-    modified_z_scores = np.array([0.6745 * (x - median) / median_absolute_deviation for x in data])
+    medians = grouped_nanmedian(groups, stacked)
+    deviations = stacked - medians[:, groups.codes]
+    median_absolute_deviations = grouped_nanmedian(groups, np.abs(deviations))
 
-    warnings.filterwarnings('ignore', 'invalid value encountered')  # catch invalid value warning for nans in data
-    removed_indices = np.array(np.where(np.abs(modified_z_scores) > threshold))  # array of indices for zscore > thresh
-    warnings.resetwarnings()  # reset warning filter to default
+    # nans in data give invalid values, and a median absolute deviation of 0 divides by zero
+    with np.errstate(divide='ignore', invalid='ignore'):
+        modified_z_scores = 0.6745 * deviations / median_absolute_deviations[:, groups.codes]
+    outliers = np.abs(modified_z_scores) > threshold
 
-    cleaned_data[removed_indices] = np.nan  # set those indices to nan
-    outlier_count = removed_indices.size
-    return cleaned_data, outlier_count
+    stacked[outliers] = np.nan  # set those indices to nan
+    outlier_counts = np.array([np.bincount(groups.codes[variable_outliers], minlength=groups.n_groups)
+                               for variable_outliers in outliers])
+
+    return cleaned_values, outlier_counts[0] if np.ndim(values) == 1 else outlier_counts
 
 
 def temp_find_outliers(log_writer, var_one, var_one_name, var_two, var_two_name, month):
     """
-    Wrapper function for modified_z_score_outlier_detection() that will process provided temperature variables.
-    Due to seasonal variation in temperature the overall temperature record is subset into months
-    (ex. all January observations are grouped together) and modified_z_score_outlier_detection() is run 12 times.
+    Wrapper function for grouped_modified_z_score_outlier_detection() that will process provided temperature variables.
+    Due to seasonal variation in temperature the overall temperature record is grouped into months
+    (ex. all January observations are grouped together) and each month is scored separately.
 
     Args:
         :log_writer: Wrapper for writing to log file
@@ -228,22 +298,12 @@ def temp_find_outliers(log_writer, var_one, var_one_name, var_two, var_two_name,
 
     """
     log_writer.write('User has opted to use a modified z-score approach to identify and remove outliers. \n')
-    var_one_total_outliers = 0
-    var_two_total_outliers = 0
-
-    corrected_var_one = np.array(var_one)
-    corrected_var_two = np.array(var_two)
 
-    k = 1
-    while k <= 12:
-        t_index = np.where(month == k)[0]
-
-        (corrected_var_one[t_index], var_one_outlier_count) = modified_z_score_outlier_detection(var_one[t_index])
-        (corrected_var_two[t_index], var_two_outlier_count) = modified_z_score_outlier_detection(var_two[t_index])
-
-        var_one_total_outliers = var_one_total_outliers + var_one_outlier_count
-        var_two_total_outliers = var_two_total_outliers + var_two_outlier_count
-        k += 1
+    # Both variables are scored against the median and median absolute deviation of their month in one call
+    (cleaned_values, monthly_outlier_counts) = grouped_modified_z_score_outlier_detection(
+        month_groups(month), np.vstack((var_one, var_two)))
+    (corrected_var_one, corrected_var_two) = cleaned_values
+    (var_one_total_outliers, var_two_total_outliers) = monthly_outlier_counts.sum(axis=1)
 
     # check to make sure TMin isn't getting double-corrected
     if var_one_name == "Temperature Minimum":
@@ -266,7 +326,86 @@ def temp_find_outliers(log_writer, var_one, var_one_name, var_two, var_two_name,
         return corrected_var_one, corrected_var_two
 
 
-def rh_yearly_percentile_corr(log_writer, start, end, rhmax, rhmin, year, percentage):
+def rolling_modified_z_score_outlier_detection(doy, values, half_width):
+    """
+    Performs modified_z_score_outlier_detection() against a centered window of days of year instead of a fixed group,
+    for one or many variables, so each observation is scored against the median and median absolute deviation of all
+    observations within half_width days of its day of year across every year of the record.
+
+    Args:
+        :doy: (ndarray) 1-D array of day of year values
+        :values: (ndarray) 1-D array of values, or 2-D array of (variables x observations)
+        :half_width: (int) number of days of year on each side of the center day included in the window
+
+    Returns:
+        :cleaned_values: (ndarray) copy of values that has had outliers removed
+        :outlier_counts: (int or ndarray) number of outliers removed, an int for 1-D values or (variables) for 2-D
+    """
+    threshold = 3.5
+    cleaned_values = np.array(values)
+    stacked = np.atleast_2d(cleaned_values)
+    doy_index = np.asarray(doy) - 1
+
+    outlier_counts = np.zeros(stacked.shape[0], dtype=int)
+    for (row, variable) in enumerate(stacked):
+        (medians, median_absolute_deviations) = rolling_doy_median_mad(doy, variable, half_width)
+
+        # nans in data give invalid values, and a median absolute deviation of 0 divides by zero
+        with np.errstate(divide='ignore', invalid='ignore'):
+            modified_z_scores = 0.6745 * (variable - medians[doy_index]) / median_absolute_deviations[doy_index]
+        outliers = np.abs(modified_z_scores) > threshold
+
+        variable[outliers] = np.nan  # set those indices to nan
+        outlier_counts[row] = np.count_nonzero(outliers)
+
+    return cleaned_values, int(outlier_counts[0]) if np.ndim(values) == 1 else outlier_counts
+
+
+def seasonal_find_outliers(log_writer, var_one, var_one_name, var_two, var_two_name, doy, half_width):
+    """
+    Wrapper function for rolling_modified_z_score_outlier_detection() that will process provided temperature, wind
+    speed, or humidity variables. Unlike temp_find_outliers() the record is not split into months, each observation is
+    scored against a window of days of year centered on its own day, so observations near the start and end of a month
+    are compared against the climate around them.
+
+    Args:
+        :log_writer: Wrapper for writing to log file
+        :var_one: (ndarray) 1-D array of first variable
+        :var_one_name: (str) name for var one
+        :var_two: (ndarray) 1-D array of second variable, may be entirely NaN
+        :var_two_name: (str) name for var two, None if there is no second variable
+        :doy: (ndarray) 1-D array of day of year values
+        :half_width: (int) number of days of year on each side of the center day included in the window
+
+    Returns:
+        :corrected_var_one: (ndarray) 1-D array of first variable after data was removed
+        :corrected_var_two: (ndarray) 1-D array of second variable after data was removed
+    """
+    log_writer.write('User has opted to use a rolling seasonal modified z-score approach to identify and remove '
+                     'outliers, with a window of {0} days on each side of each day of year. \n'.format(half_width))
+
+    (cleaned_values, outlier_counts) = rolling_modified_z_score_outlier_detection(
+        doy, np.vstack((var_one, var_two)), half_width)
+    (corrected_var_one, corrected_var_two) = cleaned_values
+    (var_one_outliers, var_two_outliers) = outlier_counts
+
+    # check to make sure TMin isn't getting double-corrected
+    if var_one_name == "Temperature Minimum":
+        print('Temperature Minimum is corrected as part of Temperature Maximum / Temperature Minimum.')
+        log_writer.write('Temperature Minimum is corrected as part of Temperature Maximum / Temperature Minimum. \n')
+        corrected_var_one = var_one
+    else:
+        print('{0} outliers were removed on variable {1}.'.format(var_one_outliers, var_one_name))
+        log_writer.write('{0} outliers were removed on variable {1}. \n'.format(var_one_outliers, var_one_name))
+
+    if var_two_name is not None:
+        print('{0} outliers were removed on variable {1}.'.format(var_two_outliers, var_two_name))
+        log_writer.write('{0} outliers were removed on variable {1}. \n'.format(var_two_outliers, var_two_name))
+
+    return corrected_var_one, corrected_var_two
+
+
+def rh_yearly_percentile_corr(log_writer, start, end, rhmax, rhmin, year, percentage, in_place=False):
     """
     Performs a year-based percentile correction on relative humidity, works on the assumption that,
     in areas with significant agriculture, every year should have at least a few observations
@@ -282,6 +421,7 @@ def rh_yearly_percentile_corr(log_writer, start, end, rhmax, rhmin, year, percen
         :rhmin: (ndarray) 1-D array of rhmin
         :year: (ndarray) 1-D array of year values
         :percentage: (int) what top yearly percentage of observations user wants to base correction on
+        :in_place: (bool) if True the interval of rhmax and rhmin is corrected in place instead of copying them
 
     Returns:
         :corr_rhmax: (ndarray) 1-D array of rhmax values after correction is applied
@@ -290,85 +430,45 @@ def rh_yearly_percentile_corr(log_writer, start, end, rhmax, rhmin, year, percen
 
     # Obtain sample size from percentage value provided
     percentage_sample_size = np.floor(100/percentage)
-    # ID unique years in data set
-    unique_years = np.unique(year)
-    corr_sample_per_year = np.zeros(unique_years.size)
-    rh_corr_per_year = np.zeros(unique_years.size)
-
-    corr_rhmax = np.array(rhmax)
-    corr_rhmin = np.array(rhmin)
+    # ID unique years in data set, and the year of each day
+    (unique_years, year_index) = np.unique(year, return_inverse=True)
+    year_groups = make_groups(year_index, unique_years.size)
+
+    # The factors are applied one day at a time from the original values, so correcting in place is safe
+    corr_rhmax = rhmax if in_place else np.array(rhmax)
+    corr_rhmin = rhmin if in_place else np.array(rhmin)
+
+    # find the required number of days to sample each year by dividing the size of the year by percent_sample_size
+    days_per_year = grouped_count(year_groups, rhmax)
+    corr_sample_per_year = np.maximum(np.floor(days_per_year / percentage_sample_size).astype(int), 1)
+
+    # Sort the values of each year, which leaves the largest values of each year at the end of its valid values
+    sorted_rhmax = rhmax[year_groups.order]
+    for k in range(year_groups.n_groups):
+        sorted_rhmax[year_groups.offsets[k]:year_groups.offsets[k + 1]].sort()
+
+    # The correction factor of each year is 100 divided by the mean of its largest values, the factors are computed in
+    # batches of the years that share a sample size, and years without any values have no correction factor
+    rh_corr_per_year = np.full(unique_years.size, np.nan)
+    years_end = year_groups.offsets[:-1] + days_per_year
+    for sample_size in np.unique(corr_sample_per_year[days_per_year > 0]).tolist():
+        sample_years = np.flatnonzero((corr_sample_per_year == sample_size) & (days_per_year > 0))
+        sample_indexes = (years_end[sample_years] - sample_size)[:, np.newaxis] + np.arange(sample_size)
+        rh_corr_per_year[sample_years] = 100 / (sorted_rhmax[sample_indexes].sum(axis=1) / sample_size)
 
     for k in range(unique_years.size):
-        t_index = np.where(year == unique_years[k])[0]
-        t_index = np.array(t_index)
-
-        rh_year = np.array(rhmax[t_index])
-        rh_year = rh_year[~np.isnan(rh_year)]
-
-        # find the required number of days to sample each year by dividing the size of the year by percent_sample_size
-        corr_sample_per_year[k] = int(np.floor((rh_year.size / percentage_sample_size)))
-        if corr_sample_per_year[k] < 1:
-            corr_sample_per_year[k] = 1
-        else:
-            pass
-
-        rh_year_sorted = rh_year.argsort()
-        rh_values_to_pull = int(corr_sample_per_year[k])
-        rh_sample_indexes = rh_year_sorted[-rh_values_to_pull:]
-        rh_corr_per_year[k] = 100 / np.nanmean(rh_year[rh_sample_indexes])
-
         print("{0} days were included in year {1} of the RH correction process."
-              .format(rh_year.size, unique_years[k]))
-
-    # Check to see if the years are lined up, Ex. data file starts in 2001 but correction starts in 2004
-    offset = 0
-    if start != 0:  # If the start of the interval is at 0 then we're already lined up
-        align_bool = 1
-        while align_bool == 1:
-            if year[start] != unique_years[offset]:
-                offset += 1
-            else:
-                align_bool = 0
-    else:
-        pass
-
-    # Now we apply the correction to both RHmax and RHmin
-    rhmax_cutoff = 0  # tracks number of observations corrected above 100%
-    rhmin_cutoff = 0  # tracks number of observations corrected above 100%
-    invert_max_min_cutoff = 0  # tracks the number of times RHmax was less than RHmin (as an initial problem w/ data)
-    for i in range(start, end):
-        if unique_years[offset] == year[i]:  # Years are aligned
-            corr_rhmax[i] = rhmax[i] * rh_corr_per_year[offset]
-            corr_rhmin[i] = rhmin[i] * rh_corr_per_year[offset]
-        else:
-            # Encountered last day of year, increment to next correction year and continue
-            offset += 1
-            corr_rhmax[i] = rhmax[i] * rh_corr_per_year[offset]
-            corr_rhmin[i] = rhmin[i] * rh_corr_per_year[offset]
-
-        # Check for corrected values exceeding 100%
-        if corr_rhmax[i] > 100:
-            corr_rhmax[i] = 100
-            rhmax_cutoff += 1
-        elif corr_rhmax[i] <= 0:  # This should never really happen but need to control for it anyway.
-            corr_rhmax[i] = 1
-        else:
-            pass
+              .format(days_per_year[k], unique_years[k]))
 
-        if corr_rhmin[i] > 100:
-            corr_rhmin[i] = 100
-            rhmin_cutoff += 1
-        elif corr_rhmin[i] <= 0:  # This should never really happen but need to control for it anyway
-            corr_rhmin[i] = 1
-        else:
-            pass
+    # Each day uses the factor of its own year
+    day_factors = rh_corr_per_year[year_index[start:end]]
 
-        if corr_rhmax[i] < corr_rhmin[i]:
-            corr_rhmax[i] = np.nan
-            corr_rhmin[i] = np.nan
-            invert_max_min_cutoff += 1
-        else:
-            pass
+    # Now we apply the correction to both RHmax and RHmin
+    # rhmax_cutoff and rhmin_cutoff track the number of observations corrected above 100%, invert_max_min_cutoff
+    # tracks the number of times RHmax was less than RHmin (as an initial problem w/ data)
+    (rhmax_cutoff, rhmin_cutoff, invert_max_min_cutoff) = kernels.\
+        rh_apply_year_factors(rhmax[start:end], rhmin[start:end], corr_rhmax[start:end], corr_rhmin[start:end],
+                              day_factors)
 
     print("\n" + str(rhmax_cutoff) + " RHMax data points were removed for exceeding the logical limit of 100%.")
     print("\n" + str(rhmin_cutoff) + " RHMin data points were removed for exceeding the logical limit of 100%.")
@@ -381,7 +481,7 @@ def rh_yearly_percentile_corr(log_writer, start, end, rhmax, rhmin, year, percen
     return corr_rhmax, corr_rhmin
 
 
-def rs_period_ratio_corr(log_writer, start, end, rs, rso, sample_size_per_period, period):
+def rs_period_ratio_corr(log_writer, start, end, rs, rso, sample_size_per_period, period, in_place=False):
     """
     This function corrects rs by applying a correction factor (a ratio of clear-sky solar radiation (rso) over
     observed solar radiation (rs)) to each user defined period to counteract sensor drift and other errors.
@@ -450,247 +550,83 @@ def rs_period_ratio_corr(log_writer, start, end, rs, rso, sample_size_per_period
         :rso: (ndarray) 1-D numpy array of rso
         :sample_size_per_period: (int) number of points in each period correction factors are calculated with
         :period: (int) length of each correction period within the user-specified interval
+        :in_place: (bool) if True the interval of rs is corrected in place instead of copying it
 
     Returns:
         :corr_rs: (ndarray) 1-D array of corrected rs values
         :rso: (ndarray) 1-D array, not actually changed, is returned for consistent behavior in main qaqc function.
     """
 
-    corr_rs = np.array(rs)  # corrected variable that all the corrections are going to be written to
-    insufficient_period_counter = 0  # counter for the number of periods that were removed due to insufficient data
-    insufficient_data_counter = 0  # counter for the number of rs data points that were removed due to insufficient data
-    bad_vals_counter = 0  # counter for bad vals like voltage shorts, datalogger errors, etc.
-
-    # Determining correction factor for intervals based on pre-defined periods
-    num_periods = int(math.ceil((end - start) / period))
-    rs_period = np.zeros(period)
-    rso_period = np.zeros(period)
-    period_corr = np.zeros(num_periods)
-
-    # Placing intervals in separate array for easy handling
-    rs_interval = np.array(rs[start:end])
-    rso_interval = np.array(rso[start:end])
-    cleaned_rs_interval = np.array([])  # used to recreate interval of rs that will track the removal of bad obs
-
-    # separate the interval into predefined periods and compute correction
-    interval_index = 0  # index for full correction interval
-    within_period_index = 0  # index for within each period
-    num_period_index = 0  # index for number of periods
-    while interval_index < len(rs_interval):
-
-        # If statement to handle being at the end of the period, or at the end of the overall correction interval
-        if ((within_period_index < period) and interval_index == len(rs_interval) - 1) or within_period_index == period:
-
-            if within_period_index < period:  # We are dealing with the final period
-                rs_period[within_period_index] = rs_interval[interval_index]
-                rso_period[within_period_index] = rso_interval[interval_index]
-
-                # each period's data is overwritten by the subsequent period's data, because the final period may not
-                # have 60 days, chop off remaining days that have values from previous period.
-                rs_period = rs_period[:within_period_index-(period-1)].copy()
-                rso_period = rso_period[:within_period_index-(period-1)].copy()
-                interval_index += 1  # increment by 1 to end the loop after this iteration
-            else:  # We have reached the end of a period, no special treatment needed
-                pass
-
-            # Now that we are at the end of a period or finishing up the last period,
-            # we check for the existence of potential bad values
-            period_ratios = np.divide(rs_period, rso_period)
-            period_ratios_copy = np.array(period_ratios)  # make a copy, we remove largest val to find the next largest
-            max_ratio_indexes = []  # tracks the indexes of the maximum values found
-
-            invalid_period = 0  # boolean flag to specify if this period has the data necessary to calculate corr factor
-            bad_vals_loop = 1  # boolean flag to specify if we should keep checking for bad values or not
-
-            # First, check to see if there are non-nan values present
-            # and the period has at least the sample size in days present
-            # and pull the 6 largest ratios to serve as the initial correction factor.
-            if np.any(np.isfinite(period_ratios_copy)) and np.size(period_ratios_copy) >= sample_size_per_period:
-                for i in range(sample_size_per_period):  # loop through and return enough largest non nan values
-                    max_ratio_indexes.append(np.nanargmax(period_ratios_copy))
-                    period_ratios_copy[np.nanargmax(period_ratios_copy)] = np.nan  # set to nan to find next largest
-
-                    if np.any(np.isfinite(period_ratios_copy)):  # are any non-nan values still present?
-                        # Yes, continue to find next largest value
-                        pass
-                    else:
-                        # only nans are left, have to quit loop and throw out the data
-                        invalid_period = 1
-                        bad_vals_loop = 0
-                        print('\nA period was thrown out due to insufficient data, failed finding valid point # %s '
-                              ' out of the required %s.' % (i + 1, sample_size_per_period))
-                        break
-            else:
-                # there is not enough data in this final period to compute correction data
-                print('\nA period was thrown out due to insufficient data, either because it had no valid ratios,'
-                      'or because it had less than %s days.' % sample_size_per_period)
-                invalid_period = 1
-                bad_vals_loop = 0
-
-            # Start a loop that remains true as long as none of the ending conditions are met while iterating down
-            # the rest of the values until reasonably sure that remaining points don't massively shift the data
-            cf_index_start = 0
-            cf_index_end = cf_index_start + sample_size_per_period  # ending index is not inclusive
-            new_cf_index_start = cf_index_start + 1
-            new_cf_index_end = cf_index_end + 1
-            while bad_vals_loop == 1:
-
-                if np.any(np.isfinite(period_ratios_copy)) and np.size(period_ratios_copy) >= sample_size_per_period:
-                    max_ratio_indexes.append(np.nanargmax(period_ratios_copy))
-                    period_ratios_copy[np.nanargmax(period_ratios_copy)] = np.nan  # set to nan to find next largest
-
-                else:
-                    # only nans are left, end the loop and set the period as invalid
-                    # this is under the logic that if we've iterated through all points without finding a
-                    # value that seems okay then something is obviously wrong with this period.
-                    invalid_period = 1
-                    bad_vals_loop = 0
-                    print('\nA period was thrown out due to failing to find a sufficient '
-                          'number of valid values when testing for bad values.')
-
-                rs_avg = np.nanmean(rs_period[max_ratio_indexes[cf_index_start:cf_index_end]])
-                rso_avg = np.nanmean(rso_period[max_ratio_indexes[cf_index_start:cf_index_end]])
-
-                new_rs_avg = np.nanmean(rs_period[max_ratio_indexes[new_cf_index_start:new_cf_index_end]])
-                new_rso_avg = np.nanmean(rso_period[max_ratio_indexes[new_cf_index_start:new_cf_index_end]])
-
-                # Example: if current_cf uses largest points 0-5, new_cf uses largest points 1-6 (omitting the largest)
-                current_cf = rso_avg / rs_avg  # current correction factor from currently used points
-                new_cf = new_rso_avg / new_rs_avg  # exploratory correction factor used to check for large changes
-                diff_cf = new_cf - current_cf
-                percent_diff_cf = (diff_cf / current_cf) * 100
-
-                # First of the two rules used to check for the existence of bad values, the logic is that if
-                # removing the largest point causes over a 2% change in the correction factor (which is an average of
-                # six largest points) then that point carried an undue influence and is a likely bad value
-                # We only need to care if Rs_average is above Rso_average
-                if percent_diff_cf >= 2.0 and rs_avg > rso_avg:
-                    new_cf_significant_change = True
-                else:
-                    new_cf_significant_change = False
-
-                # Second of the two rules used to check for the existence of bad values is if Rs average
-                # is sufficiently larger than rso average. This would occur with many  bad values with consistent values
-                # this should occur very infrequently
-                if (rs_avg - rso_avg) >= 75:
-                    rs_avg_greatly_exceeds_rso_avg = True
-                else:
-                    rs_avg_greatly_exceeds_rso_avg = False
-
-                # Now we see if either of the two rules were violated
-                if new_cf_significant_change or rs_avg_greatly_exceeds_rso_avg:
-                    # at least one of the rules were violated, so continue forward with the next iteration
-
-                    # check for the rarer rule occurring:
-                    if not new_cf_significant_change and rs_avg_greatly_exceeds_rso_avg:
-                        print('\nWARNING: The rule for rs greatly exceeding rso was triggered without triggering the'
-                              ' significant change to correction factor rule. Look at the data to make sure the data'
-                              ' has a lot of bad values. Period was {} starting around {} and ending around {}. \n'
-                              .format(num_period_index, (interval_index - period), interval_index))
-
-                    # increment indexes and keep iterating for more bad values
-                    cf_index_start += 1
-                    cf_index_end = cf_index_start + sample_size_per_period  # ending index is not inclusive
-                    new_cf_index_start = cf_index_start + 1
-                    new_cf_index_end = cf_index_end + 1
-
-                    bad_vals_counter += 1
-                else:
-                    # if neither of the two rules were violated, we can proceed with the assumption that all likely
-                    # bad values have been removed, and we use the current_cf as the correction factor
-                    bad_vals_loop = 0
-
-            if invalid_period != 1:  # period has valid data to compute correction factor
-                rs_avg = np.nanmean(rs_period[max_ratio_indexes[cf_index_start:cf_index_end]])
-                rso_avg = np.nanmean(rso_period[max_ratio_indexes[cf_index_start:cf_index_end]])
-
-                period_corr[num_period_index] = rso_avg / rs_avg  # compute the correction factor
-
-                # Go through and set the rs points marked as likely bad values to a unique identifier to find later
-                rs_period[max_ratio_indexes[:cf_index_start]] = -12345
-
-            else:
-                # This period has insufficient data to correct, instead we will remove all points and track how many we
-                # remove
-                removed_points = np.count_nonzero(~np.isnan(rs_period))  # count number of points we're about to remove
-                rs_period[:] = np.nan  # insufficient data exists to correct this period, so set it to nan
-                period_corr[num_period_index] = np.nan
-                insufficient_period_counter += 1
-                insufficient_data_counter += removed_points
-                print('\nThis insufficient period contained %s datapoints for Rs, which have been set to nan.'
-                      % removed_points)
-
-            # add this period's rs data, which has had potentially bad values removed, to the new interval of rs
-            cleaned_rs_interval = np.append(cleaned_rs_interval, rs_period)
-
-            # adjust counters to move to next period, if this is the final period then does nothing.
-            within_period_index = 0
-            num_period_index += 1
-
-        elif within_period_index < period:
-            # haven't run out of data points, and period still hasn't been filled
-            rs_period[within_period_index] = rs_interval[interval_index]
-            rso_period[within_period_index] = rso_interval[interval_index]
-            interval_index += 1
-            within_period_index += 1
-
-        else:
-            # This should never happen
-            pass
+    # corrected variable that all the corrections are going to be written to, along with the original values of the
+    # interval since corr_rs is rs itself when correcting in place
+    corr_rs = rs if in_place else np.array(rs)
+    interval_rs = np.array(rs[start:end])
+
+    # separate the interval into predefined periods, each period is a row of a (periods x period) array with the
+    # final period, which may not have a full period of days, padded with nan
+    interval_length = end - start
+    num_periods = int(math.ceil(interval_length / period))
+    rs_periods = np.full(num_periods * period, np.nan)
+    rso_periods = np.full(num_periods * period, np.nan)
+    rs_periods[:interval_length] = interval_rs
+    rso_periods[:interval_length] = rso[start:end]
+    rs_periods = rs_periods.reshape(num_periods, period)
+    rso_periods = rso_periods.reshape(num_periods, period)
+    period_lengths = np.minimum(period, interval_length - np.arange(num_periods) * period)
+
+    # compute the correction factor of every period, along with the likely bad values (voltage shorts, datalogger
+    # errors, etc.) identified in each of them
+    (period_corr, period_bad_vals, period_status, status_detail, period_warnings, bad_value_mask) = kernels.\
+        rs_search_periods(rs_periods, rso_periods, period_lengths, sample_size_per_period)
+    invalid_periods = period_status != kernels.PERIOD_VALID
+    removed_points = np.count_nonzero(~np.isnan(rs_periods), axis=1)  # number of points in each period
+
+    bad_vals_counter = int(period_bad_vals.sum())  # counter for bad vals like voltage shorts, datalogger errors, etc.
+    insufficient_period_counter = int(np.count_nonzero(invalid_periods))  # periods removed due to insufficient data
+    insufficient_data_counter = int(removed_points[invalid_periods].sum())  # rs points removed due to insufficient data
+
+    # report on every period that was thrown out or raised a warning, in order
+    for num_period_index in np.flatnonzero(invalid_periods | (period_warnings > 0)):
+        period_end = min((num_period_index + 1) * period, interval_length)
+        if period_status[num_period_index] == kernels.PERIOD_INSUFFICIENT:
+            # there is not enough data in this final period to compute correction data
+            print('\nA period was thrown out due to insufficient data, either because it had no valid ratios,'
+                  'or because it had less than %s days.' % sample_size_per_period)
+        elif period_status[num_period_index] == kernels.PERIOD_SAMPLE_FAILED:
+            # only nans are left, have to throw out the data
+            print('\nA period was thrown out due to insufficient data, failed finding valid point # %s '
+                  ' out of the required %s.' % (status_detail[num_period_index], sample_size_per_period))
+
+        rs_warning = '\nWARNING: The rule for rs greatly exceeding rso was triggered without triggering the' \
+                     ' significant change to correction factor rule. Look at the data to make sure the data' \
+                     ' has a lot of bad values. Period was {} starting around {} and ending around {}. \n' \
+            .format(num_period_index, (period_end - period), period_end)
+        for _ in range(period_warnings[num_period_index]):
+            print(rs_warning)
+
+        if period_status[num_period_index] == kernels.PERIOD_SEARCH_FAILED:
+            # this is under the logic that if we've iterated through all points without finding a
+            # value that seems okay then something is obviously wrong with this period.
+            print('\nA period was thrown out due to failing to find a sufficient '
+                  'number of valid values when testing for bad values.')
+            if status_detail[num_period_index]:
+                print(rs_warning)
+
+        if invalid_periods[num_period_index]:
+            print('\nThis insufficient period contained %s datapoints for Rs, which have been set to nan.'
+                  % removed_points[num_period_index])
+
+    # set the rs points marked as likely bad values to a unique identifier to find later, and remove all points of
+    # periods that have insufficient data to correct
+    rs_periods[bad_value_mask] = kernels.BAD_VALUE_MARKER
+    rs_periods[invalid_periods] = np.nan
+    cleaned_rs_interval = rs_periods.ravel()[:interval_length]
 
     # Now that the correction factor has been computed for each period, we now step through each period again and
     # apply those correction factors
     corr_rs[start:end] = cleaned_rs_interval[:]  # save all the values removed for suspect values/insufficient data
-    correction_cutoff_counter = 0
-    rso_clipping_counter = 0
-    unchanged_data_counter = 0
-    x = start  # index that tracks along data points for the full selected correction interval
-    y = 0  # index that tracks how far along a period we are
-    z = 0  # index that tracks which correction period we are in
-    while x < len(rs) and x < end and z < len(period_corr):
-        # x is less than the length of var1 to prevent OOB,
-        # and is before or at the end of the correction interval,
-        # and we have not yet run out of correction periods
-        # and capping correction by a fifty percent increase or decrease
-        if y <= period:
-            # if y is less than the size of a correction period
-
-            # Check to see if rs correction factor is smaller than a 50% relative increase or decrease
-            # if it is larger than that we will remove it for a later fill with Rs_TR
-            if 0.50 <= period_corr[z] <= 1.50:
-
-                # was the current rs point removed for being a potentially bad value?
-                # if so, set it to 1.05*Rso and leave it there (do not later clip it)
-                if corr_rs[x] == -12345:
-                    corr_rs[x] = rso[x] * 1.05
-
-                else:
-                    if 0.97 <= period_corr[z] <= 1.03:
-                        # don't change the data under the assumption that the sensor is working
-                        unchanged_data_counter += 1
-                    else:
-                        # apply the correction to the data
-                        corr_rs[x] = rs[x] * period_corr[z]
-
-                    if corr_rs[x] > (rso[x] * 1.03):  # Check to see if Rs now sufficiently exceeds rso for clipping
-                        corr_rs[x] = rso[x]
-                        rso_clipping_counter += 1
-                    else:  # no special action needed
-                        pass
-
-            elif np.isnan(period_corr[z]):
-                # This data was already set to nan during the steps above, so pass
-                pass
-            else:
-                # correction factor would be too high, so throw out the data
-                corr_rs[x] = np.nan
-                correction_cutoff_counter += 1
-            x += 1
-            y += 1
-        else:
-            # We have reached the end of the correction period, go to next period
-            y = 1
-            z += 1
+    (unchanged_data_counter, rso_clipping_counter, correction_cutoff_counter) = kernels.\
+        rs_apply_period_factors(interval_rs, rso[start:end], corr_rs[start:end], period_corr, period)
 
     print('\n%s data points were removed as part of the suspect values evaluation process. \n' % bad_vals_counter)
     print('\n%s Rs data points were removed due to their correction factor exceeding a '
@@ -721,7 +657,226 @@ def rs_period_ratio_corr(log_writer, start, end, rs, rso, sample_size_per_period
     return corr_rs, rso
 
 
-def correction(station, log_path, folder_path, var_one, var_two, dt_array, month, year, code, auto_corr=0):
+def correction_methods(code):
+    """
+    Lists the correction methods available for a code, in the order of the options of the correction menu
+
+    Args:
+        :code: (int) integer code that indicates what type of data has been passed
+
+    Returns:
+        :methods: (list) names of the correction methods, option 1 is the first method
+    """
+    methods = ['additive', 'multiplicative', 'set_to_nan', OPTION_FOUR_METHODS.get(code, 'skip')]
+    if code in SEASONAL_OUTLIER_CODES:
+        methods.append('rolling_modified_z_score')
+    return methods
+
+
+def _prompt_correction_step(code, choice, start, end, auto_corr):
+    """
+    Obtains the parameters of the selected correction method from the user, or uses the recommended parameters
+    during the automatic first pass, and stores them as a correction step
+
+    Args:
+        :code: (int) integer code that indicates what type of data has been passed
+        :choice: (int) option of the correction menu selected by the user
+        :start: (int) starting index of correction interval
+        :end: (int) ending index of correction interval
+        :auto_corr: (int) flag for the "automatic first pass" mode
+
+    Returns:
+        :step: (dict) correction step, see apply_correction_step
+    """
+    step = {'method': correction_methods(code)[choice - 1], 'start': int(start), 'end': int(end)}
+
+    if step['method'] == 'additive':
+        step['modifier'] = get_float_input("\nEnter the additive modifier you want to apply to all values: ")
+    elif step['method'] == 'multiplicative':
+        step['modifier'] = get_float_input("\nEnter the multiplicative modifier you want to apply to all values: ")
+    elif step['method'] == 'rh_yearly_percentile':
+        if auto_corr != 0:
+            step['percentile'] = 1
+        else:
+            step['percentile'] = get_int_input(
+                1, 365,
+                '\nEnter which top percentile you want to base corrections on (rec. 1): ')
+    elif step['method'] == 'rs_period_ratio':
+        if auto_corr != 0:
+            step['period'] = 60
+            step['sample_size'] = 6
+        else:
+            step['period'] = get_int_input(
+                1, 365,
+                '\nEnter the number of days each correction period will last (rec. 60): ')
+            step['sample_size'] = get_int_input(
+                1, step['period'],
+                '\nEnter the number of points per period to correct based on (rec 6): ')
+    elif step['method'] == 'rolling_modified_z_score':
+        step['half_width'] = get_int_input(
+            0, 182,
+            '\nEnter the number of days on each side of each day of year to compare against (rec. 15): ')
+    else:
+        pass
+
+    return step
+
+
+def apply_correction_step(log_writer, step, var_one, var_two, dt_array, month, year, code, journal=None):
+    """
+    Applies a single correction step in place without prompting the user. Steps are created by correction() and saved
+    into correction recipes, so that the corrections of a reviewed station can be replayed with replay_correction().
+
+    Args:
+        :log_writer: Wrapper for writing to log file
+        :step: (dict) correction step, with the 'method' from correction_methods() and the 'start' and 'end' of its
+            interval, along with the parameters of the method listed in CORRECTION_PARAMETERS
+        :var_one: (ndarray) 1-D numpy array of first variable, corrected in place
+        :var_two: (ndarray) 1-D numpy array of second variable, may be all NaN, corrected in place
+        :dt_array: (ndarray) 1-D datetime array of the record
+        :month: (ndarray) 1-D numpy array of month values
+        :year: (ndarray) 1-D numpy array of year values
+        :code: (int) used to determine what variables are actually passed as var_one and var_two
+        :journal: (list) if provided, a JournalEntry holding the values the step replaces is appended to it
+    """
+    method = step.get('method')
+    if method not in correction_methods(code):
+        raise ValueError('\n\nCorrection method \'{0}\' is not available for {1}, expected one of {2}.'
+                         .format(method, FEATURES_DICT[code]['var_one_name'], correction_methods(code)))
+    missing_parameters = [key for key in ('start', 'end') + CORRECTION_PARAMETERS.get(method, ()) if key not in step]
+    if missing_parameters:
+        raise ValueError('\n\nCorrection step {0} is missing the parameters {1}.'.format(step, missing_parameters))
+    (start, end) = (step['start'], step['end'])
+    if not 0 <= start <= end <= var_one.shape[0]:
+        raise ValueError('\n\nCorrection interval from {0} to {1} is outside of the {2} day record.'
+                         .format(start, end, var_one.shape[0]))
+
+    if journal is not None:
+        # Only the values the step is about to change are kept
+        (entry_start, entry_end) = (0, var_one.shape[0]) if method in WHOLE_RECORD_METHODS else (start, end)
+        journal.append(JournalEntry(step, entry_start, entry_end, var_one[entry_start:entry_end].copy(),
+                                    var_two[entry_start:entry_end].copy()))
+
+    if method == 'additive':
+        additive_corr(log_writer, start, end, var_one, var_two, step['modifier'], in_place=True)
+    elif method == 'multiplicative':
+        multiplicative_corr(log_writer, start, end, var_one, var_two, step['modifier'], in_place=True)
+    elif method == 'set_to_nan':
+        set_to_nan(log_writer, start, end, var_one, var_two, in_place=True)
+    elif method == 'modified_z_score':
+        (var_one[:], var_two[:]) = temp_find_outliers(log_writer, var_one, FEATURES_DICT[code]['var_one_name'],
+                                                      var_two, FEATURES_DICT[code]['var_two_name'], month)
+    elif method == 'rh_yearly_percentile':
+        rh_yearly_percentile_corr(log_writer, start, end, var_one, var_two, year, step['percentile'], in_place=True)
+    elif method == 'rs_period_ratio':
+        rs_period_ratio_corr(log_writer, start, end, var_one, var_two, step['sample_size'], step['period'],
+                             in_place=True)
+    elif method == 'rolling_modified_z_score':
+        (var_one[:], var_two[:]) = seasonal_find_outliers(log_writer, var_one, FEATURES_DICT[code]['var_one_name'],
+                                                          var_two, FEATURES_DICT[code]['var_two_name'],
+                                                          split_dates(dt_array)[3], step['half_width'])
+    else:
+        # Data is either uz, precip, ea, or rhavg and user doesn't want to correct it.
+        log_writer.write('Selected correction interval started at %s and ended at %s. \n' % (start, end))
+        log_writer.write('User decided to skip this interval without correcting it. \n')
+
+
+def _swap_journal_entry(entry, var_one, var_two):
+    """
+    Undoes or redoes a journal entry by exchanging the values of its interval with the values it replaced, so that
+    only the interval is copied
+
+    Args:
+        :entry: (JournalEntry) operation of the correction journal to undo or redo
+        :var_one: (ndarray) 1-D numpy array of first variable, changed in place
+        :var_two: (ndarray) 1-D numpy array of second variable, changed in place
+
+    Returns:
+        :entry: (JournalEntry) the same operation, holding the values that were just replaced so it can be swapped back
+    """
+    replaced_one = var_one[entry.start:entry.end].copy()
+    replaced_two = var_two[entry.start:entry.end].copy()
+    var_one[entry.start:entry.end] = entry.replaced_one
+    var_two[entry.start:entry.end] = entry.replaced_two
+
+    return entry._replace(replaced_one=replaced_one, replaced_two=replaced_two)
+
+
+def _show_journal_entry(station, dt_array, entry, var_one, var_two, code, folder_path):
+    """
+    Shows the graph of the change made by the last application, undo, or redo of a journal entry. The values before
+    the change are only rebuilt from the entry to be plotted.
+
+    Args:
+        :station: (str) station name for saving files
+        :dt_array: (ndarray) 1-D datetime array used for bokeh plotting
+        :entry: (JournalEntry) operation of the correction journal that was just applied, undone, or redone
+        :var_one: (ndarray) 1-D numpy array of first variable after the change
+        :var_two: (ndarray) 1-D numpy array of second variable after the change
+        :code: (int) used to determine what variables are actually passed as var_one and var_two
+        :folder_path: (str) path to correction files directory
+    """
+    previous_var_one = np.array(var_one)
+    previous_var_two = np.array(var_two)
+    previous_var_one[entry.start:entry.end] = entry.replaced_one
+    previous_var_two[entry.start:entry.end] = entry.replaced_two
+
+    corr_fig = plotting_functions.variable_correction_plots(station, dt_array, previous_var_one, var_one,
+                                                            previous_var_two, var_two, code, folder_path)
+    show(corr_fig)
+
+
+def _write_correction_header(log_writer, code):
+    """
+    Writes the names of the variables being corrected and the current time to the log file
+
+    Args:
+        :log_writer: Wrapper for writing to log file
+        :code: (int) used to determine what variables are being corrected
+    """
+    if FEATURES_DICT[code]['var_two_name'] is None:
+        log_writer.write('\n\nCorrecting %s at %s. \n'
+                         % (FEATURES_DICT[code]['var_one_name'], dt.datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+    else:
+        log_writer.write('\n\nCorrecting %s and %s at %s. \n'
+                         % (FEATURES_DICT[code]['var_one_name'], FEATURES_DICT[code]['var_two_name'],
+                            dt.datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+
+
+def replay_correction(log_path, var_one, var_two, dt_array, month, year, code, steps):
+    """
+    Non-interactive counterpart of correction(), applies the correction steps of a recipe in order without prompting
+    the user or opening any graphs. Each step is applied to the result of the step before it.
+
+    Args:
+        :log_path: (str) path to log file
+        :var_one: (ndarray) 1-D numpy array of first variable passed
+        :var_two: (ndarray) 1-D numpy array of second variable, may be all NaN
+        :dt_array: (ndarray) 1-D datetime array of the record
+        :month: (ndarray) 1-D numpy array of month values
+        :year: (ndarray) 1-D numpy array of year values
+        :code: (int) used to determine what variables are actually passed as var_one and var_two
+        :steps: (list) correction steps to apply, see apply_correction_step
+
+    Returns:
+        :corr_var_one: (ndarray) 1-D numpy array of corrected var_one values
+        :corr_var_two: (ndarray) 1-D numpy array of corrected var_two values
+    """
+    corr_var_one = np.array(var_one)
+    corr_var_two = np.array(var_two)
+
+    with open(log_path, 'a') as corr_log:
+        _write_correction_header(corr_log, code)
+        corr_log.write('Corrections are being replayed from a correction recipe. \n')
+        for step in steps:
+            apply_correction_step(corr_log, step, corr_var_one, corr_var_two, dt_array, month, year, code)
+        corr_log.write('---> Finished replaying {0} correction steps. \n'.format(len(steps)))
+
+    return corr_var_one, corr_var_two
+
+
+def correction(station, log_path, folder_path, var_one, var_two, dt_array, month, year, code, auto_corr=0,
+               recipe_steps=None):
     """
     This main qaqc function takes in two variables and, depending on the code provided, enables different
     correction methods for the user to use to correct data. This function serves as the
@@ -743,6 +898,8 @@ def correction(station, log_path, folder_path, var_one, var_two, dt_array, month
         :year: (ndarray) 1-D numpy array of year values
         :code: (int) used to determine what variables are actually passed as var_one and var_two
         :auto_corr: (int) flag for the "automatic first pass" mode, which auto-applies default correction first
+        :recipe_steps: (list) if provided, the correction steps that were kept are appended to it so that the session
+            can be replayed with replay_correction()
 
     Returns:
         :corr_var_one: (ndarray) 1-D numpy array of corrected var_one values
@@ -751,22 +908,18 @@ def correction(station, log_path, folder_path, var_one, var_two, dt_array, month
     correction_loop = 1
     first_pass = 1  # boolean flag for whether it is the first pass, used in automation with auto_corr
     var_size = var_one.shape[0]
-    backup_var_one = np.array(var_one)
-    backup_var_two = np.array(var_two)
+    # Corrections are applied in place to a single working copy, var_one and var_two keep the original values. The
+    # journal holds only the values each correction replaced, so undoing, redoing, and starting over swap intervals.
     corr_var_one = np.array(var_one)
     corr_var_two = np.array(var_two)
+    journal = []  # corrections applied since the start, or since the user last started over
+    undone_journal = []  # corrections that were undone and can be redone, the most recently undone last
 
     ####################
     # Reopen log file and append correction actions taken to it.
     log.basicConfig()
     corr_log = open(log_path, 'a')
-    if FEATURES_DICT[code]['var_two_name'] is None:
-        corr_log.write('\n\nCorrecting %s at %s. \n'
-                       % (FEATURES_DICT[code]['var_one_name'], dt.datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
-    else:
-        corr_log.write('\n\nCorrecting %s and %s at %s. \n'
-                       % (FEATURES_DICT[code]['var_one_name'], FEATURES_DICT[code]['var_two_name'],
-                          dt.datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+    _write_correction_header(corr_log, code)
 
     ####################
     # Generate Before-Corrections Graph
@@ -792,101 +945,222 @@ def correction(station, log_path, folder_path, var_one, var_two, dt_array, month
             (int_start, int_end) = generate_interval(var_size)
 
         (choice, first_pass) = _generate_corr_menu(code, auto_corr, first_pass)
-
-        if choice == 1:
-            (corr_var_one, corr_var_two) = additive_corr(corr_log, int_start, int_end, var_one, var_two)
-        elif choice == 2:
-            (corr_var_one, corr_var_two) = multiplicative_corr(corr_log, int_start, int_end, var_one, var_two)
-        elif choice == 3:
-            (corr_var_one, corr_var_two) = set_to_nan(corr_log, int_start, int_end, var_one, var_two)
-        elif choice == 4 and (code == 1 or code == 2):
-            (corr_var_one, corr_var_two) = temp_find_outliers(corr_log, var_one, FEATURES_DICT[code]['var_one_name'],
-                                                              var_two, FEATURES_DICT[code]['var_two_name'], month)
-        elif choice == 4 and code == 8:
-            if auto_corr != 0:
-                corr_percentile = 1
-            else:
-                corr_percentile = get_int_input(
-                    1, 365,
-                    '\nEnter which top percentile you want to base corrections on (rec. 1): ')
-
-            (corr_var_one, corr_var_two) = rh_yearly_percentile_corr(corr_log, int_start, int_end, var_one, var_two,
-                                                                     year, corr_percentile)
-        elif choice == 4 and code == 5:
-            if auto_corr != 0:
-                corr_period = 60
-                corr_sample = 6
-            else:
-                corr_period = get_int_input(
-                    1, 365,
-                    '\nEnter the number of days each correction period will last (rec. 60): ')
-                corr_sample = get_int_input(
-                    1, corr_period,
-                    '\nEnter the number of points per period to correct based on (rec 6): ')
-
-            (corr_var_one, corr_var_two) = rs_period_ratio_corr(corr_log, int_start, int_end, var_one, var_two,
-                                                                corr_sample, corr_period)
-
-        elif choice == 4 and (code == 3 or code == 4 or code == 7 or code == 9):
-            # Data is either uz, precip, ea, or rhavg and user doesn't want to correct it.
-            corr_log.write('Selected correction interval started at %s and ended at %s. \n' % (int_start, int_end))
-            corr_log.write('User decided to skip this interval without correcting it. \n')
-        else:
-            # Shouldn't happen, raise an error
-            raise ValueError('Unsupported code type {0} and choice type {1} passed to qaqc_functions.'
-                             .format(code, choice))
+        step = _prompt_correction_step(code, choice, int_start, int_end, auto_corr)
+        apply_correction_step(corr_log, step, corr_var_one, corr_var_two, dt_array, month, year, code, journal)
+        undone_journal = []  # a new correction replaces the corrections that could have been redone
 
         # Generate After-Corrections Graph
-        corr_fig = plotting_functions.variable_correction_plots(station, dt_array, var_one, corr_var_one, var_two,
-                                                                corr_var_two, code, folder_path)
-        show(corr_fig)
+        _show_journal_entry(station, dt_array, journal[-1], corr_var_one, corr_var_two, code, folder_path)
 
         if auto_corr == 1 or auto_corr == 0:
             auto_corr = 0  # set to 0 to prevent another automatic correction loop
 
-        # Determine if user wants to keep correcting
-        print('\nAre you done correcting?'
-              '\n   Enter 1 for yes.'
-              '\n   Enter 2 for another iteration.'
-              '\n   Enter 3 to start over.'
-              '\n   Enter 4 to discard all changes.')
-
-        choice = get_int_input(1, 4, "Enter your selection: ")
+        # Determine if user wants to keep correcting, undoing and redoing return to this menu
+        choice = 0
+        while choice == 0:
+            print('\nAre you done correcting?'
+                  '\n   Enter 1 for yes.'
+                  '\n   Enter 2 for another iteration.'
+                  '\n   Enter 3 to start over.'
+                  '\n   Enter 4 to discard all changes.'
+                  '\n   Enter 5 to undo the last correction.'
+                  '\n   Enter 6 to redo the last undone correction.')
+
+            choice = get_int_input(1, 6, "Enter your selection: ")
+
+            if choice == 5 or choice == 6:
+                (source, target) = (journal, undone_journal) if choice == 5 else (undone_journal, journal)
+                if source:
+                    target.append(_swap_journal_entry(source.pop(), corr_var_one, corr_var_two))
+                    corr_log.write('---> User has elected to {0} the {1} correction from {2} to {3}. \n'
+                                   .format('undo' if choice == 5 else 'redo', target[-1].step['method'],
+                                           target[-1].step['start'], target[-1].step['end']))
+                    _show_journal_entry(station, dt_array, target[-1], corr_var_one, corr_var_two, code, folder_path)
+                else:
+                    print('\nThere are no corrections to {0}.'.format('undo' if choice == 5 else 'redo'))
+                choice = 0
 
         if choice == 1:
             correction_loop = 0
             corr_log.write('---> User has elected to end corrections. \n')
         elif choice == 2:
-            var_one = np.array(corr_var_one)
-            var_two = np.array(corr_var_two)
             corr_log.write('---> User has elected to do another iteration of corrections. \n')
-        elif choice == 3:
-            var_one = np.array(backup_var_one)
-            var_two = np.array(backup_var_two)
-            corr_var_one = np.array(backup_var_one)
-            corr_var_two = np.array(backup_var_two)
-            corr_log.write('---> User has elected to ignore previous iterations of corrections and start over. \n')
         else:
-            correction_loop = 0
-            corr_var_one = np.array(backup_var_one)
-            corr_var_two = np.array(backup_var_two)
-            corr_log.write('---> User has elected to end corrections without keeping any changes. \n')
+            # Reverting every correction from the most recent one restores the original values of each interval
+            while journal:
+                _swap_journal_entry(journal.pop(), corr_var_one, corr_var_two)
+            undone_journal = []
+            if choice == 3:
+                corr_log.write('---> User has elected to ignore previous iterations of corrections and start over. \n')
+            else:
+                correction_loop = 0
+                corr_log.write('---> User has elected to end corrections without keeping any changes. \n')
 
     ####################
     # Generate Final Graph
     # All previous graphs were either entirely before corrections, or showed differences between iterations
     # This graph is between completely original values and final corrected product
-    corr_fig = plotting_functions.variable_correction_plots(station, dt_array, backup_var_one, corr_var_one,
-                                                            backup_var_two, corr_var_two, code, folder_path)
+    corr_fig = plotting_functions.variable_correction_plots(station, dt_array, var_one, corr_var_one,
+                                                            var_two, corr_var_two, code, folder_path)
     save(corr_fig)
 
     # return corrected variables, or save original values as corrected values if correction was rejected
     corr_log.close()
+    if recipe_steps is not None:
+        recipe_steps.extend(entry.step for entry in journal)
     return corr_var_one, corr_var_two
 
 
-def compiled_humidity_adjustment(station, log_path, folder_path, dt_array, tmax, tmin, tavg, compiled_ea, ea, ea_col,
-                                 tdew, tdew_col, tdew_ko, rhmax, rhmax_col, rhmin, rhmin_col, rhavg, rhavg_col):
+def apply_humidity_adjustment_step(log_writer, step, edited_compiled_ea, edited_compiled_ea_source, tmax, tmin, tavg,
+                                   ea, tdew, tdew_ko, rhmax, rhmin, rhavg):
+    """
+    Overwrites one interval of compiled ea with ea calculated from a single humidity source, without prompting the
+    user. Steps are created by compiled_humidity_adjustment() and saved into correction recipes, so that the
+    adjustments of a reviewed station can be replayed with replay_humidity_adjustment().
+
+    Args:
+        :log_writer: Wrapper for writing to log file
+        :step: (dict) adjustment step, with the 'source' from HUMIDITY_ADJUSTMENT_SOURCES and the 'start' and 'end'
+            of its interval
+        :edited_compiled_ea: (ndarray) 1-D array of compiled ea values, modified in place
+        :edited_compiled_ea_source: (ndarray) 1-D int8 array of the source of each compiled ea value, modified in place
+        :tmax: (ndarray) 1-D array of maximum temperature values
+        :tmin: (ndarray) 1-D array of minimum temperature values
+        :tavg: (ndarray) 1-D array of average temperature values
+        :ea: (ndarray) 1-D array of vapor pressure values, which may be empty
+        :tdew: (ndarray) 1-D array of dewpoint temperature values, which may be empty
+        :tdew_ko: (ndarray) 1-D array of dewpoint temperature values, where missing values are filled in by
+            Tmin-Ko curve
+        :rhmax: (ndarray) 1-D array of maximum relative humidity values, which may be empty
+        :rhmin: (ndarray) 1-D array of minimum relative humidity values, which may be empty
+        :rhavg: (ndarray) 1-D array of average relative humidity values, which may be empty
+    """
+    if step.get('source') not in HUMIDITY_ADJUSTMENT_SOURCES:
+        raise ValueError('\n\nHumidity adjustment source \'{0}\' is not one of {1}.'
+                         .format(step.get('source'), HUMIDITY_ADJUSTMENT_SOURCES))
+    (int_start, int_end) = (step['start'], step['end'])
+    if not 0 <= int_start <= int_end <= edited_compiled_ea.shape[0]:
+        raise ValueError('\n\nHumidity adjustment interval from {0} to {1} is outside of the {2} day record.'
+                         .format(int_start, int_end, edited_compiled_ea.shape[0]))
+    choice = HUMIDITY_ADJUSTMENT_SOURCES.index(step['source']) + 1
+
+    log_writer.write('Selected interval started at %s and ended at %s. \n' % (int_start, int_end))
+
+    if choice == 1:
+        # User wants provided Ea
+        edited_compiled_ea[int_start:int_end] = ea[int_start:int_end]
+        print('\n The selected interval was overwritten by provided vapor pressure.')
+        log_writer.write('Variable used was provided vapor pressure. \n')
+
+    elif choice == 2:
+        # User wants provided TDew
+        s_tdew = tdew[int_start:int_end]  # Selected interval of tdew
+        calc_ea = np.array(0.6108 * np.exp((17.27 * s_tdew) / (s_tdew + 237.3)))  # EQ 8, units kPa
+        edited_compiled_ea[int_start:int_end] = calc_ea
+        print('\n The selected interval was overwritten by provided dewpoint temperature.')
+        log_writer.write('Variable used was provided dewpoint temperature. \n')
+
+    elif choice == 3:
+        # User wants provided RHMax and RHMin
+        s_tmax = tmax[int_start:int_end]
+        s_tmin = tmin[int_start:int_end]
+        s_rhmax = rhmax[int_start:int_end]
+        s_rhmin = rhmin[int_start:int_end]
+
+        eo_tmax = np.array(0.6108 * np.exp((17.27 * s_tmax) / (s_tmax + 237.3)))  # units kPa, EQ 7
+        eo_tmin = np.array(0.6108 * np.exp((17.27 * s_tmin) / (s_tmin + 237.3)))  # units kPa, EQ 7
+        calc_ea = np.array(((eo_tmin * (s_rhmax / 100)) + (eo_tmax * (s_rhmin / 100))) / 2)  # EQ 11
+        edited_compiled_ea[int_start:int_end] = calc_ea
+        print('\n The selected interval was overwritten by RH Maximum and Minimum.')
+        log_writer.write('Variable used was provided RH Maximum and Minimum. \n')
+
+    elif choice == 4:
+        # User wants provided RHAvg
+        s_tavg = tavg[int_start:int_end]
+        s_rhavg = rhavg[int_start:int_end]
+
+        eo_tavg = np.array(0.6108 * np.exp((17.27 * s_tavg) / (s_tavg + 237.3)))  # units kPa, EQ 7
+        calc_ea = np.array(eo_tavg * (s_rhavg / 100))  # EQ 14
+        edited_compiled_ea[int_start:int_end] = calc_ea
+        print('\n The selected interval was overwritten by RH Average.')
+        log_writer.write('Variable used was provided RH Average. \n')
+
+    elif choice == 5:
+        # User wants provided TDew that was completed by Tmin-Ko curve
+        s_tdew_ko = tdew_ko[int_start:int_end]  # Selected interval of tdew
+        calc_ea = np.array(0.6108 * np.exp((17.27 * s_tdew_ko) / (s_tdew_ko + 237.3)))  # EQ 8, units kPa
+        edited_compiled_ea[int_start:int_end] = calc_ea
+        print('\n The selected interval was overwritten by dewpoint temperature filled in with the k0 curve.')
+        log_writer.write('Variable used was provided dewpoint temperature filled in by the Ko curve. \n')
+
+    elif choice == 6:
+        print('\n The selected interval was not modified.')
+        log_writer.write('The selected interval was skipped. \n')
+
+    else:
+        # Incorrect choice was passed, raise an error
+        raise ValueError('Incorrect parameters: CHOICE in humidity adjustment was an unexpected value.')
+
+    if choice != 6:
+        # Sources are numbered the same as the menu options, days the selected source doesn't cover have none
+        edited_compiled_ea_source[int_start:int_end] = \
+            np.where(np.isnan(edited_compiled_ea[int_start:int_end]), 0, choice)
+
+
+def replay_humidity_adjustment(log_path, tmax, tmin, tavg, compiled_ea, compiled_ea_source, ea, ea_col, tdew, tdew_col,
+                               tdew_ko, rhmax, rhmax_col, rhmin, rhmin_col, rhavg, rhavg_col, steps):
+    """
+    Non-interactive counterpart of compiled_humidity_adjustment(), applies the humidity adjustment steps of a recipe
+    in order without prompting the user or opening any graphs.
+
+    Args:
+        :log_path: (str) path to log file
+        :tmax: (ndarray) 1-D array of maximum temperature values
+        :tmin: (ndarray) 1-D array of minimum temperature values
+        :tavg: (ndarray) 1-D array of average temperature values
+        :compiled_ea: (ndarray) the array of ea values that has been generated from all provided humidity variables
+        :compiled_ea_source: (ndarray) 1-D int8 array of the source of each compiled ea value
+        :ea: (ndarray) 1-D array of vapor pressure values, which may be empty
+        :ea_col: (int) used to determine if ea was provided by the data source
+        :tdew: (ndarray) 1-D array of dewpoint temperature values, which may be empty
+        :tdew_col: (int) column of Tdew variable in data file, if it is provided
+        :tdew_ko: (ndarray) 1-D array of dewpoint temperature values, where missing values are filled in by
+            Tmin-Ko curve
+        :rhmax: (ndarray) 1-D array of maximum relative humidity values, which may be empty
+        :rhmax_col: (int) column of rhmax variable in data file, if it was provided
+        :rhmin: (ndarray) 1-D array of minimum relative humidity values, which may be empty
+        :rhmin_col: (int) column of rhmin variable in data file, if it was provided
+        :rhavg: (ndarray) 1-D array of average relative humidity values, which may be empty
+        :rhavg_col: (int) column of rhavg variable in data file, if it was provided
+        :steps: (list) adjustment steps to apply, see apply_humidity_adjustment_step
+
+    Returns:
+        :edited_compiled_ea: (ndarray) ea array that has had selected sections replaced by the selected sources
+        :edited_compiled_ea_source: (ndarray) source array updated to match edited_compiled_ea
+    """
+    provided_sources = {'ea': ea_col != -1, 'tdew': tdew_col != -1, 'rhmax_rhmin': rhmax_col != -1 and rhmin_col != -1,
+                        'rhavg': rhavg_col != -1}
+    edited_compiled_ea = np.array(compiled_ea)
+    edited_compiled_ea_source = np.array(compiled_ea_source)
+
+    with open(log_path, 'a') as humidity_log:
+        humidity_log.write('\n--------------------------------------------------------------------------------------'
+                           '----\n')
+        humidity_log.write('Now replaying humidity record adjustment from a correction recipe. \n')
+        for step in steps:
+            if not provided_sources.get(step.get('source'), True):
+                raise ValueError('\n\nHumidity adjustment source \'{0}\' was not provided by the dataset.'
+                                 .format(step['source']))
+            apply_humidity_adjustment_step(humidity_log, step, edited_compiled_ea, edited_compiled_ea_source, tmax,
+                                           tmin, tavg, ea, tdew, tdew_ko, rhmax, rhmin, rhavg)
+        humidity_log.write('---> Finished replaying {0} adjustment steps. \n'.format(len(steps)))
+
+    return edited_compiled_ea, edited_compiled_ea_source
+
+
+def compiled_humidity_adjustment(station, log_path, folder_path, dt_array, tmax, tmin, tavg, compiled_ea,
+                                 compiled_ea_source, ea, ea_col, tdew, tdew_col, tdew_ko, rhmax, rhmax_col, rhmin,
+                                 rhmin_col, rhavg, rhavg_col, recipe_steps=None):
     """
     This function displays the 'compiled' ea generated from all available humidity data, and the user will have
     the option to overwrite sections of the 'compiled' ea with ea generated from a variable of their choice, should
@@ -914,6 +1188,8 @@ def compiled_humidity_adjustment(station, log_path, folder_path, dt_array, tmax,
         :tmin: (ndarray) 1-D array of minimum temperature values
         :tavg: (ndarray) 1-D array of average temperature values
         :compiled_ea: (ndarray) the array of ea values that has been generated from all provided humidity variables
+        :compiled_ea_source: (ndarray) 1-D int8 array of the source of each compiled ea value, see
+            calc_functions.COMPILED_EA_SOURCES
         :ea: (ndarray) 1-D array of vapor pressure values, which may be empty
         :ea_col: (int) used to determine if ea was provided by the data source
         :tdew: (ndarray) 1-D array of dewpoint temperature values, which may be empty
@@ -925,14 +1201,20 @@ def compiled_humidity_adjustment(station, log_path, folder_path, dt_array, tmax,
         :rhmin_col: (int) column of rhmin variable in data file, if it was provided
         :rhavg: (ndarray) 1-D array of average relative humidity values, which may be empty
         :rhavg_col: (int) column of rhavg variable in data file, if it was provided
+        :recipe_steps: (list) if provided, the adjustment steps that were kept are appended to it so that the session
+            can be replayed with replay_humidity_adjustment()
     Returns:
         :edited_compiled_ea: (ndarray) ea array that has had selected sections replaced by the selected sources
+        :edited_compiled_ea_source: (ndarray) source array updated to match edited_compiled_ea
     """
 
     adjustment_loop = 1
+    kept_steps = []  # adjustment steps since the start, or since the user last started over
     var_size = compiled_ea.shape[0]
     backup_compiled_ea = np.array(compiled_ea)
     edited_compiled_ea = np.array(compiled_ea)
+    backup_compiled_ea_source = np.array(compiled_ea_source)
+    edited_compiled_ea_source = np.array(compiled_ea_source)
 
     ####################
     # Logging
@@ -985,62 +1267,10 @@ def compiled_humidity_adjustment(station, log_path, folder_path, dt_array, tmax,
                     # Ko Tdew and skipping always a possible option
                     loop = 0
 
-        humidity_log.write('Selected interval started at %s and ended at %s. \n' % (int_start, int_end))
-
-        if choice == 1:
-            # User wants provided Ea
-            edited_compiled_ea[int_start:int_end] = ea[int_start:int_end]
-            print('\n The selected interval was overwritten by provided vapor pressure.')
-            humidity_log.write('Variable used was provided vapor pressure. \n')
-
-        elif choice == 2:
-            # User wants provided TDew
-            s_tdew = tdew[int_start:int_end]  # Selected interval of tdew
-            calc_ea = np.array(0.6108 * np.exp((17.27 * s_tdew) / (s_tdew + 237.3)))  # EQ 8, units kPa
-            edited_compiled_ea[int_start:int_end] = calc_ea
-            print('\n The selected interval was overwritten by provided dewpoint temperature.')
-            humidity_log.write('Variable used was provided dewpoint temperature. \n')
-
-        elif choice == 3:
-            # User wants provided RHMax and RHMin
-            s_tmax = tmax[int_start:int_end]
-            s_tmin = tmin[int_start:int_end]
-            s_rhmax = rhmax[int_start:int_end]
-            s_rhmin = rhmin[int_start:int_end]
-
-            eo_tmax = np.array(0.6108 * np.exp((17.27 * s_tmax) / (s_tmax + 237.3)))  # units kPa, EQ 7
-            eo_tmin = np.array(0.6108 * np.exp((17.27 * s_tmin) / (s_tmin + 237.3)))  # units kPa, EQ 7
-            calc_ea = np.array(((eo_tmin * (s_rhmax / 100)) + (eo_tmax * (s_rhmin / 100))) / 2)  # EQ 11
-            edited_compiled_ea[int_start:int_end] = calc_ea
-            print('\n The selected interval was overwritten by RH Maximum and Minimum.')
-            humidity_log.write('Variable used was provided RH Maximum and Minimum. \n')
-
-        elif choice == 4:
-            # User wants provided RHAvg
-            s_tavg = tavg[int_start:int_end]
-            s_rhavg = rhavg[int_start:int_end]
-
-            eo_tavg = np.array(0.6108 * np.exp((17.27 * s_tavg) / (s_tavg + 237.3)))  # units kPa, EQ 7
-            calc_ea = np.array(eo_tavg * (s_rhavg / 100))  # EQ 14
-            edited_compiled_ea[int_start:int_end] = calc_ea
-            print('\n The selected interval was overwritten by RH Average.')
-            humidity_log.write('Variable used was provided RH Average. \n')
-
-        elif choice == 5:
-            # User wants provided TDew that was completed by Tmin-Ko curve
-            s_tdew_ko = tdew_ko[int_start:int_end]  # Selected interval of tdew
-            calc_ea = np.array(0.6108 * np.exp((17.27 * s_tdew_ko) / (s_tdew_ko + 237.3)))  # EQ 8, units kPa
-            edited_compiled_ea[int_start:int_end] = calc_ea
-            print('\n The selected interval was overwritten by dewpoint temperature filled in with the k0 curve.')
-            humidity_log.write('Variable used was provided dewpoint temperature filled in by the Ko curve. \n')
-
-        elif choice == 6:
-            print('\n The selected interval was not modified.')
-            humidity_log.write('The selected interval was skipped. \n')
-
-        else:
-            # Incorrect choice was passed, raise an error
-            raise ValueError('Incorrect parameters: CHOICE in humidity adjustment was an unexpected value.')
+        step = {'source': HUMIDITY_ADJUSTMENT_SOURCES[choice - 1], 'start': int(int_start), 'end': int(int_end)}
+        apply_humidity_adjustment_step(humidity_log, step, edited_compiled_ea, edited_compiled_ea_source, tmax, tmin,
+                                       tavg, ea, tdew, tdew_ko, rhmax, rhmin, rhavg)
+        kept_steps.append(step)
 
         # Now that the section has been overwritten, replot the variables
         humidity_fig = (
@@ -1066,14 +1296,20 @@ def compiled_humidity_adjustment(station, log_path, folder_path, dt_array, tmax,
             humidity_log.write('---> User has elected to do another iteration of adjustments. \n')
         elif choice == 3:
             edited_compiled_ea = np.array(backup_compiled_ea)
+            edited_compiled_ea_source = np.array(backup_compiled_ea_source)
+            kept_steps = []
             humidity_log.write('---> User has elected to ignore previous iterations of adjustments and start over. \n')
         else:
             adjustment_loop = 0
             edited_compiled_ea = np.array(backup_compiled_ea)
+            edited_compiled_ea_source = np.array(backup_compiled_ea_source)
+            kept_steps = []
             humidity_log.write('---> User has elected to end adjustments without keeping any changes. \n')
 
     humidity_log.close()
-    return edited_compiled_ea
+    if recipe_steps is not None:
+        recipe_steps.extend(kept_steps)
+    return edited_compiled_ea, edited_compiled_ea_source
 
 
 # This is never run by itself
@@ -1,5 +1,7 @@
 import csv
+import io
 import numpy as np
+import os
 import pathlib as pl
 
 
@@ -186,3 +188,86 @@ def determine_delimiter(file_path):
 
     # Uniform delimiters found, return delimiter
     return delim
+
+
+def find_footer_start(file_path, lines_of_footer, block_size=65536):
+    """
+    Scans backwards from the end of a delimited file to find the byte offset where its footer begins, which allows the
+    footer to be trimmed without using the (much slower) skipfooter option of the python parsing engine.
+    Only the tail of the file is read, and trailing blank lines are not counted towards the footer.
+
+    Args:
+        :file_path: (str) path to file to scan
+        :lines_of_footer: (int) number of footer lines at the end of the file
+        :block_size: (int) number of bytes read per step when scanning backwards
+
+    Returns:
+        :footer_start: (int) byte offset of the first footer line, or the size of the file if there is no footer
+    """
+
+    with open(file_path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        file_size = position
+        if lines_of_footer <= 0:
+            return file_size
+
+        # Read blocks from the end of the file until enough line breaks have been found to cover the footer
+        tail = b''
+        while position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            tail = f.read(read_size) + tail
+            if tail.rstrip(b' \t\r\n').count(b'\n') >= lines_of_footer:
+                break
+
+    tail = tail.rstrip(b' \t\r\n')
+    footer_start = len(tail)
+    for _ in range(lines_of_footer):
+        footer_start = tail.rfind(b'\n', 0, footer_start)
+        if footer_start == -1:
+            raise IOError(f'\n\nThe file at {file_path} has fewer lines than the {lines_of_footer} lines of footer '
+                          f'specified in the config file.')
+
+    return position + footer_start + 1
+
+
+class _TruncatedFile(io.RawIOBase):
+    """
+    Raw binary file reader that stops at a given byte offset, as if the file ended there.
+    """
+
+    def __init__(self, file_path, end):
+        self._file = open(file_path, 'rb')
+        self._remaining = end
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self._remaining)
+        if size <= 0:
+            return 0
+        bytes_read = self._file.readinto(memoryview(buffer)[:size])
+        self._remaining -= bytes_read
+        return bytes_read
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+def open_truncated(file_path, end):
+    """
+    Opens a file for buffered binary reading that ends at the provided byte offset, such as the start of a footer found
+    by find_footer_start. This lets readers like pandas.read_csv stream the file without first copying it into memory.
+
+    Args:
+        :file_path: (str) path to file to open
+        :end: (int) byte offset to stop reading at
+
+    Returns:
+        :truncated_file: (io.BufferedReader) file object that can be read or used as a context manager
+    """
+    return io.BufferedReader(_TruncatedFile(file_path, end))
@@ -0,0 +1,71 @@
+"""
+Benchmark comparing the per-day loop previously used by calc_functions.calc_compiled_ea to select the best humidity
+source against the vectorized selection, on a synthetic 100k day record where every humidity variable is provided
+and has gaps.
+
+Run from the root of the repository:
+    python benchmarks/bench_compiled_ea.py
+"""
+import numpy as np
+import timeit
+
+from agweatherqaqc import calc_functions
+
+
+NUMBER_OF_DAYS = 100000
+
+
+def _loop_compiled_ea(tmax, tmin, tavg, ea, tdew, rhmax, rhmin, rhavg, tdew_ko):
+    compiled_ea = np.empty(ea.shape[0]) * np.nan
+    tdew_ko_calc_ea = np.array(0.6108 * np.exp((17.27 * tdew_ko) / (tdew_ko + 237.3)))
+    tdew_calc_ea = np.array(0.6108 * np.exp((17.27 * tdew) / (tdew + 237.3)))
+    eo_tmax = np.array(0.6108 * np.exp((17.27 * tmax) / (tmax + 237.3)))
+    eo_tmin = np.array(0.6108 * np.exp((17.27 * tmin) / (tmin + 237.3)))
+    rh_max_min_calc_ea = np.array(((eo_tmin * (rhmax / 100)) + (eo_tmax * (rhmin / 100))) / 2)
+    eo_tavg = np.array(0.6108 * np.exp((17.27 * tavg) / (tavg + 237.3)))
+    rh_avg_calc_ea = np.array(eo_tavg * (rhavg / 100))
+
+    for i in range(ea.shape[0]):
+        if np.isnan(ea[i]):
+            if not np.isnan(tdew_calc_ea[i]):
+                compiled_ea[i] = tdew_calc_ea[i]
+            elif np.isnan(tdew_calc_ea[i]) and not np.isnan(rh_max_min_calc_ea[i]):
+                compiled_ea[i] = rh_max_min_calc_ea[i]
+            elif np.isnan(tdew_calc_ea[i]) and np.isnan(rh_max_min_calc_ea[i]) and not np.isnan(rh_avg_calc_ea[i]):
+                compiled_ea[i] = rh_avg_calc_ea[i]
+            elif np.isnan(tdew_calc_ea[i]) and np.isnan(rh_max_min_calc_ea[i]) and np.isnan(rh_avg_calc_ea[i]):
+                compiled_ea[i] = tdew_ko_calc_ea[i]
+        else:
+            compiled_ea[i] = ea[i]
+    return compiled_ea
+
+
+def main():
+    rng = np.random.default_rng(0)
+    tmax = rng.uniform(10, 40, NUMBER_OF_DAYS)
+    tmin = tmax - rng.uniform(5, 20, NUMBER_OF_DAYS)
+    tavg = (tmax + tmin) / 2
+    (ea, tdew, rhmax, rhmin, rhavg, tdew_ko) = (rng.uniform(0.5, 2.5, NUMBER_OF_DAYS), tmin - 2,
+                                                rng.uniform(60, 100, NUMBER_OF_DAYS),
+                                                rng.uniform(10, 50, NUMBER_OF_DAYS),
+                                                rng.uniform(30, 70, NUMBER_OF_DAYS), tmin - 3)
+    for var in (ea, tdew, rhmax, rhavg, tdew_ko):
+        var[rng.random(NUMBER_OF_DAYS) < 0.4] = np.nan
+    inputs = (tmax, tmin, tavg, ea, tdew, rhmax, rhmin, rhavg, tdew_ko)
+
+    def vectorized():
+        return calc_functions.calc_compiled_ea(tmax, tmin, tavg, ea, tdew, 1, rhmax, 2, rhmin, 3, rhavg, 4, tdew_ko)
+
+    np.testing.assert_array_equal(_loop_compiled_ea(*inputs), vectorized()[0])
+
+    loop_time = min(timeit.repeat(lambda: _loop_compiled_ea(*inputs), number=1, repeat=3))
+    vectorized_time = min(timeit.repeat(vectorized, number=10, repeat=3)) / 10
+
+    print('%s days' % NUMBER_OF_DAYS)
+    print('per-day loop:          %.4f s' % loop_time)
+    print('vectorized selection:  %.4f s' % vectorized_time)
+    print('speedup: %.0fx' % (loop_time / vectorized_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Benchmark of one iteration of the correction loop of qaqc_functions.correction on a short interval of a long record.
+The previous loop copied both variables in the correction function and again to accept, undo, or start over, while
+the correction journal corrects the working copy in place and keeps only the values of the interval it replaced, so
+undoing swaps the interval back.
+
+Run from the root of the repository:
+    python benchmarks/bench_correction_journal.py
+"""
+import io
+import numpy as np
+import timeit
+
+from agweatherqaqc import qaqc_functions
+
+
+NUMBER_OF_DAYS = 1000000
+INTERVAL = (5000, 5010)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    tmax = rng.normal(20, 8, NUMBER_OF_DAYS)
+    tmin = tmax - rng.uniform(5, 15, NUMBER_OF_DAYS)
+    log_writer = io.StringIO()
+    step = {'method': 'additive', 'start': INTERVAL[0], 'end': INTERVAL[1], 'modifier': 1.5}
+
+    def copied():
+        # Correct copies of the accepted values, then copy the result back to accept it and again to start over
+        (corr_tmax, corr_tmin) = qaqc_functions.additive_corr(log_writer, INTERVAL[0], INTERVAL[1], tmax, tmin, 1.5)
+        accepted = (np.array(corr_tmax), np.array(corr_tmin))
+        restarted = (np.array(tmax), np.array(tmin))
+        return accepted, restarted
+
+    (working_tmax, working_tmin) = (np.array(tmax), np.array(tmin))
+    journal = []
+
+    def journaled():
+        # Correct the working copy in place, then undo it by swapping the replaced interval back
+        qaqc_functions.apply_correction_step(log_writer, step, working_tmax, working_tmin, None, None, None, 1, journal)
+        return qaqc_functions._swap_journal_entry(journal.pop(), working_tmax, working_tmin)
+
+    journaled()
+    np.testing.assert_array_equal(working_tmax, tmax)
+
+    copied_time = min(timeit.repeat(copied, number=20, repeat=5)) / 20
+    journaled_time = min(timeit.repeat(journaled, number=20, repeat=5)) / 20
+
+    print('%s days, %s day interval' % (NUMBER_OF_DAYS, INTERVAL[1] - INTERVAL[0]))
+    print('copied arrays:      %.6f s' % copied_time)
+    print('correction journal: %.6f s' % journaled_time)
+    print('speedup: %.1fx' % (copied_time / journaled_time))
+
+
+if __name__ == '__main__':
+    main()
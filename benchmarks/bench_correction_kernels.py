@@ -0,0 +1,135 @@
+"""
+Benchmark comparing the previous implementations of qaqc_functions.rs_period_ratio_corr and
+qaqc_functions.rh_yearly_percentile_corr, which searched each rs period with repeated np.nanargmax calls, grew the
+cleaned interval with np.append, and applied the corrections one day at a time, against the versions that use the
+kernels module, on a synthetic multi-decade daily record. The kernels are compiled when numba is installed.
+
+Run from the root of the repository:
+    python benchmarks/bench_correction_kernels.py
+"""
+import io
+import math
+import numpy as np
+import timeit
+from contextlib import redirect_stdout
+
+from agweatherqaqc import kernels, qaqc_functions
+
+
+YEARS_OF_DATA = 40
+PERIOD = 15
+SAMPLE_SIZE = 6
+
+
+def _nanargmax_rs_corr(rs, rso, sample_size_per_period, period):
+    # Condensed version of the previous search, keeping its repeated nanargmax calls, np.append and per-day loop
+    corr_rs = np.array(rs)
+    period_corr = np.zeros(int(math.ceil(rs.size / period)))
+    cleaned_rs = np.array([])
+    for k in range(period_corr.size):
+        rs_period = np.array(rs[k * period:(k + 1) * period], dtype=float)
+        rso_period = np.array(rso[k * period:(k + 1) * period], dtype=float)
+        period_ratios = rs_period / rso_period
+        max_ratio_indexes = []
+        for i in range(sample_size_per_period):
+            max_ratio_indexes.append(np.nanargmax(period_ratios))
+            period_ratios[np.nanargmax(period_ratios)] = np.nan
+        cf_index_start = 0
+        while True:
+            max_ratio_indexes.append(np.nanargmax(period_ratios))
+            period_ratios[np.nanargmax(period_ratios)] = np.nan
+            current = max_ratio_indexes[cf_index_start:cf_index_start + sample_size_per_period]
+            new = max_ratio_indexes[cf_index_start + 1:cf_index_start + sample_size_per_period + 1]
+            (rs_avg, rso_avg) = (np.nanmean(rs_period[current]), np.nanmean(rso_period[current]))
+            current_cf = rso_avg / rs_avg
+            new_cf = np.nanmean(rso_period[new]) / np.nanmean(rs_period[new])
+            if (((new_cf - current_cf) / current_cf) * 100 >= 2.0 and rs_avg > rso_avg) or rs_avg - rso_avg >= 75:
+                cf_index_start += 1
+            else:
+                break
+        period_corr[k] = current_cf
+        rs_period[max_ratio_indexes[:cf_index_start]] = -12345
+        cleaned_rs = np.append(cleaned_rs, rs_period)
+
+    corr_rs[:] = cleaned_rs
+    for x in range(rs.size):
+        z = max(x - 1, 0) // period
+        if not 0.50 <= period_corr[z] <= 1.50:
+            corr_rs[x] = np.nan
+        elif corr_rs[x] == -12345:
+            corr_rs[x] = rso[x] * 1.05
+        else:
+            if not 0.97 <= period_corr[z] <= 1.03:
+                corr_rs[x] = rs[x] * period_corr[z]
+            if corr_rs[x] > rso[x] * 1.03:
+                corr_rs[x] = rso[x]
+    return corr_rs
+
+
+def _per_day_rh_corr(rhmax, rhmin, day_factors):
+    # Per-day application of the yearly factors previously used by rh_yearly_percentile_corr
+    (corr_rhmax, corr_rhmin) = (np.array(rhmax), np.array(rhmin))
+    for i in range(rhmax.size):
+        corr_rhmax[i] = rhmax[i] * day_factors[i]
+        corr_rhmin[i] = rhmin[i] * day_factors[i]
+        if corr_rhmax[i] > 100:
+            corr_rhmax[i] = 100
+        elif corr_rhmax[i] <= 0:
+            corr_rhmax[i] = 1
+        if corr_rhmin[i] > 100:
+            corr_rhmin[i] = 100
+        elif corr_rhmin[i] <= 0:
+            corr_rhmin[i] = 1
+        if corr_rhmax[i] < corr_rhmin[i]:
+            corr_rhmax[i] = np.nan
+            corr_rhmin[i] = np.nan
+    return corr_rhmax, corr_rhmin
+
+
+def main():
+    rng = np.random.default_rng(0)
+    number_of_days = int(YEARS_OF_DATA * 365.25) // PERIOD * PERIOD
+    doy = np.arange(number_of_days) % 365
+    rso = 150 + 150 * np.sin(doy / 365 * np.pi)
+    rs = rso * rng.uniform(0.3, 1.0, number_of_days) * 1.3
+    spikes = rng.random(number_of_days) < 0.01
+    rs[spikes] = rso[spikes] * 3
+    year = 1980 + np.arange(number_of_days) // 365
+    rhmax = rng.uniform(40, 100, number_of_days)
+    rhmin = rhmax - rng.uniform(10, 60, number_of_days)
+
+    log_writer = io.StringIO()
+
+    def previous_rs():
+        return _nanargmax_rs_corr(rs, rso, SAMPLE_SIZE, PERIOD)
+
+    def kernel_rs():
+        with redirect_stdout(io.StringIO()):
+            return qaqc_functions.rs_period_ratio_corr(log_writer, 0, number_of_days, rs, rso, SAMPLE_SIZE, PERIOD)[0]
+
+    day_factors = 100 / rng.uniform(85, 100, YEARS_OF_DATA + 1)[year - year[0]]
+
+    def previous_rh():
+        return _per_day_rh_corr(rhmax, rhmin, day_factors)
+
+    def kernel_rh():
+        (corr_rhmax, corr_rhmin) = (np.array(rhmax), np.array(rhmin))
+        kernels.rh_apply_year_factors(rhmax, rhmin, corr_rhmax, corr_rhmin, day_factors)
+        return corr_rhmax, corr_rhmin
+
+    np.testing.assert_array_equal(previous_rs(), kernel_rs())
+    np.testing.assert_array_equal(previous_rh(), kernel_rh())
+
+    timings = [(name, min(timeit.repeat(function, number=3, repeat=3)) / 3) for (name, function) in
+               [('previous rs correction', previous_rs), ('kernel rs correction', kernel_rs),
+                ('previous rh application', previous_rh), ('kernel rh application', kernel_rh)]]
+
+    print('%s years, %s day periods, numba available: %s' % (YEARS_OF_DATA, PERIOD, kernels.NUMBA_AVAILABLE))
+    for (name, timing) in timings:
+        print('%-24s %.4f s' % (name + ':', timing))
+    print('rs speedup: %.1fx' % (timings[0][1] / timings[1][1]))
+    print('rh speedup: %.1fx' % (timings[2][1] / timings[3][1]))
+
+
+if __name__ == '__main__':
+    main()
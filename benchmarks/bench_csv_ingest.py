@@ -0,0 +1,67 @@
+"""
+Benchmark comparing the python parsing engine (with skipfooter) against the fast C engine ingest path used by
+input_functions._read_delimited_file on a synthetic multi-decade daily station record,
+with and without column projection.
+
+Run from the root of the repository:
+    python benchmarks/bench_csv_ingest.py
+"""
+import numpy as np
+import os
+import pandas as pd
+import tempfile
+import timeit
+
+from agweatherqaqc import input_functions
+
+
+YEARS_OF_DATA = 40
+EXTRA_COLUMNS = 20  # additional unused logger columns, network exports are often much wider than needed
+LINES_OF_FOOTER = 3
+
+
+def _write_synthetic_station(file_path):
+    dates = pd.date_range('1980-01-01', periods=int(YEARS_OF_DATA * 365.25))
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame(rng.normal(50, 20, (dates.size, 12 + EXTRA_COLUMNS)).round(2))
+    data[3] = data[3].astype(object)
+    data.loc[rng.random(dates.size) < 0.02, 3] = 'NO RECORD   '  # network padded missing flag
+    data.insert(0, 'date', dates.strftime('%m/%d/%Y'))
+    data.to_csv(file_path, index=False)
+    with open(file_path, 'a') as f:
+        for line in range(LINES_OF_FOOTER):
+            f.write('Footer line %s, generated for benchmarking\n' % line)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, 'bench_station.csv')
+        _write_synthetic_station(file_path)
+        config_dict = {'data_file_path': file_path, 'lines_of_header': 0, 'lines_of_footer': LINES_OF_FOOTER,
+                       'missing_input_value': '-999'}
+
+        def python_engine():
+            raw_data = pd.read_csv(file_path, delimiter=',', header=0, index_col=None, engine='python',
+                                   skipfooter=LINES_OF_FOOTER, na_values='-999', keep_default_na=True,
+                                   na_filter=True, skip_blank_lines=True)
+            return raw_data.replace(to_replace='NO RECORD   ', value=np.nan)
+
+        def c_engine():
+            return input_functions._read_delimited_file(config_dict, ',')
+
+        def c_engine_projected():
+            return input_functions._read_delimited_file(config_dict, ',', list(range(13)))
+
+        python_time = min(timeit.repeat(python_engine, number=1, repeat=3))
+        c_time = min(timeit.repeat(c_engine, number=1, repeat=3))
+        projected_time = min(timeit.repeat(c_engine_projected, number=1, repeat=3))
+
+    print('%s years, %s columns' % (YEARS_OF_DATA, 13 + EXTRA_COLUMNS))
+    print('python engine + skipfooter + replace: %.3f s' % python_time)
+    print('c engine + tail footer scan:          %.3f s' % c_time)
+    print('c engine, 13 projected columns:       %.3f s' % projected_time)
+    print('speedup: %.1fx, with projection: %.1fx' % (python_time / c_time, python_time / projected_time))
+
+
+if __name__ == '__main__':
+    main()
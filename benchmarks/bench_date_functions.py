@@ -0,0 +1,75 @@
+"""
+Benchmark comparing the per-row datetime loops previously used by WeatherQC to build the day of year and bokeh
+datetime arrays, and the pandas reindexing of the parsed record, against the datetime64[D] functions of
+date_functions, on a synthetic multi-decade daily record with gaps and duplicated days.
+
+Run from the root of the repository:
+    python benchmarks/bench_date_functions.py
+"""
+import datetime as dt
+import numpy as np
+import pandas as pd
+import timeit
+
+from agweatherqaqc import date_functions
+
+
+YEARS_OF_DATA = 40
+
+
+def _loop_doy_and_dt_array(year, month, day):
+    data_doy = []
+    dt_array = []
+    for i in range(year.shape[0]):
+        data_doy.append(dt.date(year[i], month[i], day[i]).strftime("%j"))
+        dt_array.append(dt.datetime(year[i], month[i], day[i]))
+    return np.array(list(map(int, data_doy))), np.array(dt_array, dtype=np.datetime64)
+
+
+def _pandas_reindex(year, month, day, values):
+    datetime_df = pd.to_datetime(pd.DataFrame({'year': year, 'month': month, 'day': day}))
+    date_reindex = pd.date_range(datetime_df.iloc[0], datetime_df.iloc[-1])
+    data_df = pd.DataFrame(values, index=datetime_df)
+    data_df = data_df[~data_df.index.duplicated(keep='first')]
+    return data_df.reindex(date_reindex, fill_value=np.nan)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    dates = pd.date_range('1980-01-01', periods=int(YEARS_OF_DATA * 365.25))
+    # Drop 1% of days and duplicate another 1% to create a record that needs reindexing
+    rows = np.sort(np.concatenate([np.flatnonzero(rng.random(dates.size) > 0.01),
+                                   np.flatnonzero(rng.random(dates.size) < 0.01)]))
+    record_dates = dates[rows]
+    (year, month, day) = (np.array(record_dates.year), np.array(record_dates.month), np.array(record_dates.day))
+    values = rng.normal(size=(rows.size, 11))
+
+    def vectorized():
+        record = date_functions.dates_from_ymd(year, month, day)
+        (daily_dates, daily_values, _) = date_functions.reindex_daily(record, values)
+        return daily_values, date_functions.split_dates(daily_dates)[3], daily_dates.astype('datetime64[us]')
+
+    (daily_values, doy, dt_array) = vectorized()
+    expected_df = _pandas_reindex(year, month, day, values)
+    np.testing.assert_array_equal(daily_values, expected_df.to_numpy())
+    expected_doy = _loop_doy_and_dt_array(np.array(expected_df.index.year), np.array(expected_df.index.month),
+                                          np.array(expected_df.index.day))
+    np.testing.assert_array_equal(doy, expected_doy[0])
+    np.testing.assert_array_equal(dt_array, expected_doy[1])
+
+    def previous():
+        data_df = _pandas_reindex(year, month, day, values)
+        return _loop_doy_and_dt_array(np.array(data_df.index.year), np.array(data_df.index.month),
+                                      np.array(data_df.index.day))
+
+    previous_time = min(timeit.repeat(previous, number=1, repeat=3))
+    vectorized_time = min(timeit.repeat(vectorized, number=10, repeat=3)) / 10
+
+    print('%s years' % YEARS_OF_DATA)
+    print('pandas reindex + per-row loops:  %.4f s' % previous_time)
+    print('datetime64[D] date functions:    %.4f s' % vectorized_time)
+    print('speedup: %.0fx' % (previous_time / vectorized_time))
+
+
+if __name__ == '__main__':
+    main()
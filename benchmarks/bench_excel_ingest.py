@@ -0,0 +1,65 @@
+"""
+Benchmark comparing pd.read_excel with the openpyxl engine against the streaming read-only path used by
+input_functions._read_excel_file on a synthetic multi-decade daily station workbook, with and without column
+projection. If python-calamine is installed _read_excel_file uses it instead, and this measures that engine.
+
+Run from the root of the repository:
+    python benchmarks/bench_excel_ingest.py
+"""
+import numpy as np
+import os
+import pandas as pd
+import tempfile
+import timeit
+
+from agweatherqaqc import input_functions
+
+
+YEARS_OF_DATA = 30
+EXTRA_COLUMNS = 20  # additional unused logger columns, network exports are often much wider than needed
+LINES_OF_FOOTER = 2
+
+
+def _write_synthetic_station(file_path):
+    dates = pd.date_range('1990-01-01', periods=int(YEARS_OF_DATA * 365.25))
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame(rng.normal(50, 20, (dates.size, 12 + EXTRA_COLUMNS)).round(2))
+    data.insert(0, 'date', dates.strftime('%m/%d/%Y'))
+    footer = pd.DataFrame({'date': ['Footer line %s, generated for benchmarking' % line
+                                    for line in range(LINES_OF_FOOTER)]})
+    pd.concat([data, footer]).to_excel(file_path, index=False, engine='xlsxwriter')
+
+
+def main():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, 'bench_station.xlsx')
+        _write_synthetic_station(file_path)
+        used_cols = list(range(13))
+
+        def read_excel():
+            return pd.read_excel(file_path, sheet_name=0, header=0, usecols=used_cols, engine='openpyxl',
+                                 skipfooter=LINES_OF_FOOTER, na_values=['-999'], keep_default_na=True,
+                                 na_filter=True)
+
+        def streaming():
+            return input_functions._read_excel_file(file_path, header=0, footer=LINES_OF_FOOTER,
+                                                    na_values=['-999'])
+
+        def streaming_projected():
+            return input_functions._read_excel_file(file_path, header=0, footer=LINES_OF_FOOTER,
+                                                    usecols=used_cols, na_values=['-999'])
+
+        read_excel_time = min(timeit.repeat(read_excel, number=1, repeat=3))
+        streaming_time = min(timeit.repeat(streaming, number=1, repeat=3))
+        projected_time = min(timeit.repeat(streaming_projected, number=1, repeat=3))
+
+    print('%s years, %s columns, calamine available: %s' % (YEARS_OF_DATA, 13 + EXTRA_COLUMNS,
+                                                             input_functions.EXCEL_CALAMINE_AVAILABLE))
+    print('pd.read_excel, openpyxl, 13 columns: %.3f s' % read_excel_time)
+    print('streaming read, all columns:         %.3f s' % streaming_time)
+    print('streaming read, 13 projected columns: %.3f s' % projected_time)
+    print('speedup with projection: %.1fx' % (read_excel_time / projected_time))
+
+
+if __name__ == '__main__':
+    main()
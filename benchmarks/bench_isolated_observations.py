@@ -0,0 +1,64 @@
+"""
+Benchmark of input_functions._remove_isolated_observations on a synthetic 100,000 day record, comparing the
+original element by element loop against the vectorized version, both per variable and as one (days x variables) block.
+
+Run from the root of the repository:
+    python benchmarks/bench_isolated_observations.py
+"""
+import numpy as np
+import timeit
+
+from agweatherqaqc import input_functions
+
+
+NUMBER_OF_DAYS = 100000
+NUMBER_OF_VARIABLES = 11
+
+
+def _loop_remove_isolated_observations(original_var):
+    # The original implementation, kept here as a reference point
+    data_size = original_var.shape[0]
+    processed_var = np.empty(data_size) * np.nan
+
+    for i in range(data_size):
+        if i == 0 or i == (data_size - 1):
+            if i == 0:
+                if not np.isnan(original_var[i + 1]):
+                    processed_var[i] = original_var[i]
+            else:
+                if not np.isnan(original_var[i - 1]):
+                    processed_var[i] = original_var[i]
+        elif np.isnan(original_var[i - 1]) and np.isnan(original_var[i + 1]) and not np.isnan(original_var[i]):
+            pass
+        else:
+            processed_var[i] = original_var[i]
+
+    return processed_var
+
+
+def main():
+    rng = np.random.default_rng(0)
+    station_data = rng.normal(15, 10, (NUMBER_OF_DAYS, NUMBER_OF_VARIABLES))
+    station_data[rng.random(station_data.shape) < 0.3] = np.nan
+
+    loop_result = np.column_stack([_loop_remove_isolated_observations(station_data[:, col])
+                                   for col in range(NUMBER_OF_VARIABLES)])
+    block_result = input_functions._remove_isolated_observations(station_data)
+    assert np.array_equal(loop_result, block_result, equal_nan=True), 'Vectorized output does not match the loop'
+
+    loop_time = min(timeit.repeat(lambda: [_loop_remove_isolated_observations(station_data[:, col])
+                                           for col in range(NUMBER_OF_VARIABLES)], number=1, repeat=3))
+    column_time = min(timeit.repeat(lambda: [input_functions._remove_isolated_observations(station_data[:, col])
+                                             for col in range(NUMBER_OF_VARIABLES)], number=1, repeat=3))
+    block_time = min(timeit.repeat(lambda: input_functions._remove_isolated_observations(station_data),
+                                   number=1, repeat=3))
+
+    print('%s days x %s variables' % (NUMBER_OF_DAYS, NUMBER_OF_VARIABLES))
+    print('python loop, per variable:     %.4f s' % loop_time)
+    print('vectorized, per variable:      %.4f s' % column_time)
+    print('vectorized, single 2D block:   %.4f s' % block_time)
+    print('speedup: %.0fx' % (loop_time / block_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Benchmark comparing the per-month list comprehension reductions previously used in calc_functions against the
+shared grouped reductions of group_functions, for the four monthly means of calc_temperature_variables on a
+synthetic multi-decade daily record.
+
+Run from the root of the repository:
+    python benchmarks/bench_monthly_groups.py
+"""
+import numpy as np
+import pandas as pd
+import timeit
+
+from agweatherqaqc import group_functions
+
+
+YEARS_OF_DATA = 40
+
+
+def _list_comprehension_means(month, variables):
+    monthly_means = np.empty((len(variables), 12))
+    j = 1
+    for k in range(12):
+        temp_indexes = [ex for ex, ind in enumerate(month) if ind == j]
+        temp_indexes = np.array(temp_indexes, dtype=int)
+        for v, var in enumerate(variables):
+            monthly_means[v, k] = np.nanmean(var[temp_indexes])
+        j += 1
+    return monthly_means
+
+
+def main():
+    dates = pd.date_range('1980-01-01', periods=int(YEARS_OF_DATA * 365.25))
+    month = np.array(dates.month)
+    rng = np.random.default_rng(0)
+    variables = rng.normal(15, 8, (4, dates.size))
+    variables[rng.random(variables.shape) < 0.05] = np.nan
+
+    groups = group_functions.month_groups(month)
+    np.testing.assert_allclose(_list_comprehension_means(month, variables),
+                               group_functions.grouped_nanmean(groups, variables), rtol=1e-12)
+
+    loop_time = min(timeit.repeat(lambda: _list_comprehension_means(month, variables), number=10, repeat=3)) / 10
+    build_time = min(timeit.repeat(lambda: group_functions.month_groups(month), number=100, repeat=3)) / 100
+    grouped_time = min(timeit.repeat(lambda: group_functions.grouped_nanmean(groups, variables),
+                                     number=100, repeat=3)) / 100
+
+    print('%s years, 4 variables' % YEARS_OF_DATA)
+    print('list comprehension per month: %.5f s' % loop_time)
+    print('group structure, built once:  %.5f s' % build_time)
+    print('grouped nanmean:              %.5f s' % grouped_time)
+    print('speedup: %.1fx' % (loop_time / grouped_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark comparing the previous modified z-score outlier detection of qaqc_functions.temp_find_outliers, which
+scored each month of each variable separately using list comprehensions, against the grouped version that finds the
+medians and median absolute deviations of all months and both variables with one sort of each variable, on a
+synthetic 100k day record.
+
+Run from the root of the repository:
+    python benchmarks/bench_outlier_detection.py
+"""
+import numpy as np
+import timeit
+import warnings
+
+from agweatherqaqc import group_functions, qaqc_functions
+
+
+NUMBER_OF_DAYS = 100000
+
+
+def _list_modified_z_score(data):
+    # Previous version of qaqc_functions.modified_z_score_outlier_detection
+    cleaned_data = np.array(data)
+    median = np.nanmedian(data)
+    median_absolute_deviation = np.nanmedian([np.abs(x - median) for x in data])
+    modified_z_scores = np.array([0.6745 * (x - median) / median_absolute_deviation for x in data])
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        removed_indices = np.array(np.where(np.abs(modified_z_scores) > 3.5))
+    cleaned_data[removed_indices] = np.nan
+    return cleaned_data, removed_indices.size
+
+
+def main():
+    rng = np.random.default_rng(0)
+    month = (np.arange(NUMBER_OF_DAYS) // 30.44).astype(int) % 12 + 1
+    seasonal = 15 * np.sin((month - 4) / 12 * 2 * np.pi)
+    values = np.vstack([seasonal + 20 + rng.standard_t(3, NUMBER_OF_DAYS) * 4,
+                        seasonal + 5 + rng.standard_t(3, NUMBER_OF_DAYS) * 4])
+    values[rng.random(values.shape) < 0.05] = np.nan
+    groups = group_functions.month_groups(month)
+
+    def previous():
+        cleaned_values = np.array(values)
+        outlier_counts = np.zeros((2, 12), dtype=int)
+        for k in range(12):
+            t_index = group_functions.group_members(groups, k)
+            for row in range(2):
+                (cleaned_values[row, t_index], outlier_counts[row, k]) = _list_modified_z_score(values[row, t_index])
+        return cleaned_values, outlier_counts
+
+    def grouped():
+        return qaqc_functions.grouped_modified_z_score_outlier_detection(groups, values)
+
+    for (expected, result) in zip(previous(), grouped()):
+        np.testing.assert_array_equal(result, expected)
+
+    previous_time = min(timeit.repeat(previous, number=3, repeat=3)) / 3
+    grouped_time = min(timeit.repeat(grouped, number=3, repeat=3)) / 3
+
+    print('%s days, 2 variables' % NUMBER_OF_DAYS)
+    print('per month list comprehensions: %.4f s' % previous_time)
+    print('grouped sort-based medians:    %.4f s' % grouped_time)
+    print('speedup: %.1fx' % (previous_time / grouped_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark comparing the previous reference ET calculation, which built two refet.Daily objects with identical inputs
+for ETo and ETr and calculated full clear-sky solar radiation separately, against the single pass kernel
+calc_functions.calc_refet_daily with and without reused output buffers, on a synthetic multi-decade daily record.
+
+Run from the root of the repository:
+    python benchmarks/bench_refet_daily.py
+"""
+import numpy as np
+import pandas as pd
+import refet
+import timeit
+
+from agweatherqaqc import calc_functions
+
+
+YEARS_OF_DATA = 40
+LATITUDE = 39.5
+ELEVATION = 1350.0
+ANEMOMETER_HEIGHT = 2.0
+
+
+def main():
+    dates = pd.date_range('1980-01-01', periods=int(YEARS_OF_DATA * 365.25))
+    doy = np.array(dates.dayofyear)
+    rng = np.random.default_rng(0)
+    tmax = rng.uniform(-5, 40, doy.size)
+    tmin = tmax - rng.uniform(0, 20, doy.size)
+    ea = rng.uniform(0.1, 3.0, doy.size)
+    uz = rng.uniform(0.2, 8.0, doy.size)
+    rs = rng.uniform(10, 380, doy.size)
+
+    def refet_daily():
+        lat_radians = LATITUDE * np.pi / 180.0
+        pressure = refet.calcs._air_pressure(elev=ELEVATION, method='asce')
+        ra = refet.calcs._ra_daily(lat=lat_radians, doy=doy, method='asce')
+        rso = refet.calcs._rso_daily(ra=ra, ea=ea, pair=pressure, doy=doy, lat=lat_radians)
+        refet_kwargs = dict(tmin=tmin, tmax=tmax, ea=ea, rs=rs, uz=uz, zw=ANEMOMETER_HEIGHT, elev=ELEVATION,
+                            lat=LATITUDE, doy=doy, method='asce', input_units={'rs': 'w/m2', 'lat': 'deg'})
+        return (rso * 1000000) / 86400, refet.Daily(**refet_kwargs).eto(), refet.Daily(**refet_kwargs).etr()
+
+    buffers = tuple(np.empty(doy.size) for _ in range(3))
+
+    def kernel():
+        return calc_functions.calc_refet_daily(LATITUDE, ELEVATION, ANEMOMETER_HEIGHT, doy, tmax, tmin, ea, uz, rs)
+
+    def kernel_buffers():
+        return calc_functions.calc_refet_daily(LATITUDE, ELEVATION, ANEMOMETER_HEIGHT, doy, tmax, tmin, ea, uz, rs,
+                                               buffers)
+
+    for (expected, result) in zip(refet_daily(), kernel()):
+        np.testing.assert_allclose(result, expected, rtol=1e-12)
+
+    refet_time = min(timeit.repeat(refet_daily, number=20, repeat=3)) / 20
+    kernel_time = min(timeit.repeat(kernel, number=20, repeat=3)) / 20
+    buffers_time = min(timeit.repeat(kernel_buffers, number=20, repeat=3)) / 20
+
+    print('%s years' % YEARS_OF_DATA)
+    print('two refet.Daily objects + full rso: %.4f s' % refet_time)
+    print('single pass kernel:                 %.4f s' % kernel_time)
+    print('single pass kernel, reused buffers: %.4f s' % buffers_time)
+    print('speedup: %.1fx' % (refet_time / buffers_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark comparing the previous per-iteration Thornton-Running Monte Carlo loop, which ran calc_rs_tr once for
+every set of coefficients, against the batched evaluation in calc_functions.calc_org_and_opt_rs_tr, for the 1000
+iteration post-correction step on a synthetic multi-decade daily record.
+
+Run from the root of the repository:
+    python benchmarks/bench_rs_tr_monte_carlo.py
+"""
+import contextlib
+import io
+import numpy as np
+import os
+import pandas as pd
+import tempfile
+import timeit
+
+from agweatherqaqc import calc_functions, group_functions
+
+
+YEARS_OF_DATA = 40
+MC_ITERATIONS = 1000
+
+
+def main():
+    dates = pd.date_range('1980-01-01', periods=int(YEARS_OF_DATA * 365.25))
+    month = np.array(dates.month)
+    doy = np.array(dates.dayofyear)
+    rng = np.random.default_rng(0)
+    delta_t = 12 + 4 * np.sin(2 * np.pi * doy / 365) + rng.normal(0, 2, dates.size)
+    rso = 250 + 100 * np.sin(2 * np.pi * (doy - 80) / 365)
+    rs = rso * rng.uniform(0.4, 1.0, dates.size)
+    rs[rng.random(dates.size) < 0.05] = np.nan
+    groups = group_functions.month_groups(month)
+    mm_delta_t = group_functions.grouped_nanmean(groups, delta_t)
+
+    def loop():
+        np.random.seed(0)
+        b_zero = 0.031 + (0.031 * 0.5) * np.random.uniform(low=-1, high=1, size=MC_ITERATIONS)
+        b_one = 0.201 + (0.201 * 0.5) * np.random.uniform(low=-1, high=1, size=MC_ITERATIONS)
+        b_two = -0.185 + (-0.185 * 0.5) * np.random.uniform(low=-1, high=1, size=MC_ITERATIONS)
+        mc_rmse = np.zeros(MC_ITERATIONS)
+        for i in range(MC_ITERATIONS):
+            mc_rs_tr = calc_functions.calc_rs_tr(month, rso, delta_t, mm_delta_t, b_zero[i], b_one[i], b_two[i])[0]
+            mc_rmse[i] = np.sqrt(np.nanmean((mc_rs_tr - rs) ** 2))
+        return np.nanargmin(mc_rmse)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        log_path = os.path.join(temp_dir, 'log.txt')
+
+        def batched():
+            np.random.seed(0)
+            with contextlib.redirect_stdout(io.StringIO()):
+                return calc_functions.calc_org_and_opt_rs_tr(MC_ITERATIONS, log_path, month, delta_t, mm_delta_t,
+                                                             rs, rso, groups)
+
+        loop_time = min(timeit.repeat(loop, number=1, repeat=3))
+        batched_time = min(timeit.repeat(batched, number=1, repeat=3))
+
+    print('%s years, %s iterations' % (YEARS_OF_DATA, MC_ITERATIONS))
+    print('calc_rs_tr per iteration: %.3f s' % loop_time)
+    print('batched broadcast:        %.3f s' % batched_time)
+    print('speedup: %.1fx' % (loop_time / batched_time))
+
+
+if __name__ == '__main__':
+    main()
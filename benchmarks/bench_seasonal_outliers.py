@@ -0,0 +1,61 @@
+"""
+Benchmark of the rolling seasonal modified z-score outlier detection of qaqc_functions.seasonal_find_outliers. The
+median and median absolute deviation of each day of year window are maintained by sliding a sorted window, and are
+compared against recomputing np.nanmedian over the pooled window of every day of year, on a synthetic 100k day record.
+
+Run from the root of the repository:
+    python benchmarks/bench_seasonal_outliers.py
+"""
+import numpy as np
+import timeit
+
+from agweatherqaqc import group_functions, qaqc_functions
+
+
+NUMBER_OF_DAYS = 100000
+HALF_WIDTH = 15
+
+
+def _recomputed_median_mad(doy, values, half_width):
+    # Median and median absolute deviation recomputed from every observation of each day of year window
+    medians = np.full(366, np.nan)
+    mads = np.full(366, np.nan)
+    for day in range(366):
+        window = values[np.abs((doy - 1 - day + 183) % 366 - 183) <= half_width]
+        window = window[~np.isnan(window)]
+        if window.size:
+            medians[day] = np.median(window)
+            mads[day] = np.median(np.abs(window - medians[day]))
+    return medians, mads
+
+
+def main():
+    rng = np.random.default_rng(0)
+    doy = np.arange(NUMBER_OF_DAYS) % 365 + 1
+    values = 15 * np.sin((doy - 100) / 365 * 2 * np.pi) + 20 + rng.standard_t(3, NUMBER_OF_DAYS) * 4
+    values[rng.random(NUMBER_OF_DAYS) < 0.05] = np.nan
+
+    def recomputed():
+        return _recomputed_median_mad(doy, values, HALF_WIDTH)
+
+    def sliding():
+        return group_functions.rolling_doy_median_mad(doy, values, HALF_WIDTH)
+
+    for (expected, result) in zip(recomputed(), sliding()):
+        np.testing.assert_array_equal(result, expected)
+
+    recomputed_time = min(timeit.repeat(recomputed, number=3, repeat=3)) / 3
+    sliding_time = min(timeit.repeat(sliding, number=3, repeat=3)) / 3
+    detection_time = min(timeit.repeat(
+        lambda: qaqc_functions.rolling_modified_z_score_outlier_detection(doy, values, HALF_WIDTH),
+        number=3, repeat=3)) / 3
+
+    print('%s days, +/- %s day of year window' % (NUMBER_OF_DAYS, HALF_WIDTH))
+    print('recomputed window medians: %.4f s' % recomputed_time)
+    print('sliding window medians:    %.4f s' % sliding_time)
+    print('speedup: %.1fx' % (recomputed_time / sliding_time))
+    print('full outlier detection:    %.4f s' % detection_time)
+
+
+if __name__ == '__main__':
+    main()
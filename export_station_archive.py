@@ -0,0 +1,20 @@
+from agweatherqaqc.input_functions import export_station_archive
+import sys
+
+
+if __name__ == "__main__":
+    # This script reads in a station's data file using a config file (and optionally a metadata file), and saves it
+    # as a binary station archive, which can then be loaded without parsing by pointing DATA_FILE_PATH to the archive
+
+    if len(sys.argv) == 2:
+        config_path = sys.argv[1]
+        metadata_path = None
+    elif len(sys.argv) == 3:
+        config_path = sys.argv[1]
+        metadata_path = sys.argv[2]
+    else:
+        raise SystemError('\n\nUsage: \'python export_station_archive.py PATH/TO/CONFIG.INI [PATH/TO/METADATA.XLSX]\'')
+
+    print("\nSystem: Starting station archive export script.")
+    export_station_archive(config_path, metadata_path)
+    print("\nSystem: Now ending station archive export script.")
@@ -16,21 +16,26 @@ if __name__ == "__main__":
             f'The current version of python being run is {sys.version}. \n\n')
 
     # Check if user has passed in a config file, or else just grab the default.
-    # Also see if user has passed a metadata file to allow for automatic reading/writing into the metadata file.
-    if len(sys.argv) == 2:
+    # Also see if user has passed a metadata file to allow for automatic reading/writing into the metadata file,
+    # and a json correction recipe to replay the corrections of a previous session without any prompts.
+    metadata_path = None
+    recipe_path = None
+    if 2 <= len(sys.argv) <= 4:
         config_path = sys.argv[1]
-        metadata_path = None
-    elif len(sys.argv) == 3:
-        config_path = sys.argv[1]
-        metadata_path = sys.argv[2]
+        for optional_path in sys.argv[2:]:
+            if optional_path.lower().endswith('.json'):
+                recipe_path = optional_path
+            else:
+                metadata_path = optional_path
     else:
         config_path = 'tests/test_files/test_config.ini'
-        metadata_path = None
         print(f"\nSystem: no configuration file provided, using test config file located at \'{config_path}\'.\n"
               f"     To use your own configuration file, specify it when running qaqc_single_station.py like so: \n"
-              f"\'python qaqc_single_station.py PATH/TO/CONFIG.INI\'\n")
+              f"\'python qaqc_single_station.py PATH/TO/CONFIG.INI [PATH/TO/METADATA.XLSX] [PATH/TO/RECIPE.JSON]\'\n"
+              f"     Passing a correction recipe saved by a previous session replays its corrections without "
+              f"prompts.\n")
 
     print("\nSystem: Starting single station data QAQC script.")
-    station_qaqc = WeatherQC(config_path, metadata_path, gridplot_columns=1)
+    station_qaqc = WeatherQC(config_path, metadata_path, gridplot_columns=1, recipe_file_path=recipe_path)
     station_qaqc.process_station()
     print("\nSystem: Now ending single station QAQC script.")
@@ -1,9 +1,14 @@
 import pytest as pt
 import numpy as np
+import pandas as pd
+import openpyxl
+import refet
 import sys
+import warnings
 
 import agweatherqaqc.utils
-from agweatherqaqc import input_functions, calc_functions
+from agweatherqaqc import input_functions, calc_functions, date_functions, group_functions, kernels, qaqc_functions
+from agweatherqaqc.agweatherqaqc import CORRECTED_VARIABLES, WeatherQC
 
 metadata_file_path = 'tests/test_files/test_metadata.xlsx'
 config_file_path = 'tests/test_files/test_config.ini'
@@ -67,6 +72,72 @@ def test_read_config():
     input_functions._read_config(config_file_path)
 
 
+def test_read_delimited_file_footer(tmp_path):
+    """Check that the fast C engine read with a trimmed footer matches the python engine's skipfooter read"""
+
+    with open(data_file_path, 'r', encoding='utf-8') as f:
+        data_lines = f.read().splitlines()[:366]
+    footer_file_path = tmp_path / 'footer_data.csv'
+    with open(footer_file_path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(data_lines).replace(',47,', ',NO RECORD   ,'))
+        f.write('\nReport generated by test,\nEnd of report\n')
+
+    config_dict = {'data_file_path': str(footer_file_path), 'lines_of_header': 0, 'lines_of_footer': 2,
+                   'missing_input_value': 'NO RECORD'}
+    fast_data = input_functions._read_delimited_file(config_dict, ',')
+    slow_data = pd.read_csv(footer_file_path, delimiter=',', header=0, engine='python', skipfooter=2,
+                            na_values=['NO RECORD'], skip_blank_lines=True)
+    slow_data = slow_data.replace(to_replace='NO RECORD   ', value=np.nan)
+
+    assert agweatherqaqc.utils.find_footer_start(footer_file_path, 0) == footer_file_path.stat().st_size
+    assert fast_data.shape == slow_data.shape
+    assert (fast_data.iloc[:, 0] == slow_data.iloc[:, 0]).all()  # date strings
+    for col in range(1, fast_data.shape[1]):
+        np.testing.assert_array_equal(pd.to_numeric(fast_data.iloc[:, col], errors='coerce'),
+                                      pd.to_numeric(slow_data.iloc[:, col], errors='coerce'))
+
+
+def test_read_excel_file(tmp_path):
+    """Check that the streaming Excel read matches pd.read_excel, including header, footer, and missing values"""
+
+    # Create a workbook with a line of header above the column names, a blank row, an error cell, and a footer
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(['Station export generated by test'])
+    sheet.append(['date', 'notes', 'tmax', 'tmin', 'rs'])
+    for day in range(1, 31):
+        sheet.append(['2000-01-%02d' % day, 'ok', 20.5 + day, -999 if day % 7 == 0 else 5.0,
+                      '#DIV/0!' if day == 4 else 250])
+        if day == 10:
+            sheet.append([])
+    sheet.append(['End of report'])
+    excel_file_path = tmp_path / 'excel_data.xlsx'
+    workbook.save(excel_file_path)
+
+    for usecols in [None, [0, 2, 3], [2, 4]]:
+        stream_data = input_functions._read_excel_file(excel_file_path, header=1, footer=1, usecols=usecols,
+                                                       na_values=['-999'])
+        full_data = pd.read_excel(excel_file_path, sheet_name=0, header=1, skipfooter=1, usecols=usecols,
+                                  na_values=['-999'], engine='openpyxl')
+        pd.testing.assert_frame_equal(stream_data, full_data)
+
+    stream_metadata = input_functions._read_excel_file(metadata_file_path, index_col=0)
+    full_metadata = pd.read_excel(metadata_file_path, sheet_name=0, index_col=0, engine='openpyxl')
+    pd.testing.assert_frame_equal(stream_metadata, full_metadata)
+
+
+def test_project_columns():
+    """Check that only referenced columns are read and that config indices are remapped to the projected columns"""
+    config_dict = input_functions._read_config(config_file_path)
+    (used_cols, column_lookup) = input_functions._project_columns(config_dict)
+
+    assert used_cols == [0, 4, 5, 6, 7, 8, 9, 10, 11, 12, 14]  # day of year column is unused with DATE_FORMAT = 1
+    for key in ['string_date_col', 'tmax_col', 'uz_col', 'rhavg_col']:
+        assert used_cols[column_lookup[key]] == config_dict[key]
+    assert column_lookup['tdew_col'] == -1
+    assert column_lookup['day_of_year_col'] == -1
+
+
 def test_temperature_conversion():
     """Check to see if input_functions.convert_units produces the expected values when converting temperature"""
 
@@ -297,3 +368,673 @@ def test_ea_calculations(ea, tmax, tmin, tavg, tdew, rhmax, rhmin, rhavg):
         assert test_ea_from_rhavg[2] == ea_from_rhavg[2]
         assert test_ea_from_rhavg[3] == ea_from_rhavg[3]
         assert test_ea_from_rhavg[4] == ea_from_rhavg[4]
+
+
+@pt.mark.parametrize("lat, elev, wind_anemom", [(39.5, 1350.0, 2.0), (-33.9, 15.0, 3.0), (64.8, 140.0, 10.0)])
+def test_refet_daily(lat, elev, wind_anemom):
+    """Check that the native reference ET kernel matches the refet package, including when reusing output buffers"""
+    rng = np.random.default_rng(0)
+    doy = np.tile(np.arange(1, 366), 3)
+    tmax = rng.uniform(-10, 42, doy.size)
+    tmin = tmax - rng.uniform(0, 22, doy.size)
+    ea = rng.uniform(0.05, 3.5, doy.size)
+    uz = rng.uniform(0.1, 12, doy.size)
+    rs = rng.uniform(0, 380, doy.size)
+    for var in [tmax, ea, uz, rs]:
+        var[rng.random(doy.size) < 0.05] = np.nan
+
+    refet_kwargs = dict(tmin=tmin, tmax=tmax, ea=ea, rs=rs, uz=uz, zw=wind_anemom, elev=elev, lat=lat, doy=doy,
+                        method='asce', input_units={'rs': 'w/m2', 'lat': 'deg'})
+    refet_eto = refet.Daily(**refet_kwargs).eto()
+    refet_etr = refet.Daily(**refet_kwargs).etr()
+    refet_rso = refet.calcs._rso_daily(refet.calcs._ra_daily(lat * np.pi / 180.0, doy, 'asce'), ea,
+                                       refet.calcs._air_pressure(elev, 'asce'), doy, lat * np.pi / 180.0)
+
+    buffers = tuple(np.empty(doy.size) for _ in range(3))
+    for _ in range(2):
+        (rso, eto, etr) = calc_functions.calc_refet_daily(lat, elev, wind_anemom, doy, tmax, tmin, ea, uz, rs,
+                                                          buffers)
+        assert all(result is buffer for (result, buffer) in zip((rso, eto, etr), buffers))
+        np.testing.assert_allclose(rso, refet_rso * 1000000 / 86400, rtol=1e-12)
+        np.testing.assert_allclose(eto, refet_eto, rtol=1e-12)
+        np.testing.assert_allclose(etr, refet_etr, rtol=1e-12)
+
+
+def test_input_cache(tmp_path):
+    """Check that a data file loaded from the input cache is identical to the one that was parsed"""
+
+    with open(config_file_path, 'r') as f:
+        config_text = f.read().replace(data_file_path, str(tmp_path / 'test_data.csv'))
+    with open(data_file_path, 'rb') as f:
+        (tmp_path / 'test_data.csv').write_bytes(f.read())
+    cached_config_path = tmp_path / 'test_config.ini'
+    cached_config_path.write_text(config_text)
+
+    (parsed_df, parsed_ser, _, _, config_dict) = input_functions._obtain_data(str(cached_config_path))
+    with open(config_dict['log_file_path'], 'r') as f:
+        parsed_log = f.read().split('\n', 1)[1]  # first line contains a timestamp
+
+    cache_entries = list((tmp_path / 'correction_files' / 'input_cache').glob('*.npz'))
+    assert len(cache_entries) == 1
+
+    (cached_df, cached_ser, _, _, config_dict) = input_functions._obtain_data(str(cached_config_path))
+    with open(config_dict['log_file_path'], 'r') as f:
+        cached_log = f.read().split('\n', 1)[1]
+
+    pd.testing.assert_frame_equal(parsed_df, cached_df)
+    pd.testing.assert_series_equal(parsed_ser, cached_ser)
+    assert parsed_log == cached_log
+
+
+def test_remove_isolated_observations():
+    """Check the vectorized isolated observation filter against a direct element by element implementation"""
+
+    def reference_filter(original_var):
+        processed_var = np.empty(original_var.shape[0]) * np.nan
+        for i in range(original_var.shape[0]):
+            prev_missing = i == 0 or np.isnan(original_var[i - 1])
+            next_missing = i == original_var.shape[0] - 1 or np.isnan(original_var[i + 1])
+            if not (prev_missing and next_missing):
+                processed_var[i] = original_var[i]
+        return processed_var
+
+    rng = np.random.default_rng(7)
+    station_data = rng.normal(20, 5, (500, 4))
+    station_data[rng.random((500, 4)) < 0.4] = np.nan
+    station_data[1, :] = np.nan  # first observation followed by a gap
+    station_data[-2, :] = np.nan  # last observation preceded by a gap
+
+    filtered_data = input_functions._remove_isolated_observations(station_data)
+    for col in range(station_data.shape[1]):
+        expected = reference_filter(station_data[:, col])
+        np.testing.assert_array_equal(filtered_data[:, col], expected)
+        np.testing.assert_array_equal(input_functions._remove_isolated_observations(station_data[:, col]), expected)
+    assert np.isnan(filtered_data[[0, -1], :]).all()
+
+
+def test_process_station_matrix(tmp_path):
+    """Check that the single pass ingest converts units, applies realistic limits, and removes HPRCC missing days"""
+
+    config_dict = input_functions._read_config(config_file_path)
+    config_dict['log_file_path'] = str(tmp_path / 'test_log.txt')
+    raw_data = pd.read_csv(data_file_path, header=0, nrows=60)
+    raw_data.iloc[10, config_dict['tmax_col']] = 150.0  # unrealistic temperature in F
+    raw_data.iloc[20, config_dict['tmin_col']] = raw_data.iloc[20, config_dict['tmax_col']]  # HPRCC style missing day
+
+    station_matrix = input_functions._process_station_matrix(config_dict, raw_data)
+    var_names = list(input_functions.STATION_VARIABLES.keys())
+
+    expected_ws = input_functions._convert_units(config_dict, raw_data.iloc[:, config_dict['uz_col']].to_numpy(),
+                                                 'wind_speed')
+    np.testing.assert_array_equal(station_matrix[30:40, var_names.index('ws')], expected_ws[30:40])
+    assert np.isnan(station_matrix[10, var_names.index('tmax')])
+    assert np.isnan(station_matrix[20, :]).all()
+    assert np.isnan(station_matrix[:, var_names.index('tdew')]).all()  # not provided in config
+
+    with open(config_dict['log_file_path'], 'r') as f:
+        log_text = f.read()
+    assert 'tmax: 1 ' in log_text
+    assert '1 days were removed for having identical maximum and minimum temperatures.' in log_text
+
+
+def test_aggregate_subdaily_file(tmp_path):
+    """Check that hourly logger data streamed in small chunks is aggregated into the expected daily values"""
+
+    interval_end = pd.date_range('2020-06-01 01:00', '2020-06-11 00:00', freq='h')  # 10 days of hourly data
+    hour = (interval_end - pd.Timedelta(hours=1)).hour.to_numpy()
+    hourly_data = pd.DataFrame({'timestamp': interval_end.strftime('%m/%d/%Y %H:%M'),
+                                'air_temp': 60.0 + 20.0 * np.sin(np.pi * hour / 24.0),
+                                'solar': np.where((hour > 6) & (hour < 18), 30.0, 0.0),
+                                'rain': np.where(hour == 12, 0.1, 0.0)})
+    hourly_data.loc[30:50, 'air_temp'] = np.nan  # second day is missing most of its temperature observations
+    hourly_data.to_csv(tmp_path / 'hourly_data.csv', index=False)
+
+    config_dict = input_functions._read_config(config_file_path)
+    config_dict.update({'data_file_path': str(tmp_path / 'hourly_data.csv'), 'log_file_path': str(tmp_path / 'log.txt'),
+                        'lines_of_header': 0, 'data_timestep_minutes': 60, 'tmax_col': 1, 'tmin_col': 1,
+                        'tavg_col': 1, 'ea_col': -1, 'rhmax_col': -1, 'rhmin_col': -1, 'rhavg_col': -1,
+                        'uz_col': -1, 'rs_col': 2, 'pp_col': 3, 'string_date_col': 0})
+    (used_cols, column_lookup) = input_functions._project_columns(config_dict)
+    (daily_data, daily_lookup) = input_functions._aggregate_subdaily_file(config_dict, ',', used_cols, column_lookup,
+                                                                          chunksize=50)
+
+    assert daily_data.shape[0] == 10
+    assert (pd.to_datetime(daily_data['date']) == pd.date_range('2020-06-01', periods=10)).all()
+    assert daily_data.iloc[0, daily_lookup['tmax_col']] == pt.approx(80.0)
+    assert daily_data.iloc[0, daily_lookup['tmin_col']] == pt.approx(60.0)
+    assert daily_data.iloc[0, daily_lookup['rs_col']] == pt.approx(11 * 30.0)  # langleys are summed over the day
+    assert daily_data.iloc[0, daily_lookup['pp_col']] == pt.approx(0.1)
+    assert np.isnan(daily_data.iloc[1, daily_lookup['tavg_col']])
+    assert not np.isnan(daily_data.iloc[1, daily_lookup['pp_col']])
+
+
+def test_station_archive(tmp_path):
+    """Check that a station archive loads the same data as the file it was exported from, without copying it"""
+
+    with open(config_file_path, 'r') as f:
+        config_text = f.read().replace(data_file_path, str(tmp_path / 'test_data.csv'))
+    with open(data_file_path, 'rb') as f:
+        (tmp_path / 'test_data.csv').write_bytes(f.read())
+    (tmp_path / 'test_config.ini').write_text(config_text)
+    (tmp_path / 'archive_config.ini').write_text(config_text.replace('test_data.csv', 'test_data.agwqc'))
+
+    archive_path = input_functions.export_station_archive(str(tmp_path / 'test_config.ini'))
+    assert archive_path == str(tmp_path / 'test_data.agwqc')
+
+    (parsed_df, parsed_ser, _, _, parsed_config) = input_functions._obtain_data(str(tmp_path / 'test_config.ini'))
+    (archive_df, archive_ser, _, _, archive_config) = input_functions._obtain_data(str(tmp_path / 'archive_config.ini'))
+
+    pd.testing.assert_frame_equal(parsed_df, archive_df, check_freq=False)
+    assert (parsed_ser == archive_ser[parsed_ser.index]).all()
+    assert archive_config['station_elevation'] == parsed_config['station_elevation']
+
+    (station_data, header) = agweatherqaqc.archive_functions.read_station_archive(archive_path)
+    assert station_data.shape == (11, parsed_df.shape[0])
+    assert np.shares_memory(station_data, agweatherqaqc.archive_functions.archive_to_dataframe(station_data, header)[0]
+                            ['tmax'].to_numpy())
+
+    # WeatherQC takes its variables from the block mapped by _obtain_data, which data_df also shares
+    station_qaqc = WeatherQC(str(tmp_path / 'archive_config.ini'))
+    station_qaqc._obtain_data()
+    assert np.shares_memory(station_qaqc.data_tmax, station_qaqc.config_dict['station_archive_data']['tmax'])
+    assert np.shares_memory(station_qaqc.data_tmax, station_qaqc.data_df['tmax'].to_numpy())
+
+
+def test_grouped_stats():
+    """Check that grouped reductions match np.nanmean and np.nanstd of each month, including an empty month"""
+    month = np.tile(np.arange(1, 12), 40)  # december has no observations
+    rng = np.random.default_rng(0)
+    values = rng.normal(10, 5, (3, month.size))
+    values[rng.random(values.shape) < 0.1] = np.nan
+    values[1, month == 3] = np.nan  # one variable is entirely missing in march
+
+    groups = group_functions.month_groups(month)
+    (means, stds, counts) = group_functions.grouped_stats(groups, values)
+    assert means.shape == (3, 12)
+
+    for k in range(11):
+        month_values = values[:, month == k + 1]
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)  # nanmean and nanstd of the missing march values warn
+            np.testing.assert_allclose(means[:, k], np.nanmean(month_values, axis=1), rtol=1e-12)
+            np.testing.assert_allclose(stds[:, k], np.nanstd(month_values, axis=1), rtol=1e-12)
+        np.testing.assert_array_equal(counts[:, k], np.sum(~np.isnan(month_values), axis=1))
+        np.testing.assert_array_equal(group_functions.group_members(groups, k), np.where(month == k + 1)[0])
+    assert np.isnan(means[:, 11]).all() and (counts[:, 11] == 0).all()
+
+    np.testing.assert_array_equal(group_functions.grouped_nanmean(groups, values[0]), means[0])
+    np.testing.assert_array_equal(group_functions.grouped_nanstd(groups, values[2]), stds[2])
+    np.testing.assert_array_equal(group_functions.grouped_count(groups, values[1]), counts[1])
+
+
+@pt.mark.parametrize('dtype', [np.float64, np.float32])
+def test_grouped_outlier_detection(dtype):
+    """Check grouped medians and modified z-score outliers against np.nanmedian of each month"""
+    month = np.tile(np.arange(1, 12), 40)  # december has no observations
+    rng = np.random.default_rng(0)
+    values = np.round(rng.standard_t(2, (2, month.size)) * 5, 1).astype(dtype)
+    values[rng.random(values.shape) < 0.1] = np.nan
+    values[1, month == 3] = np.nan  # one variable is entirely missing in march
+
+    groups = group_functions.month_groups(month)
+    medians = group_functions.grouped_nanmedian(groups, values)
+    (cleaned_values, outlier_counts) = qaqc_functions.grouped_modified_z_score_outlier_detection(groups, values)
+    assert medians.dtype == dtype and cleaned_values.dtype == dtype
+    assert np.isnan(medians[:, 11]).all() and np.isnan(medians[1, 2]) and (outlier_counts[:, 11] == 0).all()
+
+    for k in range(11):
+        month_values = values[:, month == k + 1]
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)  # nanmedian of the missing march values warns
+            month_medians = np.nanmedian(month_values, axis=1)
+            mad = np.nanmedian(np.abs(month_values - month_medians[:, np.newaxis]), axis=1)
+            expected_outliers = np.abs(0.6745 * (month_values - month_medians[:, np.newaxis]) /
+                                       mad[:, np.newaxis]) > 3.5
+        np.testing.assert_array_equal(medians[:, k], month_medians)
+        np.testing.assert_array_equal(outlier_counts[:, k], expected_outliers.sum(axis=1))
+        np.testing.assert_array_equal(np.isnan(cleaned_values[:, month == k + 1]),
+                                      np.isnan(month_values) | expected_outliers)
+    assert outlier_counts.sum() > 0
+
+
+def test_rolling_outlier_detection():
+    """Check rolling day of year medians against np.nanmedian of each window, and that a spike is removed"""
+    doy = np.tile(np.arange(1, 366), 6)
+    rng = np.random.default_rng(0)
+    values = np.round(10 * np.sin(doy / 365 * 2 * np.pi) + rng.standard_t(3, doy.size), 1)
+    values[rng.random(doy.size) < 0.1] = np.nan
+    values[30] = values[30] + 15  # spike on the last day of january
+
+    (medians, mads) = group_functions.rolling_doy_median_mad(doy, values, 15)
+    for day in [0, 30, 200, 364, 365]:  # windows that wrap around the end of the year, and the empty leap day
+        window = values[np.abs((doy - 1 - day + 183) % 366 - 183) <= 15]
+        window_median = np.nanmedian(window)
+        np.testing.assert_array_equal(medians[day], window_median)
+        np.testing.assert_array_equal(mads[day], np.nanmedian(np.abs(window - window_median)))
+
+    (cleaned_values, outlier_count) = qaqc_functions.rolling_modified_z_score_outlier_detection(doy, values, 15)
+    assert np.isnan(cleaned_values[30]) and outlier_count == np.count_nonzero(np.isnan(cleaned_values)
+                                                                              & ~np.isnan(values))
+    with pt.raises(ValueError):
+        group_functions.rolling_doy_median_mad(doy, values, 183)
+
+
+def test_monte_carlo_rs_tr(tmp_path):
+    """Check that the batched monte carlo selects the same coefficients as evaluating calc_rs_tr on each of them"""
+    dates = pd.date_range('2000-01-01', '2003-12-31')
+    month = np.array(dates.month)
+    rng = np.random.default_rng(1)
+    doy = np.array(dates.dayofyear)
+    delta_t = 12 + 4 * np.sin(2 * np.pi * doy / 365) + rng.normal(0, 2, dates.size)
+    rso = 250 + 100 * np.sin(2 * np.pi * (doy - 80) / 365)
+    rs = rso * rng.uniform(0.4, 1.0, dates.size)
+    rs[rng.random(dates.size) < 0.1] = np.nan
+    delta_t[:20] = np.nan
+    mm_delta_t = group_functions.grouped_nanmean(group_functions.month_groups(month), delta_t)
+
+    mc_iterations = 300
+    np.random.seed(7)
+    b_zero = 0.031 + (0.031 * 0.5) * np.random.uniform(low=-1, high=1, size=mc_iterations)
+    b_one = 0.201 + (0.201 * 0.5) * np.random.uniform(low=-1, high=1, size=mc_iterations)
+    b_two = -0.185 + (-0.185 * 0.5) * np.random.uniform(low=-1, high=1, size=mc_iterations)
+    loop_rmse = [np.sqrt(np.nanmean((calc_functions.calc_rs_tr(month, rso, delta_t, mm_delta_t, b_zero[i], b_one[i],
+                                                                b_two[i])[0] - rs) ** 2)) for i in range(mc_iterations)]
+    best = np.nanargmin(loop_rmse)
+
+    np.random.seed(7)
+    (_, _, opt_rs_tr, _) = calc_functions.calc_org_and_opt_rs_tr(mc_iterations, str(tmp_path / 'log.txt'), month,
+                                                                  delta_t, mm_delta_t, rs, rso)
+    expected_rs_tr = calc_functions.calc_rs_tr(month, rso, delta_t, mm_delta_t, b_zero[best], b_one[best],
+                                               b_two[best])[0]
+    np.testing.assert_array_equal(opt_rs_tr, expected_rs_tr)
+
+    valid = ~(np.isnan(rs) | np.isnan(delta_t))
+    batch_rmse = calc_functions._batch_rs_tr_rmse(month[valid] - 1, rso[valid], delta_t[valid] ** 1.5, mm_delta_t,
+                                                  rs[valid], b_zero, b_one, b_two)
+    np.testing.assert_allclose(batch_rmse, loop_rmse, rtol=1e-12)
+
+
+def test_pattern_search_rs_tr(tmp_path):
+    """Check that the pattern search optimizer is deterministic, within budget, and beats the monte carlo simulation"""
+    dates = pd.date_range('2000-01-01', '2005-12-31')
+    month = np.array(dates.month)
+    doy = np.array(dates.dayofyear)
+    rng = np.random.default_rng(2)
+    delta_t = 12 + 4 * np.sin(2 * np.pi * doy / 365) + rng.normal(0, 2, dates.size)
+    rso = 250 + 100 * np.sin(2 * np.pi * (doy - 80) / 365)
+    mm_delta_t = group_functions.grouped_nanmean(group_functions.month_groups(month), delta_t)
+    rs = calc_functions.calc_rs_tr(month, rso, delta_t, mm_delta_t, 0.035, 0.25, -0.22)[0] + \
+        rng.normal(0, 15, dates.size)
+    log_path = str(tmp_path / 'log.txt')
+
+    np.random.seed(3)
+    mc_rs_tr = calc_functions.calc_org_and_opt_rs_tr(1000, log_path, month, delta_t, mm_delta_t, rs, rso)[2]
+    ps_rs_tr = calc_functions.calc_org_and_opt_rs_tr(1000, log_path, month, delta_t, mm_delta_t, rs, rso,
+                                                     optimizer='pattern_search')[2]
+    assert np.sqrt(np.nanmean((ps_rs_tr - rs) ** 2)) <= np.sqrt(np.nanmean((mc_rs_tr - rs) ** 2))
+    np.testing.assert_array_equal(ps_rs_tr, calc_functions.calc_org_and_opt_rs_tr(
+        100, log_path, month, delta_t, mm_delta_t, rs, rso, optimizer='pattern_search')[2])
+
+    (coefficients, rmse, evaluations) = calc_functions._pattern_search_rs_tr(
+        lambda b_zero, b_one, b_two: np.hypot(b_one - 0.25, b_zero - 0.035), 1e-6, 50)
+    assert coefficients.shape == (1, 3) and evaluations[0] == 50
+    with open(log_path) as f:
+        assert 'Pattern search with a tolerance of 0.001' in f.read()
+
+
+def test_monthly_rs_tr_coefficients(tmp_path):
+    """Check that fitting coefficients for each month improves on a single set when the true coefficients vary"""
+    dates = pd.date_range('2000-01-01', '2005-12-31')
+    month = np.array(dates.month)
+    doy = np.array(dates.dayofyear)
+    rng = np.random.default_rng(4)
+    delta_t = 12 + 4 * np.sin(2 * np.pi * doy / 365) + rng.normal(0, 2, dates.size)
+    rso = 250 + 100 * np.sin(2 * np.pi * (doy - 80) / 365)
+    mm_delta_t = group_functions.grouped_nanmean(group_functions.month_groups(month), delta_t)
+    seasonal = 1 + 0.3 * np.cos(2 * np.pi * np.arange(12) / 12)
+    true_rs_tr = calc_functions.calc_rs_tr(month, rso, delta_t, mm_delta_t, 0.031 * seasonal, 0.201 * seasonal,
+                                           -0.185 / seasonal)[0]
+    np.testing.assert_allclose(true_rs_tr[month == 1], calc_functions.calc_rs_tr(
+        month, rso, delta_t, mm_delta_t, 0.031 * 1.3, 0.201 * 1.3, -0.185 / 1.3)[0][month == 1])
+    rs = true_rs_tr + rng.normal(0, 10, dates.size)
+    log_path = str(tmp_path / 'log.txt')
+
+    def fit_rmse(**kwargs):
+        np.random.seed(5)
+        opt_rs_tr = calc_functions.calc_org_and_opt_rs_tr(1000, log_path, month, delta_t, mm_delta_t, rs, rso,
+                                                          **kwargs)[2]
+        return np.sqrt(np.nanmean((opt_rs_tr - rs) ** 2))
+
+    for optimizer in ['monte_carlo', 'pattern_search']:
+        assert fit_rmse(optimizer=optimizer, monthly_coefficients=True) < fit_rmse(optimizer=optimizer)
+
+    with open(log_path) as f:
+        log_text = f.read()
+    assert log_text.count('produced the monthly coefficients') == 2
+    assert 'Month 12: b_zero' in log_text
+
+
+@pt.mark.parametrize('option, expected_stale', [
+    (1, {'complete_temperature', 'humidity', 'delta_t', 'compiled_ea', 'complete_ea', 'rso'}),
+    (2, {'complete_temperature', 'humidity', 'delta_t', 'complete_tdew', 'compiled_ea', 'complete_ea', 'rso'}),
+    (3, set()),
+    (4, set()),
+    (5, set()),
+    (9, {'complete_ea', 'rso'}),
+])
+def test_correction_dependencies(option, expected_stale):
+    """Check that a correction only marks the derived quantities downstream of the corrected variables as stale"""
+    station_qaqc = WeatherQC.__new__(WeatherQC)
+    station_qaqc.stale = set()
+    station_qaqc._mark_stale(CORRECTED_VARIABLES[option])
+    assert station_qaqc.stale == expected_stale
+
+
+def test_compiled_ea_sources():
+    """Check that compiled ea uses the best available humidity source for each day and reports which one was used"""
+    tmax = np.full(6, 30.0)
+    tmin = np.full(6, 10.0)
+    tavg = (tmax + tmin) / 2
+    ea = np.array([1.5, nan, nan, nan, nan, nan])
+    tdew = np.array([5.0, 6.0, nan, nan, nan, nan])
+    rhmax = np.array([90.0, 90.0, 90.0, nan, nan, nan])
+    rhmin = np.full(6, 20.0)
+    rhavg = np.array([50.0, 50.0, 50.0, 50.0, nan, nan])
+    tdew_ko = np.array([4.0, 4.0, 4.0, 4.0, 4.0, nan])
+
+    (compiled_ea, compiled_ea_source) = calc_functions.calc_compiled_ea(tmax, tmin, tavg, ea, tdew, 1, rhmax, 2,
+                                                                        rhmin, 3, rhavg, 4, tdew_ko)
+    assert compiled_ea_source.dtype == np.int8
+    assert [calc_functions.COMPILED_EA_SOURCES[k] for k in compiled_ea_source] == \
+        ['ea', 'tdew', 'rhmax_rhmin', 'rhavg', 'tdew_ko', 'none']
+    assert compiled_ea[0] == 1.5
+    assert compiled_ea[1] == pt.approx(0.6108 * np.exp((17.27 * 6.0) / (6.0 + 237.3)))
+    assert compiled_ea[4] == pt.approx(0.6108 * np.exp((17.27 * 4.0) / (4.0 + 237.3)))
+    assert np.isnan(compiled_ea[5])
+
+    # Sources that were not provided are skipped
+    compiled_ea_source = calc_functions.calc_compiled_ea(tmax, tmin, tavg, ea, tdew, -1, rhmax, 2, rhmin, 3, rhavg,
+                                                         -1, tdew_ko)[1]
+    np.testing.assert_array_equal(compiled_ea_source, [1, 3, 3, 5, 5, 0])
+
+
+def test_date_functions():
+    """Check the vectorized date conversions and daily reindexing against pandas"""
+    dates = pd.date_range('1999-12-25', '2001-03-05')
+    (year, month, day, doy) = date_functions.split_dates(np.asarray(dates))
+    np.testing.assert_array_equal(year, dates.year)
+    np.testing.assert_array_equal(month, dates.month)
+    np.testing.assert_array_equal(day, dates.day)
+    np.testing.assert_array_equal(doy, dates.dayofyear)
+    np.testing.assert_array_equal(date_functions.dates_from_ymd(year, month, day), dates.values.astype('M8[D]'))
+    np.testing.assert_array_equal(date_functions.dates_from_year_doy(year, doy), dates.values.astype('M8[D]'))
+
+    with pt.raises(ValueError):
+        date_functions.dates_from_ymd([2001], [2], [29])
+    with pt.raises(ValueError):
+        date_functions.dates_from_year_doy([2001], [366])
+
+    # Record with a two day gap and a duplicated day, the first instance of which is kept
+    record_dates = np.array(['2000-01-01', '2000-01-02', '2000-01-02', '2000-01-05'], dtype='datetime64[D]')
+    values = np.array([[1.0, 10.0], [2.0, 20.0], [3.0, 30.0], [4.0, 40.0]])
+    (daily_dates, daily_values, missing_dates) = date_functions.reindex_daily(record_dates, values)
+
+    expected_df = pd.DataFrame(values, index=pd.DatetimeIndex(record_dates))
+    expected_df = expected_df[~expected_df.index.duplicated(keep='first')]
+    expected_df = expected_df.reindex(pd.date_range('2000-01-01', '2000-01-05'))
+    np.testing.assert_array_equal(daily_dates, expected_df.index.values.astype('M8[D]'))
+    np.testing.assert_array_equal(daily_values, expected_df.to_numpy())
+    assert missing_dates == 2
+
+
+def test_rs_period_ratio_corr(tmp_path):
+    """Check that a spike is removed from the correction factor, on an interval that is a multiple of the period"""
+    rso = np.full(20, 200.0)
+    rs = np.full(20, 160.0)
+    rs[3] = 400.0
+    with open(tmp_path / 'correction_log.txt', 'w') as log_writer:
+        (corr_rs, _) = qaqc_functions.rs_period_ratio_corr(log_writer, 0, 20, rs, rso, 3, 10)
+
+    expected_rs = np.full(20, 200.0)
+    expected_rs[3] = 210.0  # bad values are set to 1.05 * rso
+    np.testing.assert_array_equal(corr_rs, expected_rs)
+    assert '1 data points were removed as part of the suspect value' in (tmp_path / 'correction_log.txt').read_text()
+
+
+def test_rh_yearly_percentile_corr(tmp_path):
+    """Check that each day gets the factor of its own year when a year is missing from inside the interval"""
+    year = np.repeat([2000, 2002, 2003], 100)
+    rhmax = np.tile(np.linspace(40.0, 80.0, 100), 3)
+    rhmax[100:200] *= 0.5
+    rhmin = rhmax - 30.0
+    with open(tmp_path / 'correction_log.txt', 'w') as log_writer:
+        (corr_rhmax, corr_rhmin) = qaqc_functions.rh_yearly_percentile_corr(log_writer, 50, 300, rhmax, rhmin,
+                                                                          year, 1)
+
+    # One day is sampled per year, so the largest value of every year is corrected to 100
+    np.testing.assert_array_equal(corr_rhmax[:50], rhmax[:50])
+    np.testing.assert_allclose(corr_rhmax[50:], rhmax[50:] * np.repeat([100 / 80, 100 / 40, 100 / 80], 100)[50:])
+    np.testing.assert_allclose(corr_rhmax[[99, 199, 299]], 100.0)
+    assert np.all(corr_rhmin[50:] < corr_rhmax[50:])
+
+
+def test_kernels():
+    """Check that the compiled loops, run here as plain python, and the NumPy versions give identical results"""
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        # Many spikes and gaps so that some periods are thrown out and some need more candidates than are sorted
+        rso = rng.uniform(100, 300, (8, 30))
+        rs = rso * rng.uniform(0.5, 1.1, (8, 30))
+        spikes = rng.random((8, 30)) < rng.choice([0.05, 0.5])
+        rs[spikes] *= rng.uniform(1.5, 4, np.sum(spikes))
+        rs[rng.random((8, 30)) < rng.choice([0, 0.5, 0.9])] = nan
+        period_lengths = np.full(8, 30)
+        period_lengths[-1] = 12
+        rs[-1, 12:] = rso[-1, 12:] = nan
+        sample_size = int(rng.integers(1, 10))
+        loop_result = kernels._rs_search_periods_loop(rs, rso, period_lengths, sample_size)
+        numpy_result = kernels._rs_search_periods_numpy(rs, rso, period_lengths, sample_size)
+        for (loop_values, numpy_values) in zip(loop_result, numpy_result):
+            np.testing.assert_array_equal(loop_values, numpy_values)
+
+    rso = rng.uniform(100, 300, 100)
+    rs = rso * rng.uniform(0.5, 1.1, 100)
+    marked_rs = np.where(rng.random(100) < 0.1, kernels.BAD_VALUE_MARKER, rs)
+    period_corr = np.array([0.8, 1.0, 1.7, nan, 1.2])
+    (loop_rs, numpy_rs) = (np.array(marked_rs), np.array(marked_rs))
+    assert kernels._rs_apply_period_factors_loop(rs, rso, loop_rs, period_corr, 20) == \
+        kernels._rs_apply_period_factors_numpy(rs, rso, numpy_rs, period_corr, 20)
+    np.testing.assert_array_equal(loop_rs, numpy_rs)
+
+    rhmax = rng.uniform(40, 105, 100)
+    rhmin = rhmax - rng.uniform(-5, 60, 100)
+    day_factors = rng.uniform(0.9, 1.3, 100)
+    (loop_rh, numpy_rh) = ((np.empty(100), np.empty(100)), (np.empty(100), np.empty(100)))
+    assert kernels._rh_apply_year_factors_loop(rhmax, rhmin, *loop_rh, day_factors) == \
+        kernels._rh_apply_year_factors_numpy(rhmax, rhmin, *numpy_rh, day_factors)
+    np.testing.assert_array_equal(loop_rh, numpy_rh)
+
+    month = np.tile(np.arange(1, 13), 10)
+    tmax = rng.uniform(0, 30, 120)
+    tmin = tmax - rng.uniform(-2, 15, 120)
+    monthly_means = (rng.uniform(10, 30, 12), rng.uniform(-5, 10, 12), rng.uniform(5, 20, 12))
+    (loop_temps, numpy_temps) = ([np.array(tmax), np.array(tmin), np.zeros(120), np.zeros(120)] for _ in range(2))
+    kernels._separate_temperatures_loop(*loop_temps, month, *monthly_means)
+    kernels._separate_temperatures_numpy(*numpy_temps, month, *monthly_means)
+    np.testing.assert_array_equal(loop_temps, numpy_temps)
+    assert np.all(loop_temps[0] - loop_temps[1] > 3)
+
+
+def test_float32_precision(tmp_path, monkeypatch):
+    """Check that storing and calculating station variables in 32 bit stays close to the 64 bit results"""
+    with open(config_file_path, 'r') as f:
+        config_text = f.read().replace(data_file_path, str(tmp_path / 'test_data.csv'))\
+            .replace('FILL_RANDOM_SEED = -1', 'FILL_RANDOM_SEED = 0')
+    with open(data_file_path, 'rb') as f:
+        (tmp_path / 'test_data.csv').write_bytes(f.read())
+    (tmp_path / 'config_64.ini').write_text(config_text.replace('INPUT_CACHE_SIZE_MB = 256', 'INPUT_CACHE_SIZE_MB = 0'))
+    (tmp_path / 'config_32.ini').write_text(config_text.replace('INPUT_CACHE_SIZE_MB = 256', 'INPUT_CACHE_SIZE_MB = 0')
+                                            .replace('FLOAT_PRECISION = 64', 'FLOAT_PRECISION = 32'))
+    monkeypatch.setattr('builtins.input', lambda prompt='': '0')  # finish correcting without any corrections
+
+    secondary_vars = ['data_tmax', 'data_ea', 'delta_t', 'compiled_ea', 'rso', 'eto', 'etr', 'orig_rs_tr', 'opt_rs_tr']
+    (secondary, results) = ({}, {})
+    for precision in [64, 32]:
+        station_qaqc = WeatherQC(str(tmp_path / 'config_{}.ini'.format(precision)))
+        station_qaqc._obtain_data()
+        station_qaqc._calculate_secondary_vars()
+        secondary[precision] = {var: np.array(getattr(station_qaqc, var)) for var in secondary_vars}
+        station_qaqc._correct_data()
+        results[precision] = station_qaqc
+
+    # Inputs are rounded to 32 bit, which is amplified up to a few parts per million in reference ET
+    for var in secondary_vars:
+        assert secondary[32][var].dtype == np.float32, var
+        np.testing.assert_allclose(secondary[32][var], secondary[64][var], rtol=5e-6, atol=1e-6, err_msg=var)
+    # Final records are recalculated after corrections, here none were made
+    for var in ['data_tmax', 'data_tmin', 'data_rs', 'rso', 'opt_rs_tr', 'eto', 'etr']:
+        assert getattr(results[32], var).dtype == np.float32, var
+        np.testing.assert_allclose(getattr(results[32], var), getattr(results[64], var), rtol=5e-6, atol=1e-6,
+                                   err_msg=var)
+    # Monthly means are reduced in 64 bit
+    for var in ['mm_delta_t', 'mm_k_not', 'mm_rs', 'mm_eto', 'mm_etr']:
+        assert getattr(results[32], var).dtype == np.float64, var
+        np.testing.assert_allclose(getattr(results[32], var), getattr(results[64], var), rtol=1e-6, err_msg=var)
+
+
+def test_fill_random_seed(tmp_path, monkeypatch):
+    """Check that a seeded config fills the same values on every run, and that invalid seeds are rejected"""
+    with open(config_file_path, 'r') as f:
+        config_text = f.read().replace(data_file_path, str(tmp_path / 'test_data.csv'))\
+            .replace('INPUT_CACHE_SIZE_MB = 256', 'INPUT_CACHE_SIZE_MB = 0')
+    # Remove rs and wind speed from the middle of the data so they have gaps to fill
+    with open(data_file_path, 'r', encoding='utf-8-sig') as f:
+        data_lines = f.read().splitlines()
+    for line_index in range(100, 130):
+        fields = data_lines[line_index].split(',')
+        (fields[5], fields[14]) = ('', '')
+        data_lines[line_index] = ','.join(fields)
+    (tmp_path / 'test_data.csv').write_text('\n'.join(data_lines) + '\n')
+    assert input_functions._read_config(config_file_path)['fill_random_seed'] == -1
+
+    (tmp_path / 'config_seeded.ini').write_text(config_text.replace('FILL_OPTION = 0', 'FILL_OPTION = 1')
+                                                .replace('FILL_RANDOM_SEED = -1', 'FILL_RANDOM_SEED = 7'))
+    monkeypatch.setattr(qaqc_functions, 'show', lambda fig: None)
+    filled = []
+    for _ in range(2):
+        # Remove a temperature interval, which fills the gaps in temperature, then finish correcting
+        answers = iter(['1', '200', '230', '3', '1'])
+        monkeypatch.setattr('builtins.input', lambda prompt='': next(answers, '0'))
+        station_qaqc = WeatherQC(str(tmp_path / 'config_seeded.ini'))
+        station_qaqc._obtain_data()
+        station_qaqc._calculate_secondary_vars()
+        station_qaqc._correct_data()
+        filled.append([station_qaqc.fill_tmax, station_qaqc.fill_tmin, station_qaqc.fill_ws, station_qaqc.fill_rs,
+                       station_qaqc.eto])
+
+    assert all(np.any(fill_values) for fill_values in filled[0][:4])  # every variable had gaps to fill
+    for (first_run, second_run) in zip(*filled):
+        np.testing.assert_array_equal(first_run, second_run)
+
+    (tmp_path / 'config_invalid.ini').write_text(config_text.replace('FILL_RANDOM_SEED = -1', 'FILL_RANDOM_SEED = -2'))
+    with pt.raises(ValueError):
+        input_functions._read_config(str(tmp_path / 'config_invalid.ini'))
+
+
+def test_replay_correction(tmp_path):
+    """Check that recipe steps replay in order without prompting, and that malformed recipes are rejected"""
+    dt_array = pd.date_range('2000-01-01', periods=10, freq='D')
+    tmax = np.linspace(20.0, 29.0, 10)
+    tmin = tmax - 10.0
+    steps = [{'method': 'additive', 'start': 2, 'end': 6, 'modifier': 1.5},
+             {'method': 'multiplicative', 'start': 4, 'end': 8, 'modifier': 2.0},
+             {'method': 'set_to_nan', 'start': 9, 'end': 10}]
+    (corr_tmax, corr_tmin) = qaqc_functions.replay_correction(str(tmp_path / 'log.txt'), tmax, tmin, dt_array,
+                                                              dt_array.month.to_numpy(), dt_array.year.to_numpy(),
+                                                              1, steps)
+
+    expected_tmax = tmax.copy()
+    expected_tmax[2:6] += 1.5
+    expected_tmax[4:8] *= 2.0
+    expected_tmax[9] = nan
+    np.testing.assert_array_equal(corr_tmax, expected_tmax)
+    np.testing.assert_array_equal(corr_tmin[:2], tmin[:2])
+    np.testing.assert_array_equal(tmax, np.linspace(20.0, 29.0, 10))  # inputs are left unchanged
+
+    with pt.raises(ValueError):
+        qaqc_functions.replay_correction(str(tmp_path / 'log.txt'), tmax, tmin, dt_array, dt_array.month.to_numpy(),
+                                         dt_array.year.to_numpy(), 1, [{'method': 'rs_period_ratio', 'start': 0,
+                                                                        'end': 10, 'period': 5, 'sample_size': 1}])
+    with pt.raises(ValueError):
+        qaqc_functions.replay_correction(str(tmp_path / 'log.txt'), tmax, tmin, dt_array, dt_array.month.to_numpy(),
+                                         dt_array.year.to_numpy(), 1, [{'method': 'additive', 'start': 0, 'end': 11,
+                                                                        'modifier': 1.0}])
+
+    (tmp_path / 'recipe.json').write_text('{"station": "test", "steps": [{"option": 10, "corrections": []}]}')
+    with pt.raises(ValueError):
+        input_functions.read_correction_recipe(str(tmp_path / 'recipe.json'))
+    (tmp_path / 'recipe.json').write_text('{"station": "test", "steps": [{"option": 1, "corrections": []}]}')
+    assert input_functions.read_correction_recipe(str(tmp_path / 'recipe.json'))['steps'][0]['option'] == 1
+
+
+def test_correction_undo_redo(tmp_path, monkeypatch):
+    """Check that undoing and redoing corrections restores their intervals, and that only kept steps are recorded"""
+    dt_array = pd.date_range('2000-01-01', periods=10, freq='D')
+    tmax = np.linspace(20.0, 29.0, 10)
+    tmin = tmax - 10.0
+    # add 1.5 to 2-6, multiply 4-8 by 2, undo both, fail to undo a third time, redo the addition, then finish
+    answers = iter(['2', '6', '1', '+1.5', '2',
+                    '4', '8', '2', '+2.0', '5', '5', '5', '6', '1'])
+    monkeypatch.setattr('builtins.input', lambda prompt='': next(answers))
+    monkeypatch.setattr(qaqc_functions, 'show', lambda fig: None)
+
+    recipe_steps = []
+    (corr_tmax, corr_tmin) = qaqc_functions.correction('test', str(tmp_path / 'log.txt'), str(tmp_path), tmax, tmin,
+                                                       dt_array, dt_array.month.to_numpy(), dt_array.year.to_numpy(),
+                                                       1, recipe_steps=recipe_steps)
+
+    expected_tmax = tmax.copy()
+    expected_tmax[2:6] += 1.5
+    np.testing.assert_array_equal(corr_tmax, expected_tmax)
+    np.testing.assert_array_equal(corr_tmin, expected_tmax - 10.0)
+    np.testing.assert_array_equal(tmax, np.linspace(20.0, 29.0, 10))  # inputs keep the original values
+    assert recipe_steps == [{'method': 'additive', 'start': 2, 'end': 6, 'modifier': 1.5}]
+    assert next(answers, None) is None
+
+
+def test_correction_recipe_round_trip(tmp_path, monkeypatch):
+    """Check that replaying the recipe saved by an unseeded session reproduces its corrections, including rs"""
+    with open(config_file_path, 'r') as f:
+        config_text = f.read().replace(data_file_path, str(tmp_path / 'test_data.csv'))\
+            .replace('INPUT_CACHE_SIZE_MB = 256', 'INPUT_CACHE_SIZE_MB = 0')
+    with open(data_file_path, 'rb') as f:
+        (tmp_path / 'test_data.csv').write_bytes(f.read())
+    (tmp_path / 'config.ini').write_text(config_text)
+    monkeypatch.setattr(qaqc_functions, 'show', lambda fig: None)
+
+    # Remove a temperature interval, then correct rs by period ratios without adjusting humidity first
+    answers = iter(['1', '200', '230', '3', '1',
+                    '5', '0', '-1', '4', '60', '6', '1',
+                    '0'])
+    monkeypatch.setattr('builtins.input', lambda prompt='': next(answers))
+    session = WeatherQC(str(tmp_path / 'config.ini'))
+    session._obtain_data()
+    session._calculate_secondary_vars()
+    session._correct_data()
+    assert next(answers, None) is None
+
+    def no_prompts(prompt=''):
+        raise AssertionError('Replaying a recipe prompted the user: ' + prompt)
+
+    monkeypatch.setattr('builtins.input', no_prompts)
+    replay = WeatherQC(str(tmp_path / 'config.ini'),
+                       recipe_file_path=str(tmp_path / 'correction_files' / 'test_data_correction_recipe.json'))
+    replay._obtain_data()
+    replay._calculate_secondary_vars()
+    replay._correct_data()
+
+    assert replay.fill_random_seed == session.fill_random_seed
+    assert np.count_nonzero(np.isnan(session.data_tmax)) > np.count_nonzero(np.isnan(session.original_df['tmax']))
+    assert not np.array_equal(session.data_rs, session.original_df['rs'], equal_nan=True)
+    for var in ['data_tmax', 'data_tmin', 'data_rs', 'rso', 'eto', 'etr']:
+        np.testing.assert_array_equal(getattr(replay, var), getattr(session, var), err_msg=var)